@@ -0,0 +1,276 @@
+"""
+Нагрузочная проверка checkout: много параллельных заказов на товары с малым остатком.
+
+    python -m benchmarks.checkout_stress --orders 300 --concurrency 50 --products 5 --stock 20
+
+Создаёт отдельные товары, отправляет заказы параллельно, затем через заглушку
+FreedomPay проводит оплаты (часть неуспешных и повторных колбэков) и сверяет
+остатки с заказами. Код возврата 1, если товар продан сверх остатка, остаток
+ушёл в минус или остаток + заказанное не сходится с начальным количеством.
+
+По умолчанию приложение работает в процессе. С --base-url сервер должен
+смотреть в ту же БД и быть запущен с FREEDOM_ENDPOINT=http://<хост>:<--stub-port>/init_payment.php
+и тем же FREEDOM_SECRET_KEY.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+
+import httpx
+from sqlalchemy import delete, func, select
+
+import payment.freedompay.generate_freedompay_link as freedompay
+from benchmarks.freedompay_stub import FreedomPayStub
+from benchmarks.run import git_commit, percentile
+from cart.models import CartItem
+from catalog.models import Product, ProductImage
+from config.database import async_session_maker, engine
+from order.models import Order, OrderInfo, OrderItem, OrderStatus
+
+# Товары прогона не пересекаются с каталогом из benchmarks.seed
+STRESS_GOOD_ID_START = 900_000_000
+
+
+async def cleanup():
+    """Удаляет товары прогона вместе с корзинами и заказами на них."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(OrderItem.order_id).where(OrderItem.product_id >= STRESS_GOOD_ID_START).distinct()
+        )
+        order_ids = result.scalars().all()
+        result = await session.execute(select(Order.info_id).where(Order.id.in_(order_ids)))
+        info_ids = result.scalars().all()
+
+        await session.execute(delete(CartItem).where(CartItem.product_id >= STRESS_GOOD_ID_START))
+        await session.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+        await session.execute(delete(Order).where(Order.id.in_(order_ids)))
+        await session.execute(delete(OrderInfo).where(OrderInfo.id.in_(info_ids)))
+        await session.execute(delete(ProductImage).where(ProductImage.good_id >= STRESS_GOOD_ID_START))
+        await session.execute(delete(Product).where(Product.good_id >= STRESS_GOOD_ID_START))
+        await session.commit()
+
+
+async def create_products(count: int, stock: int, price: float) -> dict[int, int]:
+    initial = {STRESS_GOOD_ID_START + i: stock for i in range(count)}
+    async with async_session_maker() as session:
+        for good_id, quantity in initial.items():
+            session.add(Product(
+                good_id=good_id,
+                good_name=f"Stress {good_id}",
+                articul=f"STRESS-{good_id}",
+                retail_price=price,
+                retail_price_with_discount=price,
+                warehouse_quantity=quantity,
+                min_quantity_for_order=1,
+                display=1,
+            ))
+            session.add(ProductImage(good_id=good_id, image_url=f"https://cdn.example.com/stress/{good_id}.jpg", is_main=True))
+        await session.commit()
+    return initial
+
+
+def checkout_body(session_id: str) -> dict:
+    return {
+        "session_id": session_id,
+        "email": "stress@example.com",
+        "first_name": "Stress",
+        "last_name": "Test",
+        "address_line1": "ул. Тестовая, 1",
+        "city": "Бишкек",
+        "region": "Чуй",
+        "postal_code": "720000",
+        "phone": "+996700000000",
+    }
+
+
+async def place_order(client: httpx.AsyncClient, product_id: int, quantity: int) -> tuple[str, float, str | None]:
+    session_id = str(uuid.uuid4())
+    response = await client.post("/cart/v2", json={"session_id": session_id, "product_id": product_id, "quantity": quantity})
+    if response.status_code == 404:
+        return "cart_out_of_stock", 0.0, None
+    if response.status_code != 200:
+        return f"cart_{response.status_code}", 0.0, None
+
+    start = time.perf_counter()
+    response = await client.post("/orders/checkout", json=checkout_body(session_id))
+    elapsed = time.perf_counter() - start
+    if response.status_code == 200:
+        return "ordered", elapsed, str(response.json()["order_id"])
+    if response.status_code == 400:
+        return "rejected", elapsed, None
+    return f"checkout_{response.status_code}", elapsed, None
+
+
+async def verify(initial: dict[int, int], settled: bool) -> tuple[list[str], dict]:
+    """Сверяет остатки с заказами. Отменённые заказы товар не удерживают."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Product.good_id, Product.warehouse_quantity, Product.display)
+            .where(Product.good_id.in_(initial.keys()))
+        )
+        products = {row.good_id: row for row in result}
+        result = await session.execute(select(OrderStatus.id).where(OrderStatus.name == "cancelled"))
+        cancelled_id = result.scalar()
+        result = await session.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(OrderItem.product_id.in_(initial.keys()), Order.status_id.is_distinct_from(cancelled_id))
+            .group_by(OrderItem.product_id)
+        )
+        reserved = dict(result.all())
+
+    violations = []
+    for good_id, stock in initial.items():
+        product = products[good_id]
+        remaining = product.warehouse_quantity
+        held = reserved.get(good_id, 0)
+        if remaining < 0:
+            violations.append(f"{good_id}: отрицательный остаток {remaining}")
+        if held > stock:
+            violations.append(f"{good_id}: продано {held} при остатке {stock}")
+        if remaining + held != stock:
+            violations.append(f"{good_id}: остаток {remaining} + в заказах {held} != {stock}")
+        if settled and product.display != (1 if remaining > 0 else 0):
+            violations.append(f"{good_id}: display={product.display} при остатке {remaining}")
+    summary = {
+        good_id: {"initial": stock, "remaining": products[good_id].warehouse_quantity, "in_orders": reserved.get(good_id, 0)}
+        for good_id, stock in initial.items()
+    }
+    return violations, summary
+
+
+async def verify_statuses(outcome: dict[str, bool]) -> list[str]:
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Order.id, OrderStatus.name)
+            .join(OrderStatus, OrderStatus.id == Order.status_id)
+            .where(Order.id.in_([int(order_id) for order_id in outcome]))
+        )
+        statuses = {str(order_id): name for order_id, name in result.all()}
+    violations = []
+    for order_id, success in outcome.items():
+        expected = "paid" if success else "cancelled"
+        if statuses.get(order_id) != expected:
+            violations.append(f"заказ {order_id}: статус {statuses.get(order_id)}, ожидался {expected}")
+    return violations
+
+
+async def no_email(order_id: int):
+    return None
+
+
+def in_process_client(stub_url: str) -> httpx.AsyncClient:
+    import main
+    import order.routers.checkout.router as checkout_router
+
+    freedompay.FREEDOM_ENDPOINT = stub_url
+    freedompay.FREEDOM_SECRET_KEY = freedompay.FREEDOM_SECRET_KEY or "stress-secret"
+    freedompay.FREEDOM_MERCHANT_ID = freedompay.FREEDOM_MERCHANT_ID or "stress-merchant"
+    checkout_router.send_check_email = no_email
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://stress", timeout=120)
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    stub = FreedomPayStub()
+    await stub.start(port=args.stub_port)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=120)
+    else:
+        client = in_process_client(f"http://127.0.0.1:{args.stub_port}/init_payment.php")
+
+    await cleanup()
+    initial = await create_products(args.products, args.stock, args.price)
+    total_stock = sum(initial.values())
+    product_ids = list(initial)
+
+    outcomes, latencies, order_ids = Counter(), [], []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_order():
+        async with semaphore:
+            quantity = rng.choice([1, 1, 1, 2])
+            outcome, elapsed, order_id = await place_order(client, rng.choice(product_ids), quantity)
+            outcomes[outcome] += 1
+            if elapsed:
+                latencies.append(elapsed * 1000)
+            if order_id:
+                order_ids.append(order_id)
+
+    report = {"commit": git_commit(), "target": args.base_url or "asgi", "products": args.products, "stock": args.stock}
+    async with client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one_order() for _ in range(args.orders)))
+        wall = time.perf_counter() - start
+        latencies.sort()
+        report["checkout"] = {
+            "attempts": args.orders,
+            "total_stock": total_stock,
+            "outcomes": dict(outcomes),
+            "orders_per_second": round(outcomes["ordered"] / wall, 2) if wall else 0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+        violations, _ = await verify(initial, settled=False)
+        if len(stub.payments) != len(order_ids):
+            violations.append(f"платежей в заглушке {len(stub.payments)}, заказов {len(order_ids)}")
+        if stub.rejected_signatures:
+            violations.append(f"заглушка отклонила {stub.rejected_signatures} запросов с неверной подписью")
+
+        start = time.perf_counter()
+        settled = await stub.settle(
+            client, order_ids, fail_rate=args.fail_rate, duplicate_rate=args.duplicate_rate,
+            concurrency=args.concurrency, rng=rng,
+        )
+        wall = time.perf_counter() - start
+        report["payments"] = {
+            "callbacks": settled["callbacks"],
+            "statuses": settled["statuses"],
+            "paid": sum(settled["outcome"].values()),
+            "failed": len(settled["outcome"]) - sum(settled["outcome"].values()),
+            "callbacks_per_second": round(settled["callbacks"] / wall, 2) if wall else 0,
+        }
+        settled_violations, stock_summary = await verify(initial, settled=True)
+        violations += settled_violations
+        violations += await verify_statuses(settled["outcome"])
+
+    report["stock"] = stock_summary
+    report["violations"] = violations
+    if not args.keep:
+        await cleanup()
+    await stub.stop()
+    await engine.dispose()
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Проверка checkout под параллельной нагрузкой")
+    parser.add_argument("--base-url", help="адрес запущенного сервера; без него приложение запускается в процессе")
+    parser.add_argument("--orders", type=int, default=300, help="сколько заказов отправить")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--products", type=int, default=5, help="товаров с ограниченным остатком")
+    parser.add_argument("--stock", type=int, default=20, help="начальный остаток каждого товара")
+    parser.add_argument("--price", type=float, default=1000)
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="доля неуспешных оплат")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1, help="доля повторных колбэков")
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="не удалять товары и заказы прогона")
+    parser.add_argument("--output", help="сохранить отчёт в JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run(args))
+    print(json.dumps({key: value for key, value in report.items() if key != "stock"}, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if report["violations"]:
+        raise SystemExit(1)
@@ -0,0 +1,66 @@
+"""
+Сравнение двух прогонов бенчмарка.
+
+    python -m benchmarks.compare benchmark_results/base.json benchmark_results/new.json --threshold 15
+
+Код возврата 1, если p95 какого-то сценария вырос больше чем на threshold процентов.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms", "db_queries_mean")
+
+
+def _change(old: float, new: float) -> float | None:
+    if not old:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"{'scenario':<26}" + "".join(f"{metric:>24}" for metric in METRICS))
+    for name, result in new["scenarios"].items():
+        old = base["scenarios"].get(name)
+        if old is None:
+            print(f"{name:<26} (нет в базовом прогоне)")
+            continue
+        cells = []
+        for metric in METRICS:
+            if metric not in result or metric not in old:
+                cells.append(f"{'-':>24}")
+                continue
+            change = _change(old[metric], result[metric])
+            change_text = f"{change:+.1f}%" if change is not None else "n/a"
+            cells.append(f"{old[metric]:>9.1f} → {result[metric]:>7.1f} {change_text:>5}")
+        print(f"{name:<26}" + "".join(cells))
+
+        change = _change(old["p95_ms"], result["p95_ms"])
+        if change is not None and change > threshold:
+            regressions.append(f"{name}: p95 {old['p95_ms']} → {result['p95_ms']} мс ({change:+.1f}%)")
+        if result.get("db_queries_mean", 0) > old.get("db_queries_mean", float("inf")):
+            regressions.append(
+                f"{name}: запросов к БД {old['db_queries_mean']} → {result['db_queries_mean']}"
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сравнить два JSON-результата бенчмарка")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10, help="допустимый рост p95, %%")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"base: {base.get('commit')} ({base.get('created_at')})  new: {new.get('commit')} ({new.get('created_at')})")
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print("\nРегрессии:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
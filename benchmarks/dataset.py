@@ -0,0 +1,9 @@
+import uuid
+
+# Общие для seed и сценариев значения. Модуль не импортирует приложение,
+# чтобы бенчмарк мог задать настройки до импорта main.
+
+# Корзина, которую читает сценарий GET /cart/
+BENCH_SESSION_ID = uuid.UUID("00000000-0000-4000-8000-00000000bec1")
+BENCH_ADMIN_EMAIL = "bench-admin@example.com"
+BENCH_ADMIN_PASSWORD = "bench-admin-password"
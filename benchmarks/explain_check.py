@@ -0,0 +1,287 @@
+"""
+Проверка планов горячих запросов: EXPLAIN по заполненной БД, без последовательного сканирования.
+
+    python -m benchmarks.seed --reset && python -m benchmarks.explain_check
+    python -m benchmarks.explain_check --verbose --only products_storefront,report_orders
+
+По умолчанию запросы планируются с enable_seqscan = off: на тестовых данных
+планировщик может честно предпочесть Seq Scan маленькой таблице, а проверка
+должна показать, есть ли вообще индекс под условие. --natural — план как есть.
+
+Код возврата 1, если в плане есть Seq Scan или полный проход по индексу с Filter
+по таблице, в которой не меньше --min-rows строк (справочники не проверяются).
+Запросы повторяют форму запросов из обработчиков — при изменении обработчика
+нужно обновить и CHECKS.
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Callable
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import aliased
+
+import main  # noqa: F401 — регистрирует все модели в Base.metadata
+from cart.models import CartItem
+from catalog.models import Category, Product, ProductImage
+from config.database import engine
+from discounts.models import Discount, DiscountProduct
+from leads.models import Lead, LeadStatus
+from notification.models import VerificationCode
+from order.models import Order, OrderInfo, OrderItem
+from outlet.models import OutletProduct
+from benchmarks.dataset import BENCH_SESSION_ID
+
+FULL_INDEX_SCANS = ("Index Scan", "Index Only Scan")
+
+
+@dataclass
+class Sample:
+    """Значения параметров, взятые из БД, чтобы условия были реалистичными."""
+
+    good_id: int = 1
+    articul: str = ""
+    category_id: int = 1
+    discount_id: int = 1
+    outlet_id: int = 1
+    order_id: int = 1
+    email: str = "client1@example.com"
+    user_id: uuid.UUID = uuid.UUID(int=0)
+
+
+@dataclass
+class Check:
+    name: str
+    build: Callable[[Sample], object]
+    source: str  # где в коде живёт запрос
+
+
+def _period(days: int) -> tuple[datetime, datetime]:
+    today = date.today()
+    return datetime.combine(today - timedelta(days=days), time.min), datetime.combine(today, time.max)
+
+
+def _storefront(*conditions):
+    ranked = (
+        select(
+            Product.good_id,
+            func.row_number().over(
+                partition_by=Product.articul,
+                order_by=[Product.retail_price_with_discount.asc(), Product.good_id.asc()],
+            ).label("rank"),
+        )
+        .where(Product.warehouse_quantity > 0, Product.display == 1, Product.images.any(), *conditions)
+        .subquery()
+    )
+    page = select(ranked.c.good_id).where(ranked.c.rank == 1).limit(20).subquery()
+    return select(Product).where(Product.good_id.in_(select(page)))
+
+
+def _storefront_category(sample: Sample):
+    tree = (
+        select(Category.category_id)
+        .where(Category.category_id.in_([sample.category_id]))
+        .cte(name="category_cte", recursive=True)
+    )
+    child = aliased(Category)
+    tree = tree.union_all(select(child.category_id).where(child.parent_category_id == tree.c.category_id))
+    return _storefront(Product.category_id.in_(select(tree.c.category_id)))
+
+
+def _storefront_discounts(sample: Sample):
+    return _storefront(Product.discounts.any(DiscountProduct.discount.has(Discount.is_active == True)))
+
+
+def _report_orders(sample: Sample):
+    start, end = _period(90)
+    return (
+        select(func.date(Order.created_at), func.count(Order.id), func.sum(Order.total_price))
+        .where(Order.status_id == 2, Order.created_at >= start, Order.created_at <= end)
+        .group_by(func.date(Order.created_at))
+    )
+
+
+def _report_leads(sample: Sample):
+    start, end = _period(30)
+    return (
+        select(LeadStatus.name, func.count(Lead.id))
+        .join(Lead, Lead.status_id == LeadStatus.id, isouter=True)
+        .where(Lead.created_at >= start, Lead.created_at <= end)
+        .group_by(LeadStatus.name)
+    )
+
+
+CHECKS = [
+    Check("products_storefront", lambda s: _storefront(), "catalog/routers/products/router.py /v3/"),
+    Check("products_storefront_category", _storefront_category, "catalog/routers/products/router.py /v3/?category_id="),
+    Check("products_storefront_discounts", _storefront_discounts, "catalog/routers/products/router.py /v3/?discounts=true"),
+    Check(
+        "product_images",
+        lambda s: select(ProductImage).where(ProductImage.good_id.in_([s.good_id, s.good_id + 1])),
+        "selectinload(Product.images)",
+    ),
+    Check(
+        "product_siblings",
+        lambda s: select(Product).where(Product.articul == s.articul, Product.good_id != s.good_id),
+        "catalog/services/products.py, catalog/routers/products/router.py",
+    ),
+    Check(
+        "filters_in_stock_category",
+        lambda s: select(Product).where(Product.warehouse_quantity > 0, Product.category_id == s.category_id),
+        "catalog/routers/filters/router.py",
+    ),
+    Check(
+        "discount_products",
+        lambda s: select(Product).join(DiscountProduct, DiscountProduct.product_id == Product.good_id)
+        .where(DiscountProduct.discount_id == s.discount_id),
+        "discounts/services/discount.py",
+    ),
+    Check(
+        "outlet_products",
+        lambda s: select(Product).join(OutletProduct, OutletProduct.product_id == Product.good_id)
+        .where(OutletProduct.outlet_id == s.outlet_id),
+        "outlet/services/outlet.py",
+    ),
+    Check("report_orders", _report_orders, "report/routers/mini_report/router.py /report"),
+    Check("report_leads_by_status", _report_leads, "report/routers/mini_report/router.py /leads-by-status"),
+    Check(
+        "order_items",
+        lambda s: select(OrderItem).where(OrderItem.order_id == s.order_id),
+        "order/routers/checkout/router.py",
+    ),
+    Check(
+        "last_order_info",
+        lambda s: select(OrderInfo).where(OrderInfo.user_id == s.user_id).order_by(OrderInfo.created_at.desc()).limit(1),
+        "order/routers/checkout/router.py",
+    ),
+    Check(
+        "verification_code",
+        lambda s: select(VerificationCode).where(VerificationCode.email == s.email)
+        .order_by(VerificationCode.created_at.desc()).limit(1),
+        "notification/router/router.py, notification/tasks/email_utils.py",
+    ),
+    Check(
+        "cart_by_session",
+        lambda s: select(CartItem).where(CartItem.session_id == BENCH_SESSION_ID),
+        "cart/routers/cart/router.py",
+    ),
+]
+
+
+def select_checks(names: list[str] | None) -> list[Check]:
+    if not names:
+        return CHECKS
+    unknown = set(names) - {check.name for check in CHECKS}
+    if unknown:
+        raise SystemExit(f"Неизвестные проверки: {', '.join(sorted(unknown))}")
+    return [check for check in CHECKS if check.name in names]
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def plan_violations(plan: dict, table_rows: dict[str, float], partial_indexes: set[str], min_rows: int) -> list[str]:
+    """Сканирования больших таблиц целиком: Seq Scan и проход по индексу без Index Cond, но с Filter."""
+    violations = []
+    for node in plan_nodes(plan):
+        relation = node.get("Relation Name")
+        if relation is None:
+            continue
+        # reltuples = -1 — таблицу ещё не анализировали, размер неизвестен: проверяем
+        if 0 <= table_rows.get(relation, -1) < min_rows:
+            continue
+        node_type = node["Node Type"]
+        if node_type == "Seq Scan":
+            violations.append(f"Seq Scan on {relation} (Filter: {node.get('Filter', '-')})")
+        elif (
+            node_type in FULL_INDEX_SCANS
+            and "Index Cond" not in node
+            and "Filter" in node
+            and node.get("Index Name") not in partial_indexes
+        ):
+            violations.append(f"{node_type} on {relation} using {node.get('Index Name')} без Index Cond (Filter: {node['Filter']})")
+    return violations
+
+
+async def load_sample(conn) -> Sample:
+    sample = Sample()
+    row = (await conn.execute(
+        select(Product.good_id, Product.articul, Product.category_id)
+        .where(Product.articul.isnot(None), Product.category_id.isnot(None))
+        .limit(1)
+    )).first()
+    if row:
+        sample.good_id, sample.articul, sample.category_id = row
+    sample.discount_id = (await conn.execute(select(func.min(DiscountProduct.discount_id)))).scalar() or 1
+    sample.outlet_id = (await conn.execute(select(func.min(OutletProduct.outlet_id)))).scalar() or 1
+    sample.order_id = (await conn.execute(select(func.max(Order.id)))).scalar() or 1
+    sample.email = (await conn.execute(select(VerificationCode.email).limit(1))).scalar() or sample.email
+    sample.user_id = (await conn.execute(
+        select(OrderInfo.user_id).where(OrderInfo.user_id.isnot(None)).limit(1)
+    )).scalar() or sample.user_id
+    return sample
+
+
+async def run(args) -> list[str]:
+    checks = select_checks(args.only.split(",") if args.only else None)
+    failures = []
+    async with engine.connect() as conn:
+        table_rows = dict((await conn.execute(text(
+            "SELECT c.relname, c.reltuples FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+        ))).all())
+        partial_indexes = set((await conn.execute(text(
+            "SELECT indexrelid::regclass::text FROM pg_index WHERE indpred IS NOT NULL"
+        ))).scalars().all())
+        sample = await load_sample(conn)
+
+        if not args.natural:
+            await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if args.analyze else "FORMAT JSON"
+        for check in checks:
+            sql = compile_sql(check.build(sample))
+            result = (await conn.execute(text(f"EXPLAIN ({options}) {sql}"))).scalar()
+            explain = result if isinstance(result, list) else json.loads(result)
+            plan = explain[0]["Plan"]
+            violations = plan_violations(plan, table_rows, partial_indexes, args.min_rows)
+
+            timing = f"  {explain[0]['Execution Time']:.2f} мс" if args.analyze else ""
+            print(f"{'FAIL' if violations else 'ok':<5}{check.name:<32} cost {plan['Total Cost']:>12.1f}{timing}")
+            for violation in violations:
+                print(f"       {violation}  [{check.source}]")
+                failures.append(f"{check.name}: {violation}")
+            if args.verbose:
+                print(json.dumps(plan, ensure_ascii=False, indent=2))
+        await conn.rollback()
+    await engine.dispose()
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="EXPLAIN горячих запросов: без последовательного сканирования")
+    parser.add_argument("--only", help="имена проверок через запятую")
+    parser.add_argument("--min-rows", type=int, default=1000, help="таблицы меньше этого размера не проверяются")
+    parser.add_argument("--natural", action="store_true", help="не отключать enable_seqscan")
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE: выполнить запросы и показать время")
+    parser.add_argument("--verbose", action="store_true", help="печатать планы целиком")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    failures = asyncio.run(run(args))
+    if failures:
+        print(f"\n[ERROR] Последовательное сканирование в {len(failures)} местах")
+        raise SystemExit(1)
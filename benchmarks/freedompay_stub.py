@@ -0,0 +1,129 @@
+"""
+Локальная заглушка FreedomPay для нагрузочных прогонов.
+
+Принимает init_payment.php так же, как шлюз (проверяет pg_sig и отвечает XML
+с pg_redirect_url), запоминает платежи и по команде «проводит» их — отправляет
+подписанные колбэки на pg_result_url приложения.
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from payment.freedompay.generate_freedompay_link import gen_salt, sign_params
+
+
+@dataclass
+class StubPayment:
+    payment_id: int
+    order_id: str
+    amount: str
+    result_url: str
+
+
+def _xml(**fields) -> Response:
+    body = "".join(f"<{name}>{escape(str(value))}</{name}>" for name, value in fields.items())
+    return Response(f'<?xml version="1.0" encoding="utf-8"?><response>{body}</response>', media_type="application/xml")
+
+
+class FreedomPayStub:
+    def __init__(self):
+        self.payments: dict[str, StubPayment] = {}
+        self.rejected_signatures = 0
+        self._next_id = 1
+        self.app = FastAPI()
+        self.app.post("/init_payment.php")(self.init_payment)
+        self._server = None
+        self._task = None
+
+    async def init_payment(self, request: Request):
+        params = dict(await request.form())
+        signature = params.pop("pg_sig", None)
+        if signature != sign_params(params, "init_payment.php"):
+            self.rejected_signatures += 1
+            return _xml(pg_status="error", pg_error_description="Invalid signature")
+
+        payment = StubPayment(self._next_id, params["pg_order_id"], params["pg_amount"], params["pg_result_url"])
+        self._next_id += 1
+        self.payments[payment.order_id] = payment
+        return _xml(
+            pg_status="ok",
+            pg_payment_id=payment.payment_id,
+            pg_redirect_url=f"https://freedompay.local/pay/{payment.payment_id}",
+        )
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        config = uvicorn.Config(self.app, host=host, port=port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._task
+
+    def result_params(self, payment: StubPayment, success: bool) -> dict:
+        params = {
+            "pg_order_id": payment.order_id,
+            "pg_payment_id": str(payment.payment_id),
+            "pg_amount": payment.amount,
+            "pg_currency": "KGS",
+            "pg_result": "1" if success else "0",
+            "pg_salt": gen_salt(),
+        }
+        params["pg_sig"] = sign_params(params, urlparse(payment.result_url).path.rsplit("/", 1)[-1])
+        return params
+
+    async def settle(
+        self,
+        client: httpx.AsyncClient,
+        order_ids: list[str],
+        fail_rate: float = 0.2,
+        duplicate_rate: float = 0.1,
+        concurrency: int = 20,
+        rng: random.Random | None = None,
+    ) -> dict:
+        """
+        Отправляет колбэки об оплате. Доля fail_rate — неуспешные (товар должен
+        вернуться на склад), duplicate_rate — повторная доставка того же колбэка.
+        Путь берётся из pg_result_url, а адрес — из client, чтобы колбэки
+        доходили и до приложения в процессе.
+        """
+        rng = rng or random.Random()
+        deliveries = []
+        outcome = {}
+        for order_id in order_ids:
+            payment = self.payments.get(order_id)
+            if payment is None:
+                continue
+            success = rng.random() >= fail_rate
+            outcome[order_id] = success
+            params = self.result_params(payment, success)
+            path = urlparse(payment.result_url).path
+            deliveries.append((path, params))
+            if rng.random() < duplicate_rate:
+                deliveries.append((path, params))
+        rng.shuffle(deliveries)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses = {}
+
+        async def deliver(path, params):
+            async with semaphore:
+                response = await client.post(path, data=params)
+                body = response.json() if response.status_code == 200 else {}
+                key = f"{response.status_code}:{body.get('status', '')}"
+                statuses[key] = statuses.get(key, 0) + 1
+
+        await asyncio.gather(*(deliver(path, params) for path, params in deliveries))
+        return {"callbacks": len(deliveries), "statuses": statuses, "outcome": outcome}
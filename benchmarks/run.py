@@ -0,0 +1,192 @@
+"""
+Замер пропускной способности и задержек горячих эндпоинтов.
+
+    python -m benchmarks.run                                   # приложение в процессе (ASGI), все сценарии
+    python -m benchmarks.run --base-url http://localhost:8080 --scenarios catalog,cart
+    python -m benchmarks.run --requests 500 --concurrency 20 --output benchmark_results/main.json
+
+Перед запуском БД заполняется через `python -m benchmarks.seed`. Результаты
+сохраняются в JSON и сравниваются между коммитами через `python -m benchmarks.compare`.
+
+В процессе ссылка на оплату не запрашивается у FreedomPay. С --base-url checkout
+ходит в шлюз из FREEDOM_ENDPOINT сервера — его стоит направить на заглушку.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+import httpx
+
+from benchmarks.scenarios import BenchContext, Scenario, select_scenarios
+from benchmarks.dataset import BENCH_ADMIN_EMAIL, BENCH_ADMIN_PASSWORD
+
+RESULTS_DIR = "benchmark_results"
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Перцентиль с линейной интерполяцией по отсортированному списку."""
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def fake_payment_link(order_id: int, amount: float, description: str, **kwargs) -> str:
+    # Внутри процесса не ходим в платёжный шлюз: замеряем только сам checkout
+    return f"https://pay.example.com/{order_id}"
+
+
+async def asgi_client() -> httpx.AsyncClient:
+    # Настройки читаются при импорте приложения, поэтому задаём их до импорта main
+    os.environ.setdefault("FEED_DIR", tempfile.mkdtemp(prefix="bench-feeds-"))
+    os.environ.setdefault("DB_STATS_HEADERS", "true")
+    import main
+    import order.routers.checkout.router as checkout_router
+    from feeds.services.exporter import feed_exporter
+
+    checkout_router.generate_freedompay_link = fake_payment_link
+    # Готовим файлы фидов заранее — как после фонового обновления в продакшене
+    await feed_exporter.refresh(force=True)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=120)
+
+
+async def prepare_context(client: httpx.AsyncClient, args) -> BenchContext:
+    ctx = BenchContext(client=client, rng=random.Random(args.seed))
+    response = await client.get("/products/v3/", params={"limit": 100})
+    response.raise_for_status()
+    ctx.product_ids = [product["good_id"] for product in response.json()]
+
+    response = await client.post("/auth/jwt/login", data={"username": args.admin_email, "password": args.admin_password})
+    if response.status_code == 200:
+        ctx.admin_token = response.json()["access_token"]
+    else:
+        print(f"[WARNING] Не удалось войти как {args.admin_email} ({response.status_code}), админские сценарии пропускаются")
+    return ctx
+
+
+async def run_scenario(ctx: BenchContext, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    headers = {"Authorization": f"Bearer {ctx.admin_token}"} if scenario.admin else {}
+    latencies, statuses, db_queries = [], Counter(), []
+    errors = []
+
+    async def worker(indexes, record: bool):
+        for _ in indexes:
+            kwargs = await scenario.build(ctx)
+            start = time.perf_counter()
+            try:
+                response = await ctx.client.request(scenario.method, scenario.path, headers=headers, **kwargs)
+            except httpx.HTTPError as e:
+                if record:
+                    statuses["error"] += 1
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - start
+            if not record:
+                continue
+            latencies.append(elapsed)
+            statuses[str(response.status_code)] += 1
+            if response.status_code >= 400 and len(errors) < 5:
+                errors.append(f"{response.status_code}: {response.text[:200]}")
+            if "x-db-queries" in response.headers:
+                db_queries.append(int(response.headers["x-db-queries"]))
+
+    # Воркеры берут номера из общего итератора, пока он не кончится
+    warmup_indexes = iter(range(warmup))
+    await asyncio.gather(*(worker(warmup_indexes, False) for _ in range(concurrency)))
+
+    indexes = iter(range(requests))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(indexes, True) for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    result = {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "statuses": dict(statuses),
+        "rps": round(len(latencies) / wall, 2) if wall else 0,
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(ms[-1], 2) if ms else 0,
+    }
+    if db_queries:
+        result["db_queries_mean"] = round(sum(db_queries) / len(db_queries), 2)
+    if errors:
+        result["errors"] = errors[:5]
+    return result
+
+
+async def main_async(args) -> dict:
+    scenarios = select_scenarios(args.scenarios.split(",") if args.scenarios else None)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=120)
+    else:
+        client = await asgi_client()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "target": args.base_url or "asgi",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scenarios": {},
+    }
+    async with client:
+        ctx = await prepare_context(client, args)
+        for scenario in scenarios:
+            if scenario.admin and not ctx.admin_token:
+                continue
+            result = await run_scenario(ctx, scenario, args.requests, args.concurrency, args.warmup)
+            report["scenarios"][scenario.name] = result
+            print(
+                f"{scenario.name:<26} {result['rps']:>8.1f} rps  p50 {result['p50_ms']:>8.1f}  "
+                f"p95 {result['p95_ms']:>8.1f}  p99 {result['p99_ms']:>8.1f} ms  {result['statuses']}"
+            )
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк горячих эндпоинтов")
+    parser.add_argument("--base-url", help="адрес запущенного сервера; без него приложение запускается в процессе")
+    parser.add_argument("--scenarios", help="имена сценариев или теги через запятую (catalog, cart, checkout, feeds, reports)")
+    parser.add_argument("--requests", type=int, default=200, help="замеряемых запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10, help="запросов прогрева, не входят в результат")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--admin-email", default=BENCH_ADMIN_EMAIL)
+    parser.add_argument("--admin-password", default=BENCH_ADMIN_PASSWORD)
+    parser.add_argument("--output", help=f"файл результата; по умолчанию {RESULTS_DIR}/<дата>-<коммит>.json")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main_async(args))
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[DEBUG] Результат сохранён в {output}")
@@ -0,0 +1,110 @@
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.dataset import BENCH_SESSION_ID
+
+
+@dataclass
+class BenchContext:
+    """Общие данные прогона: клиент, токен админа и id товаров в наличии."""
+
+    client: httpx.AsyncClient
+    rng: random.Random
+    admin_token: str | None = None
+    product_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # Собирает аргументы запроса; время подготовки (например, наполнение корзины) не замеряется
+    build: Callable[[BenchContext], Awaitable[dict]]
+    admin: bool = False
+    tags: tuple = ()
+
+
+def _static(**kwargs):
+    async def build(ctx: BenchContext) -> dict:
+        return kwargs
+    return build
+
+
+def _report_period(days: int = 90) -> dict:
+    today = date.today()
+    return {"start_date": (today - timedelta(days=days)).isoformat(), "end_date": today.isoformat()}
+
+
+async def _products_filtered(ctx: BenchContext) -> dict:
+    return {"params": {
+        "category_id": ctx.rng.randint(6, 40),
+        "sort_by_price": ctx.rng.choice(["asc", "desc"]),
+        "offset": ctx.rng.choice([0, 20, 40]),
+        "limit": 20,
+    }}
+
+
+async def _products_search(ctx: BenchContext) -> dict:
+    return {"params": {"search": f"Модель {ctx.rng.randint(1, 999)}", "limit": 20}}
+
+
+async def _filters_category(ctx: BenchContext) -> dict:
+    return {"params": {"category_id": ctx.rng.randint(6, 40)}}
+
+
+async def _checkout(ctx: BenchContext) -> dict:
+    # У каждого заказа своя корзина из одного товара
+    session_id = str(uuid.uuid4())
+    response = await ctx.client.post("/cart/v2", json={
+        "session_id": session_id,
+        "product_id": ctx.rng.choice(ctx.product_ids),
+        "quantity": 1,
+    })
+    response.raise_for_status()
+    return {"json": {
+        "session_id": session_id,
+        "email": "bench@example.com",
+        "first_name": "Bench",
+        "last_name": "Client",
+        "address_line1": "ул. Тестовая, 1",
+        "city": "Бишкек",
+        "region": "Чуй",
+        "postal_code": "720000",
+        "phone": "+996700000000",
+    }}
+
+
+SCENARIOS = [
+    Scenario("products_v3", "GET", "/products/v3/", _static(params={"limit": 20}), tags=("catalog",)),
+    Scenario("products_v3_filtered", "GET", "/products/v3/", _products_filtered, tags=("catalog",)),
+    Scenario("products_v3_search", "GET", "/products/v3/", _products_search, tags=("catalog",)),
+    Scenario("products_v3_discounts", "GET", "/products/v3/", _static(params={"discounts": "true", "limit": 20}), tags=("catalog",)),
+    Scenario("filters_v3", "GET", "/filters/v3/", _static(), tags=("catalog",)),
+    Scenario("filters_v3_category", "GET", "/filters/v3/", _filters_category, tags=("catalog",)),
+    Scenario("cart", "GET", "/cart/", _static(params={"session_id": str(BENCH_SESSION_ID)}), tags=("cart",)),
+    Scenario("checkout", "POST", "/orders/checkout", _checkout, tags=("checkout", "write")),
+    Scenario("facebook_feed_xml", "GET", "/facebook/facebook-feed.xml", _static(), tags=("feeds",)),
+    Scenario("facebook_feed_csv", "GET", "/facebook/facebook-feed.csv", _static(), tags=("feeds",)),
+    Scenario("report_daily", "GET", "/mini/report/report", _static(params=_report_period()), tags=("reports",)),
+    Scenario("report_top_products", "GET", "/mini/report/top-products", _static(), tags=("reports",)),
+    Scenario("report_clients", "GET", "/mini/report/clients", _static(), tags=("reports",)),
+    Scenario("report_leads_by_status", "GET", "/mini/report/leads-by-status", _static(params=_report_period()), tags=("reports",)),
+    Scenario("report_order_details", "GET", "/report/order/details", _static(params=_report_period(30)), admin=True, tags=("reports",)),
+]
+
+
+def select_scenarios(names: list[str] | None) -> list[Scenario]:
+    """Выбор по имени сценария или тегу (catalog, reports, ...)."""
+    if not names:
+        return SCENARIOS
+    selected = [s for s in SCENARIOS if s.name in names or set(s.tags) & set(names)]
+    unknown = set(names) - {s.name for s in SCENARIOS} - {t for s in SCENARIOS for t in s.tags}
+    if unknown:
+        raise SystemExit(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+    return selected
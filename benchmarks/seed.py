@@ -0,0 +1,385 @@
+"""
+Синтетический каталог для бенчмарков.
+
+    python -m benchmarks.seed --reset --products 20000 --sizes 5 --images 4
+
+Пишет в БД из POSTGRESQL_* — только в базу, в имени которой есть "bench" или
+"test" (иначе нужен --force). С --reset схема пересоздаётся по моделям.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import Integer, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import main  # noqa: F401 — регистрирует все модели в Base.metadata
+from catalog.models import (
+    Category, Collection, Color, Manufacturer, Material, MeasureUnit, Product, ProductImage, Season, Sex,
+)
+from cart.models import CartItem
+from config.base_class import Base
+from config.config import DB_NAME
+from config.database import async_session_maker, engine
+from custom.models import CustomCategory, product_custom_category
+from discounts.models import Discount, DiscountProduct
+from leads.models import Lead, LeadProduct, LeadStatus
+from notification.models import VerificationCode
+from order.models import Order, OrderInfo, OrderItem, OrderStatus
+from outlet.models import Outlet, OutletProduct
+from session.models import Session
+from user.models import User
+from benchmarks.dataset import BENCH_ADMIN_EMAIL, BENCH_ADMIN_PASSWORD, BENCH_SESSION_ID
+
+INSERT_BATCH_SIZE = 5000
+
+ORDER_STATUSES = ["new", "paid", "cancelled"]  # id 1, 2, 3 — так их ожидают checkout и отчёты
+LEAD_STATUSES = ["Новый", "В работе", "Успешно", "Отказ"]
+
+
+@dataclass
+class SeedConfig:
+    products: int = 20000
+    sizes: int = 5  # товаров (размеров) в одном артикуле
+    images: int = 4  # изображений на артикул
+    categories: int = 40
+    manufacturers: int = 30
+    colors: int = 20
+    custom_categories: int = 10
+    discounts: int = 5
+    discount_share: float = 0.2  # доля товаров в акциях
+    outlets: int = 2
+    outlet_share: float = 0.05
+    orders: int = 5000
+    leads: int = 2000
+    verification_codes: int = 5000
+    cart_items: int = 5
+    seed: int = 42
+
+
+def check_database(force: bool):
+    name = (DB_NAME or "").lower()
+    if not force and "bench" not in name and "test" not in name:
+        raise SystemExit(
+            f"Отказ: база '{DB_NAME}' не похожа на тестовую. Нужна база с 'bench'/'test' в имени или --force."
+        )
+
+
+async def reset_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def _insert(session: AsyncSession, table, rows: list[dict]):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        await session.execute(insert(table), rows[start:start + INSERT_BATCH_SIZE])
+
+
+async def _sync_sequences(session: AsyncSession):
+    # id задаются явно — сдвигаем последовательности, чтобы приложение могло вставлять дальше
+    for table in Base.metadata.sorted_tables:
+        pk = list(table.primary_key.columns)
+        if len(pk) != 1 or not isinstance(pk[0].type, Integer):
+            continue
+        result = await session.execute(
+            text("SELECT pg_get_serial_sequence(:table, :column)"),
+            {"table": table.name, "column": pk[0].name},
+        )
+        sequence = result.scalar()
+        if sequence is None:
+            continue
+        await session.execute(text(
+            f"SELECT setval('{sequence}', coalesce(max({pk[0].name}), 0) + 1, false) FROM {table.name}"
+        ))
+
+
+def _references(cfg: SeedConfig) -> dict:
+    return {
+        MeasureUnit: [{"measure_unit_id": 1, "unit_name": "шт"}],
+        Category: [
+            {
+                "category_id": i,
+                "category_name": f"Категория {i}",
+                # первые 5 — корневые, остальные вложены в них
+                "parent_category_id": None if i <= 5 else (i % 5) + 1,
+            }
+            for i in range(1, cfg.categories + 1)
+        ],
+        Manufacturer: [
+            {"manufacturer_id": i, "manufacturer_name": f"Бренд {i}", "country": "KG"}
+            for i in range(1, cfg.manufacturers + 1)
+        ],
+        Collection: [
+            {"collection_id": i, "collection_name": f"Коллекция {i}", "manufacturer_id": (i % cfg.manufacturers) + 1}
+            for i in range(1, cfg.manufacturers * 2 + 1)
+        ],
+        Season: [{"season_id": i, "season_name": name} for i, name in enumerate(["Зима", "Весна", "Лето", "Осень"], 1)],
+        Sex: [{"sex_id": i, "sex_name": name} for i, name in enumerate(["Мужской", "Женский", "Унисекс"], 1)],
+        Color: [
+            {"color_id": i, "color_name": f"Цвет {i}", "color_hex": f"#{i * 123457 % 0xFFFFFF:06x}"}
+            for i in range(1, cfg.colors + 1)
+        ],
+        Material: [{"material_id": i, "material_name": f"Материал {i}"} for i in range(1, 11)],
+        CustomCategory: [
+            {"category_id": i, "category_name": f"Подборка {i}"} for i in range(1, cfg.custom_categories + 1)
+        ],
+    }
+
+
+def _products(cfg: SeedConfig, rng: random.Random) -> tuple[list, list]:
+    products, images = [], []
+    image_id = 0
+    for articul_no in range((cfg.products + cfg.sizes - 1) // cfg.sizes):
+        articul = f"ART-{articul_no:06d}"
+        # Общие для артикула поля
+        shared = {
+            "articul": articul,
+            "category_id": rng.randint(6 if cfg.categories > 5 else 1, cfg.categories),
+            "manufacturer_id": rng.randint(1, cfg.manufacturers),
+            "collection_id": rng.randint(1, cfg.manufacturers * 2),
+            "season_id": rng.randint(1, 4),
+            "sex_id": rng.randint(1, 3),
+            "color_id": rng.randint(1, cfg.colors),
+            "material_id": rng.randint(1, 10),
+            "measure_unit_id": 1,
+        }
+        price = float(rng.randrange(500, 15000, 50))
+        urls = [f"https://cdn.example.com/bench/{articul}/{k}.jpg" for k in range(cfg.images)]
+
+        for size in range(cfg.sizes):
+            good_id = articul_no * cfg.sizes + size + 1
+            if good_id > cfg.products:
+                break
+            quantity = 0 if rng.random() < 0.1 else rng.randint(1, 20)
+            products.append({
+                "good_id": good_id,
+                "good_name": f"Модель {articul_no} р.{36 + size}",
+                "short_name": f"Модель {articul_no}",
+                "barcode": f"{2000000000000 + good_id}",
+                "retail_price": price,
+                "wholesale_price": price * 0.7,
+                "retail_price_with_discount": price,
+                "price_discount_percent": 0,
+                "prime_cost": price * 0.5,
+                "warehouse_quantity": quantity,
+                "min_quantity_for_order": 1,
+                "display": 1 if quantity > 0 and rng.random() > 0.03 else 0,
+                "closeout": 0,
+                "product_size": float(36 + size),
+                **shared,
+            })
+            for order, url in enumerate(urls):
+                image_id += 1
+                images.append({
+                    "image_id": image_id,
+                    "good_id": good_id,
+                    "image_url": url,
+                    "is_main": order == 0,
+                    "order": order,
+                })
+    return products, images
+
+
+def _promotions(cfg: SeedConfig, rng: random.Random, products: list[dict]):
+    now = datetime.utcnow()
+    discounts = [
+        {
+            "id": i,
+            "name": f"Акция {i}",
+            "discount_percent": float(rng.choice([10, 15, 20, 30, 50])),
+            "start_date": now - timedelta(days=30),
+            "end_date": now + timedelta(days=30),
+            "is_active": True,
+        }
+        for i in range(1, cfg.discounts + 1)
+    ]
+    outlets = [
+        {
+            "id": i,
+            "name": f"Аутлет {i}",
+            "discount_percent": float(rng.choice([30, 40, 60])),
+            "start_date": now - timedelta(days=30),
+            "end_date": now + timedelta(days=30),
+            "is_active": True,
+        }
+        for i in range(1, cfg.outlets + 1)
+    ]
+    discount_products, outlet_products = [], []
+    for product in products:
+        if discounts and rng.random() < cfg.discount_share:
+            discount = rng.choice(discounts)
+            discount_products.append({"discount_id": discount["id"], "product_id": product["good_id"]})
+            product["price_discount_percent"] = discount["discount_percent"]
+            product["retail_price_with_discount"] = round(product["retail_price"] * (1 - discount["discount_percent"] / 100), 2)
+        if outlets and rng.random() < cfg.outlet_share:
+            outlet_products.append({"outlet_id": rng.choice(outlets)["id"], "product_id": product["good_id"]})
+    return discounts, discount_products, outlets, outlet_products
+
+
+def _orders(cfg: SeedConfig, rng: random.Random, products: list[dict]):
+    now = datetime.utcnow()
+    infos, orders, items = [], [], []
+    item_id = 0
+    for order_id in range(1, cfg.orders + 1):
+        created_at = now - timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+        infos.append({
+            "id": order_id,
+            "email": f"client{order_id}@example.com",
+            "first_name": "Имя",
+            "last_name": "Фамилия",
+            "address_line1": f"ул. Тестовая, {order_id}",
+            "city": "Бишкек",
+            "region": "Чуй",
+            "postal_code": "720000",
+            "phone": f"+996700{order_id:06d}",
+            "created_at": created_at,
+        })
+        total = 0.0
+        for product in rng.sample(products, rng.randint(1, 3)):
+            item_id += 1
+            quantity = rng.randint(1, 2)
+            total += product["retail_price_with_discount"] * quantity
+            items.append({
+                "id": item_id,
+                "order_id": order_id,
+                "product_id": product["good_id"],
+                "quantity": quantity,
+                "price": product["retail_price_with_discount"],
+            })
+        orders.append({
+            "id": order_id,
+            "session_id": uuid.UUID(int=rng.getrandbits(128)),
+            "info_id": order_id,
+            "created_at": created_at,
+            "total_price": round(total, 2),
+            # большинство оплачено — на них строятся отчёты
+            "status_id": rng.choices([1, 2, 3], weights=[2, 7, 1])[0],
+        })
+    return infos, orders, items
+
+
+def _leads(cfg: SeedConfig, rng: random.Random, products: list[dict]):
+    now = datetime.utcnow()
+    leads, lead_products = [], []
+    for lead_id in range(1, cfg.leads + 1):
+        leads.append({
+            "id": lead_id,
+            "full_name": f"Клиент {lead_id}",
+            "phone_number": f"+996555{lead_id:06d}",
+            "created_at": now - timedelta(minutes=rng.randint(0, 90 * 24 * 60)),
+            "status_id": rng.randint(1, len(LEAD_STATUSES)),
+        })
+        lead_products.append({"lead_id": lead_id, "product_id": rng.choice(products)["good_id"], "quantity": 1})
+    return leads, lead_products
+
+
+def _verification_codes(cfg: SeedConfig, rng: random.Random):
+    # Несколько запросов кода на один адрес, как при повторной отправке
+    now = datetime.utcnow()
+    return [{
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "email": f"client{rng.randint(1, max(cfg.verification_codes // 3, 1))}@example.com",
+        "code": f"{rng.randint(0, 9999):04d}",
+        "created_at": now - timedelta(minutes=rng.randint(0, 30 * 24 * 60)),
+        "is_verified": rng.random() < 0.5,
+    } for _ in range(cfg.verification_codes)]
+
+
+async def seed(cfg: SeedConfig) -> dict:
+    rng = random.Random(cfg.seed)
+    products, images = _products(cfg, rng)
+    discounts, discount_products, outlets, outlet_products = _promotions(cfg, rng, products)
+    infos, orders, order_items = _orders(cfg, rng, products)
+    leads, lead_products = _leads(cfg, rng, products)
+    in_stock = [p for p in products if p["display"] == 1 and p["warehouse_quantity"] > 0]
+
+    async with async_session_maker() as session:
+        for model, rows in _references(cfg).items():
+            await _insert(session, model.__table__, rows)
+        await _insert(session, Product.__table__, products)
+        await _insert(session, ProductImage.__table__, images)
+        await _insert(session, product_custom_category, [
+            {"product_id": p["good_id"], "custom_category_id": rng.randint(1, cfg.custom_categories)}
+            for p in products if cfg.custom_categories and rng.random() < 0.3
+        ])
+        await _insert(session, Discount.__table__, discounts)
+        await _insert(session, DiscountProduct.__table__, discount_products)
+        await _insert(session, Outlet.__table__, outlets)
+        await _insert(session, OutletProduct.__table__, outlet_products)
+
+        await _insert(session, OrderStatus.__table__, [
+            {"id": i, "name": name} for i, name in enumerate(ORDER_STATUSES, 1)
+        ])
+        await _insert(session, OrderInfo.__table__, infos)
+        await _insert(session, Order.__table__, orders)
+        await _insert(session, OrderItem.__table__, order_items)
+        await _insert(session, LeadStatus.__table__, [
+            {"id": i, "name": name} for i, name in enumerate(LEAD_STATUSES, 1)
+        ])
+        await _insert(session, Lead.__table__, leads)
+        await _insert(session, LeadProduct.__table__, lead_products)
+        await _insert(session, VerificationCode.__table__, _verification_codes(cfg, rng))
+
+        await _insert(session, Session.__table__, [{"session_id": BENCH_SESSION_ID, "created_at": datetime.utcnow()}])
+        await _insert(session, CartItem.__table__, [
+            {"session_id": BENCH_SESSION_ID, "product_id": p["good_id"], "quantity": 1}
+            for p in rng.sample(in_stock, min(cfg.cart_items, len(in_stock)))
+        ])
+        await _insert(session, User.__table__, [{
+            "id": uuid.uuid4(),
+            "email": BENCH_ADMIN_EMAIL,
+            "hashed_password": PasswordHelper().hash(BENCH_ADMIN_PASSWORD),
+            "is_active": True,
+            "is_superuser": True,
+            "is_verified": True,
+        }])
+
+        await _sync_sequences(session)
+        await session.commit()
+        await session.execute(text("ANALYZE"))
+        await session.commit()
+
+    return {
+        "products": len(products),
+        "articuls": len({p["articul"] for p in products}),
+        "images": len(images),
+        "in_stock": len(in_stock),
+        "discount_products": len(discount_products),
+        "outlet_products": len(outlet_products),
+        "orders": len(orders),
+        "order_items": len(order_items),
+        "leads": len(leads),
+    }
+
+
+def parse_args() -> tuple[SeedConfig, argparse.Namespace]:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description="Заполнить БД синтетическим каталогом для бенчмарков")
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("--reset", action="store_true", help="пересоздать схему перед заполнением")
+    parser.add_argument("--force", action="store_true", help="разрешить базу без 'bench'/'test' в имени")
+    args = parser.parse_args()
+    cfg = SeedConfig(**{name: getattr(args, name) for name in asdict(defaults)})
+    return cfg, args
+
+
+async def run(cfg: SeedConfig, reset: bool):
+    if reset:
+        await reset_schema()
+    start = time.perf_counter()
+    summary = await seed(cfg)
+    print(f"[DEBUG] Заполнено за {time.perf_counter() - start:.1f} с: {summary}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    cfg, args = parse_args()
+    check_database(args.force)
+    asyncio.run(run(cfg, args.reset))
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from config.base_class import Base
@@ -7,9 +8,10 @@ class ProductImage(Base):
     __tablename__ = 'product_images'
 
     image_id = Column(Integer, primary_key=True)
-    good_id = Column(Integer, ForeignKey('products.good_id'), nullable=False)
+    good_id = Column(Integer, ForeignKey('products.good_id'), nullable=False, index=True)
     image_url = Column(String(500), nullable=False)  # Путь к файлу или URL изображения
     is_main = Column(Boolean, default=False, nullable=False)  # Флаг главного изображения
     order = Column(Integer, default=0)  # Порядок отображения (опционально)
+    variants = Column(JSONB(none_as_null=True), nullable=True)  # Уменьшенные копии: [{width, height, format, url}], NULL — ещё не созданы
 
     product = relationship("Product", back_populates="images")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from custom.models.custom_categories import product_custom_category
 
@@ -6,12 +6,21 @@ from config.base_class import Base
 
 class Product(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Витрина (/products/v3): в наличии и отображается, ранжирование по артикулу и цене
+        Index(
+            'ix_products_storefront', 'articul', 'retail_price_with_discount', 'good_id',
+            postgresql_where=text('display = 1 AND warehouse_quantity > 0'),
+        ),
+        # Фильтры и справочники считают только товары в наличии
+        Index('ix_products_in_stock_category', 'category_id', postgresql_where=text('warehouse_quantity > 0')),
+    )
 
     good_id = Column(Integer, primary_key=True, index=True)
     good_name = Column(String(500), nullable=False)
     short_name = Column(String(255))
     description = Column(String(255))
-    articul = Column(String(30))
+    articul = Column(String(30), index=True)
     barcode = Column(String(40))
     retail_price = Column(Float)
     wholesale_price = Column(Float)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import select, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 
 from catalog.models import Category, Product
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 @router.get("/")
 async def get_categories(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Category)
@@ -23,7 +23,7 @@ async def get_categories(
 
 @router.get("/v3/")
 async def get_categories(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Category)
@@ -41,7 +41,7 @@ async def get_categories(
 @router.get("/{category_id}")
 async def get_category_by_id(
     category_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Category).where(Category.category_id == category_id)
     result = await session.execute(query)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 
 from catalog.models import Collection, Product
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/collections", tags=["collections"])
 
 @router.get("/")
 async def get_collections(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Collection)
@@ -23,7 +23,7 @@ async def get_collections(
 
 @router.get("/v3/")
 async def get_collections(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Collection)
@@ -38,7 +38,7 @@ async def get_collections(
 @router.get("/{collection_id}")
 async def get_collection_by_id(
     collection_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Collection).where(Collection.collection_id == collection_id)
     result = await session.execute(query)
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_async_session, get_read_session
 from sqlalchemy.orm import selectinload
 
 from catalog.models import Color
 from catalog.schemas.color import ColorCreate, ColorUpdate
+from feeds.tasks.feed import request_feed_refresh
 
 router = APIRouter(prefix="/colors", tags=["colors"])
 
 @router.get("/")
 async def get_colors(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Color)
     result = await session.execute(query)
@@ -22,7 +23,7 @@ async def get_colors(
 @router.get("/{color_id}")
 async def get_color_by_id(
     color_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Color).where(Color.color_id == color_id)
     result = await session.execute(query)
@@ -83,5 +84,6 @@ async def update_color(
         setattr(color, key, value)
 
     await session.commit()
+    request_feed_refresh()  # название цвета выводится в фидах
     await session.refresh(color)
     return color
\ No newline at end of file
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import and_, distinct, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from discounts.models.discounts import DiscountProduct, Discount
-from config.database import get_async_session  
+from config.database import get_read_session
 from catalog.models import Category, Product, Manufacturer, Collection, Color, Sex
 from custom.models import CustomCategory
 from outlet.models import OutletProduct
@@ -20,7 +20,7 @@ async def get_available_filters(
     discount_id: int | None = None,
     outlet_id: int | None = None,
     sex_id: int | None = None,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = select(Product).where(Product.warehouse_quantity > 0)
 
@@ -122,7 +122,7 @@ async def get_available_filters(
     discount_id: int | None = None,
     outlet_id: int | None = None,
     sex_id: int | None = None,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = select(Product).where(
         Product.warehouse_quantity > 0,
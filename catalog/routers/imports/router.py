@@ -0,0 +1,36 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_async_session
+from user.models import User
+from user.auth.fastapi_users_instance import fastapi_users
+
+from catalog.services.imports import CatalogImport
+from catalog.schemas.imports import ImportReportSchema
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+@router.post("/products", response_model=ImportReportSchema)
+async def import_products(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    missing: str = Query("keep", regex="^(keep|hide)$"),
+    encoding: str = "utf-8-sig",
+    delimiter: Optional[str] = Query(None, max_length=1),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    """
+    Загружает выгрузку каталога (CSV) без очистки базы: новые товары создаются,
+    изменившиеся обновляются, справочники (категории, коллекции, цвета и т.д.)
+    дополняются по парам колонок «ID + название».
+
+    dry_run=true — только отчёт о различиях, без записи.
+    missing=hide — скрыть с витрины товары, которых нет в файле.
+    """
+    importer = CatalogImport(session, dry_run=dry_run, hide_missing=missing == "hide")
+    try:
+        return await importer.run(file.file, encoding=encoding, delimiter=delimiter)
+    except (ValueError, UnicodeDecodeError, LookupError) as e:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail=f"Ошибка импорта: {e}")
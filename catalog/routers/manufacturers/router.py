@@ -1,7 +1,7 @@
 from sqlalchemy import select
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 
 from catalog.models import Manufacturer, Product
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/manufacturers", tags=["manufacturers"])
 
 @router.get("/")
 async def get_manufacturers(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Manufacturer)
@@ -23,7 +23,7 @@ async def get_manufacturers(
 
 @router.get("/v3/")
 async def get_manufacturers(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Manufacturer)
@@ -38,7 +38,7 @@ async def get_manufacturers(
 @router.get("/{manufacturer_id}")
 async def get_manufacturer_by_id(
     manufacturer_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Manufacturer).where(Manufacturer.manufacturer_id == manufacturer_id)
     result = await session.execute(query)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 
 from catalog.models import Material
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/materials", tags=["materials"])
 
 @router.get("/")
 async def get_materials(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Material)
     result = await session.execute(query)
@@ -20,7 +20,7 @@ async def get_materials(
 @router.get("/{material_id}")
 async def get_material_by_id(
     material_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Material).where(Material.material_id == material_id)
     result = await session.execute(query)
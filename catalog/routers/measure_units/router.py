@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 
 from catalog.models import MeasureUnit
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/measure_units", tags=["measure_units"])
 
 @router.get("/")
 async def get_measure_units(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(MeasureUnit)
     result = await session.execute(query)
@@ -20,7 +20,7 @@ async def get_measure_units(
 @router.get("/{measure_unit_id}")
 async def get_measure_unit_by_id(
     measure_unit_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(MeasureUnit).where(MeasureUnit.measure_unit_id == measure_unit_id)
     result = await session.execute(query)
@@ -2,19 +2,25 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import and_, delete, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_async_session, get_read_session
 from sqlalchemy.orm import selectinload, aliased
 from user.models import User
 from user.auth.fastapi_users_instance import fastapi_users
 
 
-from catalog.services.products import ProductServices
-from catalog.schemas.product import BaseProductSchema, UpdateProductSchema, SimilarProductSchema, UpdateProductImageSchema
+from catalog.services.products import ProductServices, product_filter_conditions
+from catalog.schemas.product import (
+    BaseProductSchema, UpdateProductSchema, SimilarProductSchema, UpdateProductImageSchema,
+    ArticulImagesSchema, BulkImagesResultSchema, StockDeltaSchema, StockSyncResultSchema,
+    ProductFilterSchema, BulkProductPatchSchema, BulkProductPatchResultSchema,
+)
 
 from catalog.models import Product, Collection, Category, ProductImage
 from custom.models import CustomCategory
 from discounts.models import Discount, DiscountProduct
 from outlet.models import OutletProduct, Outlet
+from feeds.tasks.feed import request_feed_refresh
+from catalog.tasks.image_variants import request_image_variants
 
 router = APIRouter(prefix="/products", tags=["products"])
 
@@ -46,91 +52,34 @@ async def get_products_by_filters(
     offset: int = Query(0, ge=0),
     limit: int = Query(20, le=100),
 
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    query = select(Product).where(Product.warehouse_quantity > 0).offset(offset).limit(limit)
-
-     # Фильтр по картинке
-    if has_image is True:
-        query = query.where(Product.images.any(ProductImage.image_url.isnot(None)))
-    elif has_image is False:
-        query = query.where(~Product.images.any(ProductImage.image_url.isnot(None)))
-
-    # Рекурсивные фильтры по коллекциям
-    if collection_id:
-        collection_cte = (
-            select(Collection.collection_id)
-            .where(Collection.collection_id.in_(collection_id))
-            .cte(name="collection_tree", recursive=True)
-        )
-        collection_alias = aliased(Collection)
-        collection_cte = collection_cte.union_all(
-            select(collection_alias.collection_id)
-            .where(collection_alias.parent_collection_id == collection_cte.c.collection_id)
-        )
-        query = query.where(Product.collection_id.in_(select(collection_cte.c.collection_id)))
-
-    # Рекурсивные фильтры по категориям
-    if category_id:
-        category_cte = (
-            select(Category.category_id)
-            .where(Category.category_id.in_(category_id))
-            .cte(name="category_cte", recursive=True)
-        )
-        category_alias = aliased(Category)
-        category_cte = category_cte.union_all(
-            select(category_alias.category_id)
-            .where(category_alias.parent_category_id == category_cte.c.category_id)
-        )
-        query = query.where(Product.category_id.in_(select(category_cte.c.category_id)))
-
-    if custom_category_id:
-        query = query.where(
-            Product.custom_categories.any(CustomCategory.category_id.in_(custom_category_id))
-        )
-    # Скидки
-    if discounts:
-        conditions = [Discount.is_active == True]
-        if discount_id:
-            conditions.append(Discount.id == discount_id)
-        query = query.where(
-            Product.discounts.any(
-                DiscountProduct.discount.has(and_(*conditions))
-            )
-        )
-    # Остальные фильтры
-    if manufacturer_id:
-        query = query.where(Product.manufacturer_id.in_(manufacturer_id))
-    if season_id is not None:
-        query = query.where(Product.season_id == season_id)
-    if sex_id:
-        query = query.where(Product.sex_id.in_(sex_id))
-    if color_id:
-        query = query.where(Product.color_id.in_(color_id))
-    if material_id:
-        query = query.where(Product.material_id == material_id)
-    if measure_unit_id:
-        query = query.where(Product.measure_unit_id == measure_unit_id)
-    if guarantee_mes_unit_id:
-        query = query.where(Product.guarantee_mes_unit_id == guarantee_mes_unit_id)
-    if model_good_id:
-        query = query.where(Product.model_good_id == model_good_id)
-    if product_size:
-        query = query.where(Product.product_size.in_(product_size))
-
-    if price_gt is not None:
-        query = query.where(Product.retail_price_with_discount >= price_gt)
-    if price_lt is not None:
-        query = query.where(Product.retail_price_with_discount <= price_lt)
-
-    if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            or_(
-                Product.good_name.ilike(search_term),
-                Product.articul.ilike(search_term),
-            )
-        )
+    filters = ProductFilterSchema(
+        category_id=category_id,
+        custom_category_id=custom_category_id,
+        manufacturer_id=manufacturer_id,
+        collection_id=collection_id,
+        season_id=season_id,
+        sex_id=sex_id,
+        color_id=color_id,
+        material_id=material_id,
+        measure_unit_id=measure_unit_id,
+        guarantee_mes_unit_id=guarantee_mes_unit_id,
+        model_good_id=model_good_id,
+        product_size=product_size,
+        price_gt=price_gt,
+        price_lt=price_lt,
+        search=search,
+        discounts=discounts,
+        discount_id=discount_id,
+        has_image=has_image,
+    )
+    query = (
+        select(Product)
+        .where(Product.warehouse_quantity > 0, *product_filter_conditions(filters))
+        .offset(offset)
+        .limit(limit)
+    )
 
     # Подгрузка изображений
     query = query.options(selectinload(Product.images))
@@ -183,7 +132,7 @@ async def get_products_by_filters_site(
     offset: int = Query(0, ge=0),
     limit: int = Query(20, le=100),
 
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     # Подзапрос с ранжированием товаров по артикулам
     # Применяем базовые фильтры ДО группировки
@@ -341,7 +290,7 @@ async def get_products_by_filters_site(
     return products
 
 @router.get("/{product_id}", response_model=BaseProductSchema)
-async def product_by_id(product_id: int, session: AsyncSession = Depends(get_async_session)):
+async def product_by_id(product_id: int, session: AsyncSession = Depends(get_read_session)):
     product = await ProductServices.get_product_by_id(session, product_id)
     return product
 
@@ -365,6 +314,53 @@ async def update_product_images(
     product = await ProductServices.update_product_images(session, product_id, images)
     return product
 
+@router.put("/images/bulk", response_model=BulkImagesResultSchema)
+async def update_images_bulk(
+    items: List[ArticulImagesSchema],
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    """Заменяет изображения у всех товаров каждого из переданных артикулов за одну транзакцию."""
+    # Если артикул передан несколько раз, берём последний набор
+    articul_images = {item.articul: item.images for item in items}
+    updated = await ProductServices.replace_articul_images(session, articul_images)
+    await session.commit()
+    request_feed_refresh()
+    request_image_variants()
+
+    return {
+        "updated_articuls": len(updated),
+        "updated_products": sum(len(ids) for ids in updated.values()),
+        "missing_articuls": [articul for articul in articul_images if articul not in updated],
+    }
+
+@router.post("/stock/sync", response_model=StockSyncResultSchema)
+async def sync_stock(
+    deltas: List[StockDeltaSchema],
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    """Обновляет остатки и цены пакетом между полными импортами каталога."""
+    updated = await ProductServices.apply_stock_deltas(session, deltas)
+    received = {delta.good_id for delta in deltas}
+    return {
+        "received": len(received),
+        "updated": len(updated),
+        "missing": sorted(received - set(updated)),
+    }
+
+@router.patch("/bulk", response_model=BulkProductPatchResultSchema)
+async def bulk_patch_products(
+    data: BulkProductPatchSchema,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    """
+    Массовое частичное изменение товаров по списку ids или по фильтрам (как в GET /products/).
+    dry_run=true возвращает только количество затрагиваемых товаров.
+    """
+    return await ProductServices.bulk_patch(session, data)
+
 @router.delete("/{image_id}/images")
 async def delete_product_image(
     image_id: int,
@@ -381,6 +377,7 @@ async def delete_product_image(
 
     await session.delete(db_image)
     await session.commit()
+    request_feed_refresh()
 
     return {"detail": "Image deleted successfully"}
 
@@ -388,7 +385,7 @@ async def delete_product_image(
 async def get_similar_products(
     product_id: int,
     admin: bool = False,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     result = await session.execute(
         select(Product)
@@ -449,4 +446,5 @@ async def delete_product_images(
         delete(ProductImage).where(ProductImage.image_id.in_(image_ids))
     )
     await session.commit()
+    request_feed_refresh()
     return None  # HTTP 204
\ No newline at end of file
@@ -10,6 +10,7 @@ from .materials.router import router as materials
 from .measure_units.router import router as measure_units
 from .colors.router import router as colors
 from .filters.router import router as filters
+from .imports.router import router as imports
 
 routers = APIRouter()
 
@@ -22,4 +23,5 @@ routers.include_router(seasons)
 routers.include_router(sexes)
 routers.include_router(materials)
 routers.include_router(measure_units)
-routers.include_router(colors)
\ No newline at end of file
+routers.include_router(colors)
+routers.include_router(imports)
\ No newline at end of file
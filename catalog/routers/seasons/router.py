@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 
 from catalog.models import Season, Product
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/seasons", tags=["seasons"])
 
 @router.get("/")
 async def get_seasons(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Season)
@@ -22,7 +22,7 @@ async def get_seasons(
 
 @router.get("/v3/")
 async def get_seasons(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Season)
@@ -40,7 +40,7 @@ async def get_seasons(
 @router.get("/{season_id}")
 async def get_season_by_id(
     season_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Season).where(Season.season_id == season_id)
     result = await session.execute(query)
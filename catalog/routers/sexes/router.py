@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 
 from catalog.models import Sex, Product
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/sexes", tags=["sexes"])
 
 @router.get("/")
 async def get_sexes(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Sex)
     result = await session.execute(query)
@@ -19,7 +19,7 @@ async def get_sexes(
 
 @router.get("/v3/")
 async def get_product_sexes(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     stmt = (
         select(Sex)
@@ -37,7 +37,7 @@ async def get_product_sexes(
 @router.get("/{sex_id}")
 async def get_sex_by_id(
     sex_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     query = select(Sex).where(Sex.sex_id == sex_id)
     result = await session.execute(query)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List
+
+class ImportChangeSchema(BaseModel):
+    good_id: int
+    fields: Dict[str, List[Any]]  # поле -> [было, стало]
+
+class ImportErrorSchema(BaseModel):
+    line: int
+    error: str
+
+class ImportReportSchema(BaseModel):
+    rows: int
+    created: int
+    updated: int
+    unchanged: int
+    hidden: int
+    references: Dict[str, Dict[str, int]] = {}
+    changes: List[ImportChangeSchema] = []
+    errors: List[ImportErrorSchema] = []
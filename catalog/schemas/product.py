@@ -1,14 +1,35 @@
-from pydantic import BaseModel, ConfigDict, Field
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator
+from typing import Dict, List, Optional
+
+class ImageVariantSchema(BaseModel):
+    width: int
+    height: int
+    format: str
+    url: str
 
 class ProductImageSchema(BaseModel):
     image_id: int
     image_url: str
     is_main: bool
     order: int
+    variants: List[ImageVariantSchema] = []
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("variants", mode="before")
+    @classmethod
+    def empty_variants(cls, value):
+        return value or []
+
+    @computed_field
+    @property
+    def srcset(self) -> Dict[str, str]:
+        """Готовые значения атрибута srcset по форматам: {"webp": "url 160w, url 320w", ...}."""
+        grouped = {}
+        for variant in sorted(self.variants, key=lambda v: v.width):
+            grouped.setdefault(variant.format, []).append(f"{variant.url} {variant.width}w")
+        return {fmt: ", ".join(items) for fmt, items in grouped.items()}
+
 class UpdateProductImageSchema(BaseModel):
     image_url: str
     is_main: bool
@@ -16,6 +37,46 @@ class UpdateProductImageSchema(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class ArticulImagesSchema(BaseModel):
+    articul: str
+    images: List[UpdateProductImageSchema]
+
+class BulkImagesResultSchema(BaseModel):
+    updated_articuls: int
+    updated_products: int
+    missing_articuls: List[str] = []
+
+class StockDeltaSchema(BaseModel):
+    good_id: int
+    warehouse_quantity: Optional[float] = None
+    retail_price: Optional[float] = None
+
+class StockSyncResultSchema(BaseModel):
+    received: int
+    updated: int
+    missing: List[int] = []
+
+class ProductFilterSchema(BaseModel):
+    """Те же фильтры, что у GET /products/."""
+    category_id: Optional[List[int]] = None
+    custom_category_id: Optional[List[int]] = None
+    manufacturer_id: Optional[List[int]] = None
+    collection_id: Optional[List[int]] = None
+    season_id: Optional[int] = None
+    sex_id: Optional[List[int]] = None
+    color_id: Optional[List[int]] = None
+    material_id: Optional[int] = None
+    measure_unit_id: Optional[int] = None
+    guarantee_mes_unit_id: Optional[int] = None
+    model_good_id: Optional[int] = None
+    product_size: Optional[List[float]] = None
+    price_gt: Optional[float] = None
+    price_lt: Optional[float] = None
+    search: Optional[str] = None
+    discounts: Optional[bool] = None
+    discount_id: Optional[int] = None
+    has_image: Optional[bool] = None
+
 class BaseProductSchema(BaseModel):
     id: int = Field(alias='good_id')
     name: str = Field(alias='good_name')
@@ -85,4 +146,16 @@ class SimilarProductSchema(BaseModel):
     color: Optional[Color] = None
     product_size: Optional[float]
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class BulkProductPatchSchema(BaseModel):
+    ids: Optional[List[int]] = None
+    filters: Optional[ProductFilterSchema] = None
+    values: UpdateProductSchema
+    dry_run: bool = False
+
+class BulkProductPatchResultSchema(BaseModel):
+    matched: int
+    propagated: int
+    dry_run: bool
+
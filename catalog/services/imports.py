@@ -0,0 +1,331 @@
+import asyncio
+import copy
+import csv
+import io
+import re
+from itertools import chain, islice
+
+from sqlalchemy import Float, Integer, String, and_, any_, bindparam, func, not_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from catalog.models import Product, Category, Collection, Color, Manufacturer, Season, Sex, Material, MeasureUnit
+from catalog.services.products import discounted_price
+from config.config import CATALOG_IMPORT_CHUNK_SIZE, CATALOG_IMPORT_DIFF_LIMIT
+from feeds.tasks.feed import request_feed_refresh
+
+# Справочники, которые можно передать в выгрузке парой колонок «ID + название»
+REFERENCES = {
+    "categories": (Category, "category_id", "category_name"),
+    "collections": (Collection, "collection_id", "collection_name"),
+    "colors": (Color, "color_id", "color_name"),
+    "manufacturers": (Manufacturer, "manufacturer_id", "manufacturer_name"),
+    "seasons": (Season, "season_id", "season_name"),
+    "sexes": (Sex, "sex_id", "sex_name"),
+    "materials": (Material, "material_id", "material_name"),
+}
+
+# Внешние ключи товара -> таблица, в которой должен существовать id
+PRODUCT_FOREIGN_KEYS = {
+    "category_id": (Category, "category_id"),
+    "collection_id": (Collection, "collection_id"),
+    "color_id": (Color, "color_id"),
+    "manufacturer_id": (Manufacturer, "manufacturer_id"),
+    "season_id": (Season, "season_id"),
+    "sex_id": (Sex, "sex_id"),
+    "material_id": (Material, "material_id"),
+    "measure_unit_id": (MeasureUnit, "measure_unit_id"),
+    "guarantee_mes_unit_id": (MeasureUnit, "measure_unit_id"),
+}
+
+# Колонки выгрузки, чьи имена не совпадают с полями модели
+HEADER_ALIASES = {
+    "thesize": "product_size",
+}
+
+# Считаются по цене и привязанным скидкам/аутлетам, из файла не берутся
+DERIVED_FIELDS = {"retail_price_with_discount"}
+
+
+def _normalize_header(name: str) -> str:
+    # GoodID, good_id и Good Id сводятся к одному ключу
+    return re.sub(r"[^0-9a-z]", "", name.lower())
+
+
+PRODUCT_HEADERS = {
+    _normalize_header(column.name): column.name
+    for column in Product.__table__.columns
+    if column.name not in DERIVED_FIELDS
+}
+PRODUCT_HEADERS.update(HEADER_ALIASES)
+# NOT NULL поля товара: пустое значение в файле — ошибка строки, а не всей порции
+REQUIRED_FIELDS = [
+    column.name for column in Product.__table__.columns if not column.nullable and not column.primary_key
+]
+REFERENCE_HEADERS = {_normalize_header(name_field): key for key, (_, _, name_field) in REFERENCES.items()}
+
+
+def _coerce(column, value: str):
+    value = value.strip()
+    if value == "":
+        return None
+    if isinstance(column.type, (Integer, Float)):
+        try:
+            number = float(value.replace("\u00a0", "").replace(" ", "").replace(",", "."))
+        except ValueError:
+            raise ValueError(f"{column.name}: не число '{value}'")
+        return int(number) if isinstance(column.type, Integer) else number
+    if isinstance(column.type, String) and column.type.length and len(value) > column.type.length:
+        raise ValueError(f"{column.name}: длиннее {column.type.length} символов")
+    return value
+
+
+def _detect_delimiter(line: str) -> str:
+    return max(";,\t|", key=line.count)
+
+
+class CatalogImport:
+    """
+    Потоковый импорт каталога из CSV (выгрузка 1С/кассы).
+
+    Файл читается порциями по CATALOG_IMPORT_CHUNK_SIZE строк. Для каждой порции
+    текущие значения читаются одним запросом, и в БД отправляются только новые и
+    изменившиеся строки: новые — одним INSERT, изменившиеся — одним
+    UPDATE ... FROM unnest(...). Обновляются только колонки, присутствующие в
+    файле; остальные поля товаров не трогаются. При изменении retail_price
+    пересчитывается retail_price_with_discount.
+
+    Каждая порция — отдельная транзакция. Если БД отклонила порцию, она
+    откатывается целиком и попадает в errors, а импорт продолжается.
+    """
+
+    def __init__(self, session: AsyncSession, dry_run: bool = False, hide_missing: bool = False):
+        self.session = session
+        self.dry_run = dry_run
+        self.hide_missing = hide_missing
+        self.seen_ids: set[int] = set()
+        self.report = {
+            "rows": 0,
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "hidden": 0,
+            "references": {},
+            "changes": [],
+            "errors": [],
+        }
+
+    async def run(self, fileobj, encoding: str = "utf-8-sig", delimiter: str = None) -> dict:
+        text = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+        first_line = await asyncio.to_thread(text.readline)
+        reader = csv.reader(chain([first_line], text), delimiter=delimiter or _detect_delimiter(first_line))
+        header = next(reader)
+        columns, references = self._map_header(header)
+
+        while True:
+            chunk = await asyncio.to_thread(lambda: [(reader.line_num, row) for row in islice(reader, CATALOG_IMPORT_CHUNK_SIZE)])
+            if not chunk:
+                break
+            await self._import_chunk(chunk, len(header), columns, references)
+
+        # Без ошибок и только если файл не пустой — иначе можно скрыть весь каталог
+        if self.hide_missing and self.seen_ids and not self.report["errors"]:
+            await self._hide_missing()
+        if not self.dry_run and (self.report["created"] or self.report["updated"] or self.report["hidden"]):
+            request_feed_refresh()
+        return self.report
+
+    def _map_header(self, header: list[str]):
+        columns = {}  # индекс колонки -> поле Product
+        references = {}  # индекс колонки -> справочник
+        for index, name in enumerate(header):
+            key = _normalize_header(name)
+            if key in PRODUCT_HEADERS:
+                columns[index] = PRODUCT_HEADERS[key]
+            elif key in REFERENCE_HEADERS:
+                references[index] = REFERENCE_HEADERS[key]
+        if "good_id" not in columns.values():
+            raise ValueError("В файле нет колонки GoodID")
+        return columns, references
+
+    def _error(self, line: int, message: str):
+        self.report["errors"].append({"line": line, "error": message})
+
+    def _parse_chunk(self, chunk, width, columns, references):
+        products = {}
+        reference_rows = {key: {} for key in REFERENCES}
+        lines = {}
+        table = Product.__table__.columns
+        for line, row in chunk:
+            if not any(value.strip() for value in row):
+                continue
+            self.report["rows"] += 1
+            try:
+                if len(row) < width:
+                    raise ValueError(f"ожидалось {width} колонок, получено {len(row)}")
+                product = {field: _coerce(table[field], row[index]) for index, field in columns.items()}
+                if product.get("good_id") is None:
+                    raise ValueError("пустой GoodID")
+                for field in REQUIRED_FIELDS:
+                    if field in product and product[field] is None:
+                        raise ValueError(f"{field}: пустое значение")
+                for index, key in references.items():
+                    model, id_field, name_field = REFERENCES[key]
+                    # Длину проверяем здесь: иначе DataError оборвёт импорт после уже закоммиченных порций
+                    name = _coerce(model.__table__.columns[name_field], row[index])
+                    if name and product.get(id_field) is not None:
+                        reference_rows[key][product[id_field]] = {id_field: product[id_field], name_field: name}
+            except ValueError as e:
+                self._error(line, str(e))
+                continue
+            # При повторе GoodID в файле побеждает последняя строка
+            products[product["good_id"]] = product
+            lines[product["good_id"]] = line
+        return products, reference_rows, lines
+
+    async def _upsert_references(self, reference_rows: dict) -> dict[str, set]:
+        """Создаёт/переименовывает записи справочников. Возвращает id, пришедшие в порции."""
+        incoming_ids = {}
+        for key, rows in reference_rows.items():
+            if not rows:
+                continue
+            model, id_field, name_field = REFERENCES[key]
+            incoming_ids[key] = set(rows)
+            stats = self.report["references"].setdefault(key, {"created": 0, "updated": 0})
+
+            result = await self.session.execute(
+                select(getattr(model, id_field), getattr(model, name_field))
+                .where(getattr(model, id_field).in_(rows.keys()))
+            )
+            existing = dict(result.all())
+            changed = [row for ref_id, row in rows.items() if existing.get(ref_id) != row[name_field]]
+            stats["created"] += sum(1 for row in changed if row[id_field] not in existing)
+            stats["updated"] += sum(1 for row in changed if row[id_field] in existing)
+            if changed and not self.dry_run:
+                stmt = insert(model.__table__).values(changed)
+                await self.session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[id_field],
+                        set_={name_field: stmt.excluded[name_field]},
+                    )
+                )
+        return incoming_ids
+
+    async def _drop_unknown_references(self, products: dict, lines: dict, incoming_ids: dict):
+        # Строки со ссылкой на несуществующий справочник пропускаем, а не роняем всю порцию
+        for field, (model, id_field) in PRODUCT_FOREIGN_KEYS.items():
+            ids = {p[field] for p in products.values() if p.get(field) is not None}
+            if not ids:
+                continue
+            result = await self.session.execute(
+                select(getattr(model, id_field)).where(getattr(model, id_field).in_(ids))
+            )
+            known = set(result.scalars().all())
+            for key, (ref_model, _, _) in REFERENCES.items():
+                if ref_model is model:
+                    known |= incoming_ids.get(key, set())
+            for good_id, product in list(products.items()):
+                if product.get(field) is not None and product[field] not in known:
+                    self._error(lines[good_id], f"{field}={product[field]} не найден")
+                    del products[good_id]
+
+    async def _import_chunk(self, chunk, width, columns, references):
+        products, reference_rows, lines = self._parse_chunk(chunk, width, columns, references)
+        if not products:
+            return
+        self.seen_ids.update(products)
+
+        # Счётчики отчёта откатываются вместе с порцией
+        snapshot = {key: copy.deepcopy(self.report[key]) for key in ("created", "updated", "unchanged", "references")}
+        changes_count = len(self.report["changes"])
+        try:
+            await self._write_chunk(products, reference_rows, lines, columns)
+        except DBAPIError as e:
+            await self.session.rollback()
+            self.report.update(snapshot)
+            del self.report["changes"][changes_count:]
+            first, last = min(lines.values()), max(lines.values())
+            print(f"[ERROR] Импорт каталога: строки {first}-{last} не записаны: {e.orig}")
+            self._error(first, f"строки {first}-{last} не записаны: {e.orig}")
+
+    async def _write_chunk(self, products: dict, reference_rows: dict, lines: dict, columns: dict):
+        incoming_ids = await self._upsert_references(reference_rows)
+        await self._drop_unknown_references(products, lines, incoming_ids)
+
+        fields = list(dict.fromkeys(columns.values()))
+        result = await self.session.execute(
+            select(*[getattr(Product, field) for field in fields]).where(Product.good_id.in_(products.keys()))
+        )
+        existing = {row.good_id: row._asdict() for row in result}
+
+        created, updated = [], []
+        for good_id, product in products.items():
+            row = {field: product.get(field) for field in fields}
+            current = existing.get(good_id)
+            if current is None:
+                missing = [field for field in REQUIRED_FIELDS if row.get(field) is None]
+                if missing:
+                    self._error(lines[good_id], f"у нового товара не заполнено: {', '.join(missing)}")
+                    continue
+                self.report["created"] += 1
+                created.append(row)
+                continue
+            diff = {field: [current[field], row[field]] for field in fields if current[field] != row[field]}
+            if not diff:
+                self.report["unchanged"] += 1
+                continue
+            self.report["updated"] += 1
+            updated.append(row)
+            if len(self.report["changes"]) < CATALOG_IMPORT_DIFF_LIMIT:
+                self.report["changes"].append({"good_id": good_id, "fields": diff})
+
+        if self.dry_run:
+            return
+        if created:
+            if "retail_price" in fields:
+                # У новых товаров ещё нет скидок и аутлетов
+                for row in created:
+                    row["retail_price_with_discount"] = row["retail_price"]
+            await self.session.execute(insert(Product.__table__), created)
+        if updated:
+            await self._update_existing(updated, fields)
+        # Коммитим порциями: длинный импорт не держит одну огромную транзакцию
+        await self.session.commit()
+
+    async def _update_existing(self, rows: list[dict], fields: list[str]):
+        """
+        Изменившиеся товары — одним UPDATE ... FROM unnest(...), по массиву на колонку.
+        В отличие от INSERT ... ON CONFLICT, не требует NOT NULL колонок, которых нет в файле.
+        """
+        table = Product.__table__.columns
+        data = func.unnest(*[
+            bindparam(f"import_{field}", [row[field] for row in rows], type_=ARRAY(table[field].type))
+            for field in fields
+        ]).table_valued(*fields).render_derived(name="incoming")
+        values = {field: data.c[field] for field in fields if field != "good_id"}
+        if "retail_price" in fields:
+            # Цена пересчитывается с учётом скидок и аутлетов — как в apply_stock_deltas
+            values["retail_price_with_discount"] = discounted_price(data.c.retail_price)
+        await self.session.execute(
+            update(Product)
+            .where(Product.good_id == data.c.good_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _hide_missing(self):
+        """Скрывает с витрины товары, которых нет в файле (вместо удаления каталога)."""
+        missing = and_(
+            not_(Product.good_id == any_(bindparam("seen_ids", list(self.seen_ids), type_=ARRAY(Integer)))),
+            Product.display.is_distinct_from(0),
+        )
+        if self.dry_run:
+            result = await self.session.execute(select(func.count()).select_from(Product).where(missing))
+            self.report["hidden"] = result.scalar()
+            return
+        result = await self.session.execute(
+            update(Product).where(missing).values(display=0).execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        self.report["hidden"] = result.rowcount
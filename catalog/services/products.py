@@ -1,12 +1,154 @@
-from typing import List
+from typing import Dict, List
 from fastapi import HTTPException
-from sqlalchemy import select, delete
+from sqlalchemy import Float, Integer, Numeric, String, all_, and_, any_, bindparam, case, cast, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
-from catalog.models import Product
+from catalog.models import Product, Category, Collection
 from catalog.models.product_images import ProductImage
-from catalog.schemas.product import ProductImageSchema, UpdateProductSchema, UpdateProductImageSchema
+from catalog.schemas.product import (
+    ProductImageSchema, UpdateProductSchema, UpdateProductImageSchema, StockDeltaSchema,
+    ProductFilterSchema, BulkProductPatchSchema,
+)
+from custom.models import CustomCategory
+from discounts.models import Discount, DiscountProduct
+from outlet.models import Outlet, OutletProduct
+from feeds.tasks.feed import request_feed_refresh
+from catalog.tasks.image_variants import request_image_variants
+from config.config import ARTICUL_SHARED_FIELDS
+
+def discounted_price(price):
+    """
+    SQL-выражение цены со скидкой: берётся наибольшая из привязанных к товару
+    скидок и аутлетов — как при их назначении. Используется в UPDATE products:
+    подзапросы коррелируют с обновляемой строкой.
+    """
+    discount_percent = (
+        select(func.max(Discount.discount_percent))
+        .join(DiscountProduct, DiscountProduct.discount_id == Discount.id)
+        .where(DiscountProduct.product_id == Product.good_id)
+        .scalar_subquery()
+    )
+    outlet_percent = (
+        select(func.max(Outlet.discount_percent))
+        .join(OutletProduct, OutletProduct.outlet_id == Outlet.id)
+        .where(OutletProduct.product_id == Product.good_id)
+        .scalar_subquery()
+    )
+    percent = func.coalesce(func.greatest(discount_percent, outlet_percent), 0)
+    return cast(func.round(cast(price * (1 - percent / 100), Numeric), 2), Float)
+
+
+def normalize_images(images: List[UpdateProductImageSchema]) -> List[dict]:
+    # Убираем дубликаты по URL, сортируем по order и выставляем главный
+    # только для первого, независимо от входного is_main
+    seen_urls = set()
+    normalized = []
+    for image in images:
+        url = image.image_url
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        order_value = image.order if image.order is not None else len(normalized)
+        normalized.append({
+            "image_url": url,
+            "order": order_value,
+            "is_main": False,
+        })
+    normalized.sort(key=lambda i: i["order"])
+    if normalized:
+        normalized[0]["is_main"] = True
+    return normalized
+
+
+def product_filter_conditions(filters: ProductFilterSchema) -> list:
+    """Условия WHERE по фильтрам каталога — общие для выборки и массового изменения."""
+    conditions = []
+
+    # Фильтр по картинке
+    if filters.has_image is True:
+        conditions.append(Product.images.any(ProductImage.image_url.isnot(None)))
+    elif filters.has_image is False:
+        conditions.append(~Product.images.any(ProductImage.image_url.isnot(None)))
+
+    # Рекурсивные фильтры по коллекциям
+    if filters.collection_id:
+        collection_cte = (
+            select(Collection.collection_id)
+            .where(Collection.collection_id.in_(filters.collection_id))
+            .cte(name="collection_tree", recursive=True)
+        )
+        collection_alias = aliased(Collection)
+        collection_cte = collection_cte.union_all(
+            select(collection_alias.collection_id)
+            .where(collection_alias.parent_collection_id == collection_cte.c.collection_id)
+        )
+        conditions.append(Product.collection_id.in_(select(collection_cte.c.collection_id)))
+
+    # Рекурсивные фильтры по категориям
+    if filters.category_id:
+        category_cte = (
+            select(Category.category_id)
+            .where(Category.category_id.in_(filters.category_id))
+            .cte(name="category_cte", recursive=True)
+        )
+        category_alias = aliased(Category)
+        category_cte = category_cte.union_all(
+            select(category_alias.category_id)
+            .where(category_alias.parent_category_id == category_cte.c.category_id)
+        )
+        conditions.append(Product.category_id.in_(select(category_cte.c.category_id)))
+
+    if filters.custom_category_id:
+        conditions.append(
+            Product.custom_categories.any(CustomCategory.category_id.in_(filters.custom_category_id))
+        )
+    # Скидки
+    if filters.discounts:
+        discount_conditions = [Discount.is_active == True]
+        if filters.discount_id:
+            discount_conditions.append(Discount.id == filters.discount_id)
+        conditions.append(
+            Product.discounts.any(
+                DiscountProduct.discount.has(and_(*discount_conditions))
+            )
+        )
+    # Остальные фильтры
+    if filters.manufacturer_id:
+        conditions.append(Product.manufacturer_id.in_(filters.manufacturer_id))
+    if filters.season_id is not None:
+        conditions.append(Product.season_id == filters.season_id)
+    if filters.sex_id:
+        conditions.append(Product.sex_id.in_(filters.sex_id))
+    if filters.color_id:
+        conditions.append(Product.color_id.in_(filters.color_id))
+    if filters.material_id:
+        conditions.append(Product.material_id == filters.material_id)
+    if filters.measure_unit_id:
+        conditions.append(Product.measure_unit_id == filters.measure_unit_id)
+    if filters.guarantee_mes_unit_id:
+        conditions.append(Product.guarantee_mes_unit_id == filters.guarantee_mes_unit_id)
+    if filters.model_good_id:
+        conditions.append(Product.model_good_id == filters.model_good_id)
+    if filters.product_size:
+        conditions.append(Product.product_size.in_(filters.product_size))
+
+    if filters.price_gt is not None:
+        conditions.append(Product.retail_price_with_discount >= filters.price_gt)
+    if filters.price_lt is not None:
+        conditions.append(Product.retail_price_with_discount <= filters.price_lt)
+
+    if filters.search:
+        search_term = f"%{filters.search}%"
+        conditions.append(
+            or_(
+                Product.good_name.ilike(search_term),
+                Product.articul.ilike(search_term),
+            )
+        )
+    return conditions
+
 
 class ProductServices:
 
@@ -23,92 +165,211 @@ class ProductServices:
             raise HTTPException(status_code=404, detail="Product not found")
 
         update_data = product_data.dict(exclude_unset=True)
-        # Определяем, нужно ли распространять изменение цвета на товары с тем же артикулом
-        propagate_color_change = 'color_id' in update_data
-        new_color_id = update_data.get('color_id') if propagate_color_change else None
         for key, value in update_data.items():
             setattr(db_product, key, value)
 
-        # Если изменился цвет, находим все товары с тем же артикулом и обновляем им color_id
-        if propagate_color_change:
-            current_articul = db_product.articul  # после применения возможного изменения артикула
-            similar_products_result = await session.execute(
-                select(Product).where(Product.articul == current_articul)
-            )
-            similar_products = similar_products_result.scalars().all()
-
-            for similar_product in similar_products:
-                if similar_product.good_id != product_id:
-                    similar_product.color_id = new_color_id
-
         try:
+            # Общие для артикула поля (например, цвет) переносим на остальные товары артикула
+            await ProductServices.propagate_to_siblings(session, db_product, update_data)
             await session.commit()
             await session.refresh(db_product)
+            request_feed_refresh()
             return db_product
         except Exception as e:
             await session.rollback()
             raise HTTPException(status_code=400, detail=f"Error updating product: {str(e)}")
     
+    async def propagate_to_siblings(session: AsyncSession, product: Product, values: dict):
+        """
+        Переносит поля из ARTICUL_SHARED_FIELDS на остальные товары того же
+        артикула одним UPDATE, не загружая их в сессию.
+        """
+        shared = {key: value for key, value in values.items() if key in ARTICUL_SHARED_FIELDS}
+        if not shared or not product.articul:
+            return
+        await session.execute(
+            update(Product)
+            .where(Product.articul == product.articul, Product.good_id != product.good_id)
+            .values(**shared)
+            .execution_options(synchronize_session=False)
+        )
+
     async def update_product_images(session: AsyncSession, product_id: int, images: List[UpdateProductImageSchema]):
         # Найти исходный товар
-        result = await session.execute(
-            select(Product).options(selectinload(Product.images)).where(Product.good_id == product_id)
-        )
-        db_product = result.scalar_one_or_none()
+        db_product = await session.get(Product, product_id)
         if not db_product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Получаем все товары с тем же артикулом (включая текущий)
-        current_articul = db_product.articul
-        similar_products_result = await session.execute(
-            select(Product).options(selectinload(Product.images)).where(Product.articul == current_articul)
+        # Изображения общие для всех товаров с тем же артикулом (включая текущий)
+        if db_product.articul and "images" in ARTICUL_SHARED_FIELDS:
+            await ProductServices.replace_articul_images(session, {db_product.articul: images})
+        else:
+            await ProductServices.replace_images(session, {db_product.good_id: normalize_images(images)})
+
+        await session.commit()
+        await session.refresh(db_product, attribute_names=["images"])
+        request_feed_refresh()
+        request_image_variants()
+        return db_product
+
+    async def replace_images(session: AsyncSession, images_by_good_id: Dict[int, List[dict]]):
+        """
+        Заменяет изображения сразу у всех товаров, у каждого — свой набор:
+        один запрос готовых копий, один DELETE и один многострочный INSERT.
+        """
+        if not images_by_good_id:
+            return
+        rows = [
+            {**image, "good_id": good_id}
+            for good_id, images in images_by_good_id.items()
+            for image in images
+        ]
+        # Уже созданные копии переносим на новые строки, чтобы не пересоздавать их заново
+        urls = list({row["image_url"] for row in rows})
+        known_variants = {}
+        if urls:
+            result = await session.execute(
+                select(ProductImage.image_url, ProductImage.variants)
+                .where(
+                    ProductImage.image_url == any_(bindparam("urls", urls, type_=ARRAY(String))),
+                    ProductImage.variants.isnot(None),
+                )
+                .distinct(ProductImage.image_url)
+            )
+            known_variants = {row.image_url: row.variants for row in result}
+
+        # Массивом, а не IN (...): товаров может быть больше лимита параметров asyncpg
+        good_ids = bindparam("good_ids", list(images_by_good_id), type_=ARRAY(Integer))
+        await session.execute(delete(ProductImage).where(ProductImage.good_id == any_(good_ids)))
+        for row in rows:
+            row["variants"] = known_variants.get(row["image_url"])
+        if rows:
+            await session.execute(insert(ProductImage), rows)
+
+    async def replace_articul_images(session: AsyncSession, articul_images: Dict[str, List[UpdateProductImageSchema]]) -> Dict[str, List[int]]:
+        """
+        Заменяет изображения у всех товаров перечисленных артикулов — одним
+        DELETE и одним INSERT на весь пакет, сколько бы артикулов в нём ни было.
+        Возвращает найденные товары по артикулам; коммит — на вызывающей стороне.
+        """
+        result = await session.execute(
+            select(Product.good_id, Product.articul).where(Product.articul.in_(articul_images.keys()))
         )
-        similar_products = similar_products_result.scalars().all()
-
-        # Нормализуем входные изображения: убираем дубликаты по URL, назначаем порядковые номера,
-        # и выставляем главный только для первого (order == 0)
-        seen_urls = set()
-        normalized = []
-        for idx, image in enumerate(images):
-            url = image.image_url
-            if url in seen_urls:
-                continue
-            seen_urls.add(url)
-            order_value = image.order if image.order is not None else len(normalized)
-            normalized.append({
-                "image_url": url,
-                "order": order_value,
-                # Главным делаем только первый по порядку, независимо от входного is_main
-                "is_main": False,
-            })
-
-        # Убедимся, что хотя бы одно изображение есть
-        if not normalized:
-            # Очистим изображения у всех похожих товаров
-            for product in similar_products:
-                await session.execute(delete(ProductImage).where(ProductImage.good_id == product.good_id))
-            await session.commit()
-            await session.refresh(db_product)
-            return db_product
+        goods_by_articul = {}
+        for good_id, articul in result:
+            goods_by_articul.setdefault(articul, []).append(good_id)
 
-        # Отсортируем по order и выставим главный для первого
-        normalized.sort(key=lambda i: i["order"]) 
-        normalized[0]["is_main"] = True
+        images_by_good_id = {}
+        for articul, good_ids in goods_by_articul.items():
+            images = normalize_images(articul_images[articul])
+            for good_id in good_ids:
+                images_by_good_id[good_id] = images
+        await ProductServices.replace_images(session, images_by_good_id)
+        return goods_by_articul
 
-        # Для каждого товара с таким же артикулом пересоздаем изображения
-        for product in similar_products:
-            # Удаляем старые
-            await session.execute(delete(ProductImage).where(ProductImage.good_id == product.good_id))
+    async def apply_stock_deltas(session: AsyncSession, deltas: List[StockDeltaSchema]) -> List[int]:
+        """
+        Применяет остатки и цены одним UPDATE ... FROM unnest(...): весь пакет
+        передаётся тремя массивами, независимо от числа строк. Пустое значение
+        в строке оставляет поле без изменений. Возвращает id обновлённых товаров.
+        """
+        # При повторе good_id в пакете побеждает последняя строка
+        rows = {delta.good_id: delta for delta in deltas}
+        if not rows:
+            return []
 
-            # Добавляем новые по заданному порядку
-            for item in normalized:
-                session.add(ProductImage(
-                    good_id=product.good_id,
-                    image_url=item["image_url"],
-                    is_main=item["is_main"],
-                    order=item["order"],
-                ))
+        data = func.unnest(
+            bindparam("good_ids", [d.good_id for d in rows.values()], type_=ARRAY(Integer)),
+            bindparam("quantities", [d.warehouse_quantity for d in rows.values()], type_=ARRAY(Float)),
+            bindparam("prices", [d.retail_price for d in rows.values()], type_=ARRAY(Float)),
+        ).table_valued("good_id", "warehouse_quantity", "retail_price").render_derived(name="delta")
 
+        quantity = func.coalesce(data.c.warehouse_quantity, Product.warehouse_quantity)
+        price = func.coalesce(data.c.retail_price, Product.retail_price)
+
+        result = await session.execute(
+            update(Product)
+            .where(Product.good_id == data.c.good_id)
+            .values(
+                warehouse_quantity=quantity,
+                retail_price=price,
+                retail_price_with_discount=discounted_price(price),
+                # Как при оформлении и отмене заказа: закончился — скрываем, появился — показываем
+                display=case(
+                    (data.c.warehouse_quantity.is_(None), Product.display),
+                    (data.c.warehouse_quantity <= 0, 0),
+                    (Product.display == 0, 1),
+                    else_=Product.display,
+                ),
+            )
+            .returning(Product.good_id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = list(result.scalars().all())
         await session.commit()
-        await session.refresh(db_product)
-        return db_product
\ No newline at end of file
+        if updated:
+            request_feed_refresh()
+        return updated
+
+    async def bulk_patch(session: AsyncSession, data: BulkProductPatchSchema) -> dict:
+        """
+        Применяет частичное изменение к товарам по списку id или по фильтрам каталога.
+        Сначала выбираются id подходящих товаров — поэтому изменение полей, по
+        которым шёл отбор, не влияет на то, к каким товарам оно применится.
+        Фильтры отбирают только товары в наличии, как GET /products/: изменение
+        затрагивает ровно то, что админ видел в списке.
+        """
+        if data.ids is not None:
+            # Массивом, а не IN (...): список может быть длиннее лимита параметров asyncpg
+            conditions = [Product.good_id == any_(bindparam("ids", data.ids, type_=ARRAY(Integer)))]
+        else:
+            conditions = product_filter_conditions(data.filters) if data.filters else []
+            # Без условий изменился бы весь каталог — такое делаем только явно по списку id
+            if not conditions:
+                raise HTTPException(status_code=400, detail="Specify ids or at least one filter")
+            conditions.append(Product.warehouse_quantity > 0)
+
+        values = data.values.dict(exclude_unset=True)
+        if not values:
+            raise HTTPException(status_code=400, detail="Nothing to update")
+
+        result = await session.execute(select(Product.good_id).where(*conditions))
+        good_ids = list(result.scalars().all())
+        matched = bindparam("good_ids", good_ids, type_=ARRAY(Integer))
+
+        # Общие для артикула поля переносим и на остальные размеры моделей
+        shared = {key: value for key, value in values.items() if key in ARTICUL_SHARED_FIELDS}
+        siblings = (
+            Product.articul.in_(
+                select(Product.articul).where(Product.good_id == any_(matched), Product.articul.isnot(None))
+            ),
+            Product.good_id != all_(matched),
+        )
+
+        if data.dry_run:
+            propagated = 0
+            if shared and good_ids:
+                result = await session.execute(select(func.count()).select_from(Product).where(*siblings))
+                propagated = result.scalar()
+            return {"matched": len(good_ids), "propagated": propagated, "dry_run": True}
+
+        propagated = 0
+        if good_ids:
+            try:
+                if shared:
+                    result = await session.execute(
+                        update(Product).where(*siblings).values(**shared)
+                        .execution_options(synchronize_session=False)
+                    )
+                    propagated = result.rowcount
+                await session.execute(
+                    update(Product).where(Product.good_id == any_(matched)).values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                raise HTTPException(status_code=400, detail=f"Error updating products: {str(e)}")
+            request_feed_refresh()
+        return {"matched": len(good_ids), "propagated": propagated, "dry_run": False}
+
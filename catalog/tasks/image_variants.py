@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from sqlalchemy import select, update
+
+from catalog.models.product_images import ProductImage
+from config.config import IMAGE_VARIANT_INTERVAL, IMAGE_VARIANT_RETRY_SECONDS
+from config.database import advisory_lock, async_session_maker
+from storage.variants import build_variants
+
+VARIANT_BATCH_SIZE = 50
+# Копии создаёт один процесс на все воркеры; остальные ждут и пробуют снова
+VARIANT_LOCK = "images:variants"
+BUSY_RETRY_SECONDS = 30
+
+_images_changed = asyncio.Event()
+_failed_urls: dict[str, float] = {}  # URL -> time.monotonic() последней ошибки
+
+
+def request_image_variants():
+    """Будит фоновую задачу, чтобы она создала копии для новых изображений."""
+    _images_changed.set()
+
+
+def _recently_failed() -> list[str]:
+    # Ошибка могла быть временной (S3, сеть) — по истечении паузы пробуем снова
+    retry_before = time.monotonic() - IMAGE_VARIANT_RETRY_SECONDS
+    for url, failed_at in list(_failed_urls.items()):
+        if failed_at < retry_before:
+            del _failed_urls[url]
+    return list(_failed_urls)
+
+
+async def build_missing_variants() -> int:
+    """Создаёт копии для всех изображений, у которых их ещё нет. Возвращает число обработанных URL."""
+    processed = 0
+    while True:
+        query = (
+            select(ProductImage.image_url)
+            .where(ProductImage.variants.is_(None))
+            .distinct()
+            .limit(VARIANT_BATCH_SIZE)
+        )
+        skipped = _recently_failed()
+        if skipped:
+            query = query.where(ProductImage.image_url.notin_(skipped))
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            urls = result.scalars().all()
+        if not urls:
+            return processed
+
+        for url in urls:
+            try:
+                variants = await build_variants(url)
+            except Exception as e:
+                print(f"[ERROR] Не удалось создать копии для {url}, повтор через {IMAGE_VARIANT_RETRY_SECONDS} с: {e}")
+                _failed_urls[url] = time.monotonic()
+                continue
+
+            # Один и тот же URL встречается у всех товаров артикула — обновляем все строки разом
+            async with async_session_maker() as session:
+                await session.execute(
+                    update(ProductImage)
+                    .where(ProductImage.image_url == url)
+                    .values(variants=variants)
+                )
+                await session.commit()
+            processed += 1
+
+
+async def run_variant_builder():
+    """
+    Фоновая задача: досоздаёт копии изображений после изменений и по расписанию.
+    Запущена в каждом воркере, но проход выполняет только владелец advisory lock,
+    чтобы одни и те же картинки не рендерились и не загружались в S3 N раз.
+    """
+    request_image_variants()
+    while True:
+        try:
+            await asyncio.wait_for(_images_changed.wait(), timeout=IMAGE_VARIANT_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _images_changed.clear()
+
+        try:
+            async with advisory_lock(VARIANT_LOCK) as acquired:
+                if acquired:
+                    processed = await build_missing_variants()
+                    if processed:
+                        print(f"[DEBUG] Созданы копии для {processed} изображений")
+        except Exception as e:
+            print(f"[ERROR] Ошибка при создании копий изображений: {e}")
+            continue
+        if not acquired:
+            # Проход идёт в другом процессе и мог уже выбрать строки без наших изображений
+            await asyncio.sleep(BUSY_RETRY_SECONDS)
+            request_image_variants()
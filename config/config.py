@@ -11,11 +11,78 @@ DB_NAME = os.environ.get("POSTGRESQL_DBNAME")
 DB_USER = os.environ.get("POSTGRESQL_USER")
 DB_PASS = os.environ.get("POSTGRESQL_PASSWORD")
 
+# Пул соединений — на каждый процесс (воркер uvicorn). Если задан DB_MAX_CONNECTIONS,
+# он делится между WEB_CONCURRENCY воркерами и ограничивает pool_size + max_overflow.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+DB_MAX_CONNECTIONS = int(os.environ["DB_MAX_CONNECTIONS"]) if os.environ.get("DB_MAX_CONNECTIONS") else None
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+# asyncpg
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_COMMAND_TIMEOUT = float(os.environ.get("DB_COMMAND_TIMEOUT", "60"))  # сек, 0 — без ограничения
+DB_APPLICATION_NAME = os.environ.get("DB_APPLICATION_NAME", "nursace-api")
+DB_JIT = os.environ.get("DB_JIT", "off")  # JIT Postgres только замедляет короткие OLTP-запросы
+DB_STATEMENT_TIMEOUT = os.environ.get("DB_STATEMENT_TIMEOUT")  # мс, на стороне сервера; не задано — по умолчанию БД
+# Режим PgBouncer (transaction pooling): без подготовленных выражений и своего пула
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+# Реплика только для чтения (каталог, фильтры, фиды, отчёты). Не задана — всё читается с основной БД
+DB_READ_HOST = os.environ.get("POSTGRESQL_READ_HOST")
+DB_READ_PORT = os.environ.get("POSTGRESQL_READ_PORT", DB_PORT)
+DB_READ_CONNECT_TIMEOUT = float(os.environ.get("DB_READ_CONNECT_TIMEOUT", "3"))
+DB_READ_RETRY_SECONDS = int(os.environ.get("DB_READ_RETRY_SECONDS", "30"))  # пауза перед новой попыткой после сбоя реплики
+DB_READ_YOUR_WRITES_SECONDS = int(os.environ.get("DB_READ_YOUR_WRITES_SECONDS", "5"))  # сколько читать с основной БД после изменений
+
+# Учёт запросов к БД
+DB_SLOW_QUERY_MS = int(os.environ.get("DB_SLOW_QUERY_MS", "500"))  # запросы дольше пишутся в лог вместе с маршрутом; 0 — не писать
+DB_STATS_SLOWEST = int(os.environ.get("DB_STATS_SLOWEST", "3"))  # сколько самых медленных запросов показывать в X-DB-Slowest
+DB_STATS_HEADERS = os.getenv("DB_STATS_HEADERS", "false").lower() == "true"  # только для отладки: X-DB-* в ответах
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")  # если задан, /metrics требует Authorization: Bearer <token>
+
+# Профилирование отдельных запросов. Выключено, пока не задан токен или доля выборки
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")  # заголовок X-Profile с этим значением включает профилирование запроса
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))  # доля случайных запросов, 0.001 — каждый тысячный
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))  # как часто снимать стек
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "200"))  # сколько последних профилей хранить
+
 
 S3_ACCESS_KEY = os.environ.get("S3_ACCESS_KEY")
 S3_SECRET_KEY = os.environ.get("S3_SECRET_KEY")
 S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")
 S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME")
+S3_MAX_CONCURRENCY = int(os.environ.get("S3_MAX_CONCURRENCY", "20"))  # одновременных запросов к S3 на воркер
+S3_SHUTDOWN_TIMEOUT = int(os.environ.get("S3_SHUTDOWN_TIMEOUT", "30"))  # сколько ждать незавершённые загрузки при остановке
+S3_MULTIPART_PART_SIZE = int(os.environ.get("S3_MULTIPART_PART_SIZE", str(8 * 1024 * 1024)))
+S3_MULTIPART_CONCURRENCY = int(os.environ.get("S3_MULTIPART_CONCURRENCY", "4"))  # частей одного файла параллельно
+
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", str(25 * 1024 * 1024)))  # максимальный размер загружаемого файла
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", "2"))  # сколько файлов одного запроса обрабатывается (и лежит в памяти) одновременно
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", str(os.cpu_count() or 2)))  # потоков на обработку изображений
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.environ.get("IMAGE_VARIANT_WIDTHS", "160,320,640,1280").split(",") if w.strip()]
+IMAGE_VARIANT_FORMATS = [f.strip() for f in os.environ.get("IMAGE_VARIANT_FORMATS", "webp,avif").split(",") if f.strip()]
+IMAGE_VARIANT_FOLDER = os.environ.get("IMAGE_VARIANT_FOLDER", "nurcase/products/variants")
+IMAGE_VARIANT_INTERVAL = int(os.environ.get("IMAGE_VARIANT_INTERVAL", "600"))  # как часто досоздавать недостающие размеры, сек
+IMAGE_VARIANT_RETRY_SECONDS = int(os.environ.get("IMAGE_VARIANT_RETRY_SECONDS", "3600"))  # через сколько повторять исходник, на котором генерация упала
+
+IMAGE_RESIZE_CACHE = os.environ.get("IMAGE_RESIZE_CACHE", "s3")  # где хранить копии по запросу: s3 или disk
+IMAGE_RESIZE_CACHE_DIR = os.environ.get("IMAGE_RESIZE_CACHE_DIR", "resize_cache")
+IMAGE_RESIZE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_RESIZE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))  # лимит дискового кеша
+IMAGE_RESIZE_FOLDER = os.environ.get("IMAGE_RESIZE_FOLDER", "nurcase/resized")  # папка кеша в S3
+IMAGE_RESIZE_SOURCE_PREFIX = os.environ.get("IMAGE_RESIZE_SOURCE_PREFIX", "nurcase/")  # какие ключи разрешено масштабировать
+IMAGE_RESIZE_MAX_WIDTH = int(os.environ.get("IMAGE_RESIZE_MAX_WIDTH", "2048"))
+IMAGE_RESIZE_WIDTH_STEP = int(os.environ.get("IMAGE_RESIZE_WIDTH_STEP", "20"))  # ширина округляется вверх до шага, чтобы не плодить копии
+IMAGE_RESIZE_MAX_AGE = int(os.environ.get("IMAGE_RESIZE_MAX_AGE", str(30 * 24 * 3600)))
+
+CATALOG_IMPORT_CHUNK_SIZE = int(os.environ.get("CATALOG_IMPORT_CHUNK_SIZE", "1000"))  # строк CSV за один проход
+CATALOG_IMPORT_DIFF_LIMIT = int(os.environ.get("CATALOG_IMPORT_DIFF_LIMIT", "500"))  # сколько изменений показывать в отчёте
+# Поля, общие для всех товаров одного артикула (размеров модели): при изменении у одного
+# товара переносятся на остальные. Кроме колонок Product поддерживается "images".
+ARTICUL_SHARED_FIELDS = [f.strip() for f in os.getenv("ARTICUL_SHARED_FIELDS", "color_id,images").split(",") if f.strip()]
 
 FREEDOM_MERCHANT_ID =  os.environ.get("FREEDOM_MERCHANT_ID")
 FREEDOM_SECRET_KEY =  os.environ.get("FREEDOM_SECRET_KEY")
@@ -29,10 +96,27 @@ SMTP_PORT = os.environ.get("SMTP_PORT")
 SMTP_USER = os.environ.get("SMTP_USER")
 SMTP_PASS = os.environ.get("SMTP_PASS")
 
+EMAIL_DEFAULT_LOCALE = os.environ.get("EMAIL_DEFAULT_LOCALE", "ru")
+
+# Сжатие ответов (gzip, brotli — если установлен пакет brotli)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+
 origins = [origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin]
 
 RABBITMQ_HOST = os.environ.get("RABBITMQ_HOST")
 RABBITMQ_PORT = os.environ.get("RABBITMQ_PORT")
 RABBITMQ_USERNAME = os.environ.get("RABBITMQ_USERNAME")
 RABBITMQ_PASSWORD = os.environ.get("RABBITMQ_PASSWORD")
-RABBITMQ_VHOST = os.environ.get("RABBITMQ_VHOST")
\ No newline at end of file
+RABBITMQ_VHOST = os.environ.get("RABBITMQ_VHOST")
+
+SITE_URL = os.environ.get("SITE_URL", "https://style-shoes.shop")
+
+# Предгенерированные фиды каталога (Facebook, Google Merchant, Яндекс и т.п.)
+FEED_DIR = os.environ.get("FEED_DIR", "feeds_output")
+FEED_CHANNELS = [c.strip() for c in os.getenv("FEED_CHANNELS", "facebook_xml,facebook_csv,google,yandex,jsonl").split(",") if c.strip()]
+FEED_REFRESH_INTERVAL = int(os.environ.get("FEED_REFRESH_INTERVAL", "900"))
+FEED_DEBOUNCE_SECONDS = int(os.environ.get("FEED_DEBOUNCE_SECONDS", "30"))
+FEED_S3_FOLDER = os.environ.get("FEED_S3_FOLDER")  # если не задано — фиды в S3 не выгружаются
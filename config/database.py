@@ -1,27 +1,153 @@
+import asyncio
+import time
+import zlib
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
-from fastapi import Depends
-from sqlalchemy import MetaData
+from uuid import uuid4
+from fastapi import Depends, Request
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy import MetaData, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from .config import DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER
+from sqlalchemy.pool import NullPool
+from .config import (
+    DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER,
+    WEB_CONCURRENCY, DB_MAX_CONNECTIONS, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_ECHO, DB_STATEMENT_CACHE_SIZE, DB_COMMAND_TIMEOUT,
+    DB_APPLICATION_NAME, DB_JIT, DB_STATEMENT_TIMEOUT, DB_PGBOUNCER,
+    DB_READ_HOST, DB_READ_PORT, DB_READ_CONNECT_TIMEOUT, DB_READ_RETRY_SECONDS,
+)
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+READ_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_READ_HOST}:{DB_READ_PORT}/{DB_NAME}" if DB_READ_HOST else None
 # DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@/{DB_NAME}?host={DB_HOST}"
 Base = declarative_base()
 
-engine = create_async_engine(
-    DATABASE_URL, 
-    echo=False,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True
-)
+
+def pool_limits() -> tuple[int, int]:
+    """pool_size и max_overflow на один воркер с учётом общего лимита соединений."""
+    if not DB_MAX_CONNECTIONS:
+        return DB_POOL_SIZE, DB_MAX_OVERFLOW
+    per_worker = max(1, DB_MAX_CONNECTIONS // max(1, WEB_CONCURRENCY))
+    pool_size = min(DB_POOL_SIZE, per_worker)
+    return pool_size, min(DB_MAX_OVERFLOW, per_worker - pool_size)
+
+
+def engine_options() -> dict:
+    connect_args = {"command_timeout": DB_COMMAND_TIMEOUT or None}
+    server_settings = {"application_name": DB_APPLICATION_NAME}
+
+    if DB_PGBOUNCER:
+        # В transaction-режиме соединение с сервером меняется между транзакциями:
+        # кеш подготовленных выражений отключаем, а имена делаем уникальными.
+        # Параметры сервера, кроме application_name, PgBouncer не пропускает.
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+        connect_args["server_settings"] = server_settings
+        return {
+            "echo": DB_ECHO,
+            "poolclass": NullPool,  # пулом соединений управляет PgBouncer
+            "connect_args": connect_args,
+        }
+
+    server_settings["jit"] = DB_JIT
+    if DB_STATEMENT_TIMEOUT:
+        server_settings["statement_timeout"] = DB_STATEMENT_TIMEOUT
+    connect_args["statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+    connect_args["server_settings"] = server_settings
+
+    pool_size, max_overflow = pool_limits()
+    return {
+        "echo": DB_ECHO,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+def engine_url(url: str) -> str:
+    # Кеш подготовленных выражений диалекта SQLAlchemy; для PgBouncer отключается
+    cache_size = 0 if DB_PGBOUNCER else DB_STATEMENT_CACHE_SIZE
+    return f"{url}?prepared_statement_cache_size={cache_size}"
+
+
+engine = create_async_engine(engine_url(DATABASE_URL), **engine_options())
 
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+if READ_DATABASE_URL:
+    read_options = engine_options()
+    # Недоступная реплика не должна подвешивать запрос — быстро уходим на основную БД
+    read_options["connect_args"]["timeout"] = DB_READ_CONNECT_TIMEOUT
+    read_engine = create_async_engine(engine_url(READ_DATABASE_URL), **read_options)
+else:
+    read_engine = engine
+
+read_session_maker = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Время, до которого реплика считается недоступной после ошибки подключения
+_replica_down_until = 0.0
+
+# Кука, которую middleware ставит после изменений: пока она жива, клиент читает с основной БД
+READ_PRIMARY_COOKIE = "read_primary"
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
    async with async_session_maker() as session:
-       yield session
\ No newline at end of file
+       yield session
+
+
+async def _open_read_session() -> AsyncSession:
+    global _replica_down_until
+    if read_engine is engine or time.monotonic() < _replica_down_until:
+        return async_session_maker()
+
+    session = read_session_maker()
+    try:
+        await session.connection()
+    except (OSError, asyncio.TimeoutError, DBAPIError) as e:
+        await session.close()
+        _replica_down_until = time.monotonic() + DB_READ_RETRY_SECONDS
+        print(f"[WARNING] Реплика недоступна, читаем с основной БД: {e}")
+        return async_session_maker()
+    return session
+
+
+@asynccontextmanager
+async def read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Сессия для чтения вне запроса (фоновые задачи): реплика, а при её сбое — основная БД."""
+    session = await _open_read_session()
+    async with session:
+        yield session
+
+
+@asynccontextmanager
+async def advisory_lock(name: str) -> AsyncGenerator[bool, None]:
+    """
+    Блокировка на время фоновой задачи, общая для всех воркеров и экземпляров
+    приложения. Отдаёт False, если её уже держит другой процесс. Блокировка
+    транзакционная, поэтому работает и через PgBouncer в transaction-режиме;
+    соединение из пула занято, пока блок не завершится.
+    """
+    key = zlib.crc32(name.encode("utf-8"))
+    async with engine.connect() as conn:
+        async with conn.begin():
+            result = await conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key})
+            yield bool(result.scalar())
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия только для чтения. Сразу после изменений (read-your-writes) или с
+    заголовком X-Read-Primary запрос читает с основной БД, чтобы не увидеть
+    устаревшие данные из-за задержки репликации.
+    """
+    if READ_PRIMARY_COOKIE in request.cookies or request.headers.get("x-read-primary"):
+        async with async_session_maker() as session:
+            yield session
+        return
+    async with read_session() as session:
+        yield session
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String
 from config.base_class import Base
 from sqlalchemy.orm import relationship
 
@@ -17,10 +17,11 @@ class Discount(Base):
 
 class DiscountProduct(Base):
     __tablename__ = 'discount_products'
+    __table_args__ = (Index('ix_discount_products_discount_id_product_id', 'discount_id', 'product_id'),)
 
     id = Column(Integer, primary_key=True)
     discount_id = Column(Integer, ForeignKey("discounts.id"))
-    product_id = Column(Integer, ForeignKey("products.good_id"))
+    product_id = Column(Integer, ForeignKey("products.good_id"), index=True)
 
     discount = relationship("Discount", back_populates="products")
     product = relationship("Product", back_populates="discounts")
\ No newline at end of file
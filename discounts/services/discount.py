@@ -7,6 +7,7 @@ from catalog.models.products import Product
 from sqlalchemy.orm import selectinload
 from discounts.models import Discount, DiscountProduct
 from discounts.schemas.discount import DiscountCreate, DiscountUpdate
+from feeds.tasks.feed import request_feed_refresh
 
 
 
@@ -76,6 +77,7 @@ class CRUDDiscount:
                 product.retail_price_with_discount = round(discounted_price, 2)
 
         await session.commit()
+        request_feed_refresh()
         await session.refresh(discount)
         return discount
 
@@ -106,6 +108,7 @@ class CRUDDiscount:
         # Удаляем саму скидку
         await session.delete(discount)
         await session.commit()
+        request_feed_refresh()
         return True
 
 class CRUDDiscountProduct:
@@ -158,6 +161,7 @@ class CRUDDiscountProduct:
                 product.retail_price_with_discount = round(discounted_price, 2)
 
         await session.commit()
+        request_feed_refresh()
         return links
 
     @staticmethod
@@ -177,6 +181,7 @@ class CRUDDiscountProduct:
                 product.retail_price_with_discount = product.retail_price
 
         await session.commit()
+        request_feed_refresh()
         return len(product_ids)
     
     @staticmethod
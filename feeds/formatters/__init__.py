@@ -0,0 +1,34 @@
+from .base import FeedFormatter
+from .facebook import FacebookXmlFormatter, FacebookCsvFormatter
+from .google import GoogleMerchantFormatter
+from .yandex import YandexYmlFormatter
+from .jsonl import JsonLinesFormatter
+
+from config.config import FEED_CHANNELS
+
+FORMATTERS = {
+    formatter.name: formatter
+    for formatter in (
+        FacebookXmlFormatter,
+        FacebookCsvFormatter,
+        GoogleMerchantFormatter,
+        YandexYmlFormatter,
+        JsonLinesFormatter,
+    )
+}
+
+
+def enabled_formatters() -> list[FeedFormatter]:
+    return [FORMATTERS[name]() for name in FEED_CHANNELS if name in FORMATTERS]
+
+
+__all__ = [
+    'FeedFormatter',
+    'FacebookXmlFormatter',
+    'FacebookCsvFormatter',
+    'GoogleMerchantFormatter',
+    'YandexYmlFormatter',
+    'JsonLinesFormatter',
+    'FORMATTERS',
+    'enabled_formatters',
+]
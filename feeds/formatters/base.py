@@ -0,0 +1,49 @@
+from xml.sax.saxutils import escape, quoteattr
+
+from config.config import SITE_URL
+from catalog.models import Product
+
+SEX_MAP = {
+    "Мужской": "male",
+    "Женский": "female",
+    "Не определен": "unisex",
+}
+
+
+class FeedFormatter:
+    """
+    Формат фида для одного канала. Фид собирается из заголовка, фрагмента
+    на каждый товар и окончания, поэтому фрагменты можно кешировать и
+    перерисовывать только для изменившихся товаров.
+    """
+
+    name: str = ""
+    filename: str = ""
+    media_type: str = "application/xml"
+
+    async def load(self, session):
+        """Подгружает данные, нужные для заголовка фида (например, категории)."""
+
+    def header(self) -> str:
+        return ""
+
+    def item(self, product: Product) -> str:
+        raise NotImplementedError
+
+    def footer(self) -> str:
+        return ""
+
+
+def product_link(product: Product) -> str:
+    return f"{SITE_URL}/product?good_id={product.good_id}"
+
+
+def product_gender(product: Product) -> str | None:
+    if product.sex:
+        return SEX_MAP.get(product.sex.sex_name)
+    return None
+
+
+def xml_element(tag: str, text, **attrs) -> str:
+    attributes = "".join(f" {key}={quoteattr(str(value))}" for key, value in attrs.items())
+    return f"<{tag}{attributes}>{escape(str(text))}</{tag}>"
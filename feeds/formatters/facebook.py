@@ -0,0 +1,120 @@
+import csv
+import io
+from lxml import etree  # pip install lxml
+
+from config.config import SITE_URL
+from catalog.models import Product
+from feeds.formatters.base import FeedFormatter, product_gender, product_link
+
+# Обязательные поля для Facebook Catalog
+CSV_FIELDNAMES = [
+    "id", "title", "description", "availability", "condition",
+    "price", "link", "image_link", "brand", "google_product_category",
+    "fb_product_category", "quantity_to_sell_on_facebook", "sale_price",
+    "sale_price_effective_date", "item_group_id", "gender", "color",
+    "size", "age_group", "material", "pattern", "shipping",
+    "shipping_weight", "gtin", "video[0].url", "video[0].tag[0]",
+    "product_tags[0]", "product_tags[1]", "style[0]"
+]
+
+
+class FacebookXmlFormatter(FeedFormatter):
+    name = "facebook_xml"
+    filename = "facebook-feed.xml"
+    media_type = "application/xml"
+
+    def header(self) -> str:
+        channel = etree.Element("channel")
+        etree.SubElement(channel, "title").text = "Product Feed"
+        etree.SubElement(channel, "link").text = f"{SITE_URL}/facebook/facebook-feed.xml"
+        etree.SubElement(channel, "description").text = "Product feed for Facebook catalog"
+        fields = "".join(etree.tostring(child, encoding="unicode") + "\n" for child in channel)
+        return f"<?xml version='1.0' encoding='UTF-8'?>\n<rss version=\"2.0\"><channel>{fields}"
+
+    def item(self, product: Product) -> str:
+        item = etree.Element("item")
+        etree.SubElement(item, "id").text = str(product.good_id)
+        etree.SubElement(item, "title").text = product.good_name or ""
+        etree.SubElement(item, "description").text = product.description or ""
+        etree.SubElement(item, "quantity_to_sell_on_facebook").text = str(int(product.warehouse_quantity or 0))
+        etree.SubElement(item, "availability").text = "in stock"
+        etree.SubElement(item, "condition").text = "new"
+        etree.SubElement(item, "price").text = f"{product.retail_price:.2f} KGS"
+        etree.SubElement(item, "sale_price").text = f"{product.retail_price_with_discount:.2f} KGS"
+        etree.SubElement(item, "link").text = product_link(product)
+
+        # Первое изображение
+        if product.images:
+            etree.SubElement(item, "image_link").text = product.images[0].image_url
+
+        # Доп. изображения
+        for img in product.images[1:5]:  # до 5 изображений
+            etree.SubElement(item, "additional_image_link").text = img.image_url
+
+        # Бренд, категория и т.п.
+        if product.manufacturer:
+            etree.SubElement(item, "brand").text = product.manufacturer.manufacturer_name
+
+        if product.color:
+            etree.SubElement(item, "color").text = product.color.color_name
+
+        # Пол
+        gender_value = product_gender(product)
+        if gender_value:  # девочку пропускаем
+            etree.SubElement(item, "gender").text = gender_value
+
+        if product.product_size:
+            etree.SubElement(item, "size").text = str(product.product_size)
+
+        return etree.tostring(item, pretty_print=True, encoding="unicode")
+
+    def footer(self) -> str:
+        return "</channel></rss>\n"
+
+
+class FacebookCsvFormatter(FeedFormatter):
+    name = "facebook_csv"
+    filename = "facebook-feed.csv"
+    media_type = "text/csv"
+
+    def _write(self, write):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=CSV_FIELDNAMES, delimiter="\t")  # табуляция как у FB
+        write(writer)
+        return output.getvalue()
+
+    def header(self) -> str:
+        return self._write(lambda writer: writer.writeheader())
+
+    def item(self, product: Product) -> str:
+        return self._write(lambda writer: writer.writerow({
+            "id": product.good_id,
+            "title": product.good_name or "",
+            "description": product.description or "",
+            "availability": "in stock",
+            "condition": "new",
+            "price": f"{product.retail_price:.2f} KGS" if product.retail_price else "",
+            "link": product_link(product),
+            "image_link": product.images[0].image_url if product.images else "",
+            "brand": product.manufacturer.manufacturer_name if product.manufacturer else "",
+            "google_product_category": "Apparel & Accessories > Shoes",
+            "fb_product_category": "Apparel & Accessories > Shoes",
+            "quantity_to_sell_on_facebook": str(int(product.warehouse_quantity or 0)),
+            "sale_price": f"{product.retail_price_with_discount:.2f} KGS" if product.retail_price_with_discount else "",
+            "sale_price_effective_date": "",   # можно добавить период скидки
+            "item_group_id": "",               # для вариантов по цвету/размеру
+            "gender": product_gender(product) or "",
+            "color": product.color.color_name if product.color else "",
+            "size": str(product.product_size) if product.product_size else "",
+            "age_group": "adult",  # по умолчанию
+            "material": product.material.material_name if product.material else "",
+            "pattern": "",
+            "shipping": "KG:::0 KGS",  # бесплатная доставка по Кыргызстану
+            "shipping_weight": "",
+            "gtin": product.barcode or "",
+            "video[0].url": "",
+            "video[0].tag[0]": "",
+            "product_tags[0]": "",
+            "product_tags[1]": "",
+            "style[0]": "",
+        }))
@@ -0,0 +1,60 @@
+from config.config import SITE_URL
+from catalog.models import Product
+from feeds.formatters.base import FeedFormatter, product_gender, product_link, xml_element
+
+
+class GoogleMerchantFormatter(FeedFormatter):
+    """RSS 2.0 фид для Google Merchant Center (пространство имён g:)."""
+
+    name = "google"
+    filename = "google-feed.xml"
+    media_type = "application/xml"
+
+    def header(self) -> str:
+        return (
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            "<rss version=\"2.0\" xmlns:g=\"http://base.google.com/ns/1.0\"><channel>\n"
+            f"{xml_element('title', 'Style Shoes')}\n"
+            f"{xml_element('link', SITE_URL)}\n"
+            f"{xml_element('description', 'Product feed for Google Merchant Center')}\n"
+        )
+
+    def item(self, product: Product) -> str:
+        fields = [
+            ("g:id", product.good_id),
+            ("g:title", product.good_name or ""),
+            ("g:description", product.description or product.good_name or ""),
+            ("g:link", product_link(product)),
+            ("g:availability", "in_stock" if (product.warehouse_quantity or 0) > 0 else "out_of_stock"),
+            ("g:condition", "new"),
+            ("g:price", f"{product.retail_price or 0:.2f} KGS"),
+        ]
+        if product.retail_price_with_discount and product.retail_price_with_discount < (product.retail_price or 0):
+            fields.append(("g:sale_price", f"{product.retail_price_with_discount:.2f} KGS"))
+        if product.images:
+            fields.append(("g:image_link", product.images[0].image_url))
+            fields.extend(("g:additional_image_link", img.image_url) for img in product.images[1:10])
+        if product.manufacturer:
+            fields.append(("g:brand", product.manufacturer.manufacturer_name))
+        if product.barcode:
+            fields.append(("g:gtin", product.barcode))
+        if product.articul:
+            # Размеры и цвета одной модели объединяются в группу по артикулу
+            fields.append(("g:item_group_id", product.articul))
+        if product.color:
+            fields.append(("g:color", product.color.color_name))
+        if product.material:
+            fields.append(("g:material", product.material.material_name))
+        gender_value = product_gender(product)
+        if gender_value:
+            fields.append(("g:gender", gender_value))
+        if product.product_size:
+            fields.append(("g:size", f"{product.product_size:g}"))
+        fields.append(("g:age_group", "adult"))
+        fields.append(("g:google_product_category", "Apparel & Accessories > Shoes"))
+
+        body = "".join(f"  {xml_element(tag, value)}\n" for tag, value in fields)
+        return f"<item>\n{body}</item>\n"
+
+    def footer(self) -> str:
+        return "</channel></rss>\n"
@@ -0,0 +1,32 @@
+import json
+
+from catalog.models import Product
+from feeds.formatters.base import FeedFormatter, product_gender, product_link
+
+
+class JsonLinesFormatter(FeedFormatter):
+    """Один JSON-объект на строку — для собственных интеграций и выгрузок."""
+
+    name = "jsonl"
+    filename = "catalog.jsonl"
+    media_type = "application/x-ndjson"
+
+    def item(self, product: Product) -> str:
+        return json.dumps({
+            "id": product.good_id,
+            "articul": product.articul,
+            "name": product.good_name,
+            "description": product.description,
+            "price": product.retail_price,
+            "sale_price": product.retail_price_with_discount,
+            "quantity": int(product.warehouse_quantity or 0),
+            "size": product.product_size,
+            "category_id": product.category_id,
+            "brand": product.manufacturer.manufacturer_name if product.manufacturer else None,
+            "color": product.color.color_name if product.color else None,
+            "material": product.material.material_name if product.material else None,
+            "gender": product_gender(product),
+            "barcode": product.barcode,
+            "link": product_link(product),
+            "images": [img.image_url for img in product.images],
+        }, ensure_ascii=False) + "\n"
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from config.config import SITE_URL
+from catalog.models import Category, Product
+from feeds.formatters.base import FeedFormatter, product_link, xml_element
+
+
+class YandexYmlFormatter(FeedFormatter):
+    """Фид в формате YML (Яндекс Маркет / Товары)."""
+
+    name = "yandex"
+    filename = "yandex-feed.xml"
+    media_type = "application/xml"
+
+    def __init__(self):
+        self.categories: list[tuple[int, int | None, str]] = []
+
+    async def load(self, session):
+        result = await session.execute(
+            select(Category.category_id, Category.parent_category_id, Category.category_name)
+            .order_by(Category.category_id)
+        )
+        self.categories = result.all()
+
+    def header(self) -> str:
+        categories = "".join(
+            xml_element("category", name, id=category_id, **({"parentId": parent_id} if parent_id else {})) + "\n"
+            for category_id, parent_id, name in self.categories
+        )
+        return (
+            "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+            f"<yml_catalog date=\"{datetime.utcnow().strftime('%Y-%m-%dT%H:%M')}\"><shop>\n"
+            f"{xml_element('name', 'Style Shoes')}\n"
+            f"{xml_element('company', 'Style Shoes')}\n"
+            f"{xml_element('url', SITE_URL)}\n"
+            "<currencies><currency id=\"KGS\" rate=\"1\"/></currencies>\n"
+            f"<categories>\n{categories}</categories>\n"
+            "<offers>\n"
+        )
+
+    def item(self, product: Product) -> str:
+        price = product.retail_price_with_discount or product.retail_price or 0
+        fields = [
+            xml_element("name", product.good_name or ""),
+            xml_element("url", product_link(product)),
+            xml_element("price", f"{price:.2f}"),
+        ]
+        if product.retail_price and product.retail_price > price:
+            fields.append(xml_element("oldprice", f"{product.retail_price:.2f}"))
+        fields.append(xml_element("currencyId", "KGS"))
+        if product.category_id:
+            fields.append(xml_element("categoryId", product.category_id))
+        fields.extend(xml_element("picture", img.image_url) for img in product.images[:10])
+        if product.manufacturer:
+            fields.append(xml_element("vendor", product.manufacturer.manufacturer_name))
+        if product.articul:
+            fields.append(xml_element("vendorCode", product.articul))
+        if product.description:
+            fields.append(xml_element("description", product.description))
+        if product.barcode:
+            fields.append(xml_element("barcode", product.barcode))
+        fields.append(xml_element("count", int(product.warehouse_quantity or 0)))
+        if product.product_size:
+            fields.append(xml_element("param", f"{product.product_size:g}", name="Размер"))
+        if product.color:
+            fields.append(xml_element("param", product.color.color_name, name="Цвет"))
+        if product.sex:
+            fields.append(xml_element("param", product.sex.sex_name, name="Пол"))
+        if product.material:
+            fields.append(xml_element("param", product.material.material_name, name="Материал"))
+
+        body = "".join(f"  {field}\n" for field in fields)
+        available = "true" if (product.warehouse_quantity or 0) > 0 else "false"
+        return f"<offer id=\"{product.good_id}\" available=\"{available}\">\n{body}</offer>\n"
+
+    def footer(self) -> str:
+        return "</offers>\n</shop></yml_catalog>\n"
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from user.models import User
+from user.auth.fastapi_users_instance import fastapi_users
+from feeds.services.exporter import feed_exporter
+from feeds.services.products import stream_feed
+from feeds.services.responses import artifact_response
+from feeds.tasks.feed import request_feed_refresh
+
+router = APIRouter(prefix="/feeds", tags=["feeds"])
+
+
+def serve_feed(request: Request, filename: str, headers: dict | None = None):
+    formatter = feed_exporter.get_formatter(filename)
+    if not formatter:
+        raise HTTPException(status_code=404, detail="Feed not found")
+
+    if not feed_exporter.artifacts_exist():
+        # Файлы ещё не сгенерированы — запускаем генерацию и пока отдаём фид напрямую из БД
+        request_feed_refresh()
+        return StreamingResponse(stream_feed(formatter), media_type=formatter.media_type, headers=headers)
+    return artifact_response(request, feed_exporter.path(filename), formatter.media_type, headers=headers)
+
+
+@router.get("/")
+async def list_feeds():
+    return [
+        {"channel": f.name, "url": f"/feeds/{f.filename}", "media_type": f.media_type}
+        for f in feed_exporter.formatters
+    ]
+
+@router.get("/{filename}")
+async def get_feed(filename: str, request: Request):
+    return serve_feed(request, filename)
+
+@router.post("/refresh")
+async def refresh_feeds(
+    force: bool = False,
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    result = await feed_exporter.refresh(force=force)
+    if result.get("busy"):
+        raise HTTPException(status_code=409, detail="Фиды уже обновляются в другом процессе")
+    return result
@@ -0,0 +1,237 @@
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime
+
+from config.config import FEED_DIR, FEED_S3_FOLDER
+from config.database import advisory_lock, read_session
+from catalog.models import Product
+from feeds.formatters import FeedFormatter, enabled_formatters
+from feeds.services.products import FEED_CHUNK_SIZE, feed_query, fingerprint_query, references_fingerprint_query
+from middleware.compression import brotli
+from storage.s3 import s3_client
+
+# Меняется при изменении разметки фидов — сбрасывает кеш фрагментов
+FEED_FORMAT_VERSION = 2
+
+FRAGMENTS_FILE = "feed-fragments.json"
+# Время (time.time()) начала последней сверки каталога любым процессом
+CHECKED_FILE = "feed-checked"
+
+# Одна перегенерация на все воркеры и экземпляры приложения
+REFRESH_LOCK = "feeds:refresh"
+
+
+def _temp_file(path: str, mode: str = "wb"):
+    # Уникальное имя рядом с целевым файлом: os.replace атомарен только в пределах
+    # одной файловой системы, а разные процессы не должны писать в один временный файл
+    return tempfile.NamedTemporaryFile(
+        mode, dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp", delete=False,
+    )
+
+
+def _publish(tmp_path: str, path: str):
+    os.chmod(tmp_path, 0o644)  # NamedTemporaryFile создаёт файл с правами 0600
+    os.replace(tmp_path, path)
+
+
+def _write_artifact(path: str, header: str, fragments, footer: str):
+    # Пишем во временные файлы и атомарно подменяем, чтобы читатели
+    # никогда не видели недописанный фид. Рядом кладём предсжатые .gz/.br копии.
+    compressor = brotli.Compressor(quality=9) if brotli is not None else None
+    targets = [path, f"{path}.gz"] + ([f"{path}.br"] if compressor else [])
+    tmp_files = []
+    try:
+        with ExitStack() as stack:
+            for target in targets:
+                tmp_files.append(stack.enter_context(_temp_file(target)))
+            plain, packed_raw = tmp_files[0], tmp_files[1]
+            packed = stack.enter_context(gzip.GzipFile(filename="", mode="wb", compresslevel=9, fileobj=packed_raw))
+            for chunk in (header, *fragments, footer):
+                data = chunk.encode("utf-8")
+                plain.write(data)
+                packed.write(data)
+                if compressor:
+                    tmp_files[2].write(compressor.process(data))
+            if compressor:
+                tmp_files[2].write(compressor.finish())
+    except BaseException:
+        for tmp in tmp_files:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+        raise
+
+    # Несжатый файл подменяем последним: по нему проверяется наличие фида
+    for tmp, target in reversed(list(zip(tmp_files, targets))):
+        _publish(tmp.name, target)
+
+
+class FeedExporter:
+    """
+    Выгружает фиды всех включённых каналов за один проход по каталогу.
+
+    На каждый товар хранится хеш его полей и готовые фрагменты для каждого
+    формата; при обновлении из БД загружаются и перерисовываются только
+    товары с изменившимся хешем, а файлы собираются из кеша фрагментов.
+    """
+
+    def __init__(self, formatters: list[FeedFormatter], feed_dir: str = FEED_DIR):
+        self.formatters = formatters
+        self.feed_dir = feed_dir
+        self.fragments: dict[int, list] = {}  # good_id -> [fingerprint, {формат: фрагмент}]
+        self.references: str | None = None  # хеш справочников из заголовков фидов
+        self.generated_at: datetime | None = None
+        self._lock = asyncio.Lock()
+        self._fragments_mtime = None  # mtime файла кеша, из которого загружены fragments
+
+    def get_formatter(self, filename: str) -> FeedFormatter | None:
+        return next((f for f in self.formatters if f.filename == filename), None)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.feed_dir, name)
+
+    def artifacts_exist(self) -> bool:
+        return all(os.path.exists(self.path(f.filename)) for f in self.formatters)
+
+    def _is_fresh(self, good_id: int, fingerprint: str) -> bool:
+        cached = self.fragments.get(good_id)
+        return (
+            cached is not None
+            and cached[0] == fingerprint
+            and all(f.name in cached[1] for f in self.formatters)
+        )
+
+    def _load_fragments(self):
+        # Кеш общий для воркеров: перечитываем, если его обновил другой процесс
+        try:
+            mtime = os.stat(self.path(FRAGMENTS_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._fragments_mtime:
+            return
+        self._fragments_mtime = mtime
+        try:
+            with open(self.path(FRAGMENTS_FILE), encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") != FEED_FORMAT_VERSION:
+            return
+        self.fragments = {int(good_id): item for good_id, item in data["items"].items()}
+        self.references = data.get("references")
+
+    def _save_fragments(self):
+        path = self.path(FRAGMENTS_FILE)
+        with _temp_file(path, "w") as f:
+            json.dump(
+                {"version": FEED_FORMAT_VERSION, "references": self.references, "items": self.fragments},
+                f, ensure_ascii=False,
+            )
+        _publish(f.name, path)
+        self._fragments_mtime = os.stat(path).st_mtime_ns
+
+    def _last_checked(self) -> float:
+        try:
+            with open(self.path(CHECKED_FILE), encoding="utf-8") as f:
+                return float(f.read())
+        except (FileNotFoundError, ValueError):
+            return 0.0
+
+    def _mark_checked(self, checked_at: float):
+        path = self.path(CHECKED_FILE)
+        with _temp_file(path, "w") as f:
+            f.write(repr(checked_at))
+        _publish(f.name, path)
+
+    async def refresh(self, force: bool = False, checked_after: float | None = None) -> dict:
+        """
+        Обновляет фиды. Пишет только один процесс: если обновление уже идёт
+        в другом воркере, возвращает {"busy": True} и ничего не делает.
+        С checked_after сверка с каталогом пропускается ({"skipped": True}),
+        если какой-то процесс уже сверял его после этого момента.
+        """
+        async with self._lock, advisory_lock(REFRESH_LOCK) as acquired:
+            if not acquired:
+                return {"busy": True}
+            return await self._refresh(force, checked_after)
+
+    async def _refresh(self, force: bool, checked_after: float | None) -> dict:
+        os.makedirs(self.feed_dir, exist_ok=True)
+        if checked_after is not None and not force and self.artifacts_exist():
+            if await asyncio.to_thread(self._last_checked) >= checked_after:
+                return {"skipped": True}
+        await asyncio.to_thread(self._load_fragments)
+        checked_at = time.time()
+
+        async with read_session() as session:
+            result = await session.execute(fingerprint_query())
+            current = result.all()
+
+            order = [good_id for good_id, _ in current]
+            changed = [
+                good_id for good_id, fingerprint in current
+                if not self._is_fresh(good_id, fingerprint)
+            ]
+            fingerprints = dict(current)
+            removed = set(self.fragments) - set(order)
+            references = await session.scalar(references_fingerprint_query())
+            references_changed = references != self.references
+
+            if not (changed or removed or references_changed or force) and self.artifacts_exist():
+                await asyncio.to_thread(self._mark_checked, checked_at)
+                return {"changed": 0, "removed": 0, "total": len(order)}
+
+            for formatter in self.formatters:
+                await formatter.load(session)
+
+            # Загружаем изменившиеся товары один раз и рисуем их сразу во всех форматах
+            for i in range(0, len(changed), FEED_CHUNK_SIZE):
+                chunk = changed[i:i + FEED_CHUNK_SIZE]
+                products = await session.scalars(feed_query().where(Product.good_id.in_(chunk)))
+                for product in products:
+                    self.fragments[product.good_id] = [
+                        fingerprints[product.good_id],
+                        {f.name: f.item(product) for f in self.formatters},
+                    ]
+
+        for good_id in removed:
+            self.fragments.pop(good_id, None)
+        self.references = references
+        order = [good_id for good_id in order if good_id in self.fragments]
+
+        for formatter in self.formatters:
+            await asyncio.to_thread(
+                _write_artifact,
+                self.path(formatter.filename),
+                formatter.header(),
+                (self.fragments[good_id][1][formatter.name] for good_id in order),
+                formatter.footer(),
+            )
+        await asyncio.to_thread(self._save_fragments)
+        await asyncio.to_thread(self._mark_checked, checked_at)
+        self.generated_at = datetime.utcnow()
+
+        if FEED_S3_FOLDER:
+            await self._upload_to_s3()
+
+        print(f"[FEED] Фиды обновлены: изменено {len(changed)}, удалено {len(removed)}, всего {len(order)}")
+        return {"changed": len(changed), "removed": len(removed), "total": len(order)}
+
+    async def _upload_to_s3(self):
+        # upload_file удаляет исходный файл, поэтому выгружаем копии
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            for formatter in self.formatters:
+                copy_path = os.path.join(tmp_dir, formatter.filename)
+                await asyncio.to_thread(shutil.copyfile, self.path(formatter.filename), copy_path)
+                await s3_client.upload_file(copy_path, folder=FEED_S3_FOLDER)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+feed_exporter = FeedExporter(enabled_formatters())
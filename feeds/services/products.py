@@ -0,0 +1,108 @@
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import selectinload
+
+from config.database import read_session
+from catalog.models import Category, Product, ProductImage, Manufacturer, Color, Sex, Material
+
+# Сколько товаров читаем из БД за один проход курсора
+FEED_CHUNK_SIZE = 500
+
+
+def feed_conditions():
+    return (Product.display == 1, Product.images.any())
+
+
+def feed_query():
+    # Подгружаем только те связи, которые используются форматами фидов
+    return (
+        select(Product)
+        .where(*feed_conditions())
+        .order_by(Product.good_id)
+        .options(
+            selectinload(Product.manufacturer),
+            selectinload(Product.images),
+            selectinload(Product.color),
+            selectinload(Product.sex),
+            selectinload(Product.material),
+        )
+        .execution_options(yield_per=FEED_CHUNK_SIZE)
+    )
+
+
+def fingerprint_query():
+    """
+    Лёгкий запрос по всему фиду: good_id и хеш всех полей, которые попадают в фиды.
+    По хешу понимаем, какие товары изменились и требуют перегенерации. Названия
+    бренда, цвета, пола и материала входят в хеш, поэтому переименование в
+    справочнике перерисовывает товары, где оно выводится.
+    """
+    images = (
+        select(func.string_agg(
+            ProductImage.image_url,
+            aggregate_order_by(literal_column("' '"), ProductImage.image_id),
+        ))
+        .where(ProductImage.good_id == Product.good_id)
+        .scalar_subquery()
+    )
+    fingerprint = func.md5(func.concat_ws(
+        "|",
+        Product.good_name,
+        Product.description,
+        Product.articul,
+        Product.category_id,
+        Product.warehouse_quantity,
+        Product.retail_price,
+        Product.retail_price_with_discount,
+        Product.product_size,
+        Product.barcode,
+        Manufacturer.manufacturer_name,
+        Color.color_name,
+        Sex.sex_name,
+        Material.material_name,
+        images,
+    ))
+    return (
+        select(Product.good_id, fingerprint)
+        .outerjoin(Manufacturer, Manufacturer.manufacturer_id == Product.manufacturer_id)
+        .outerjoin(Color, Color.color_id == Product.color_id)
+        .outerjoin(Sex, Sex.sex_id == Product.sex_id)
+        .outerjoin(Material, Material.material_id == Product.material_id)
+        .where(*feed_conditions())
+        .order_by(Product.good_id)
+    )
+
+
+def references_fingerprint_query():
+    """
+    Хеш справочников, которые выводятся не в товарах, а в заголовках фидов
+    (дерево категорий Яндекса): при его изменении файлы собираются заново.
+    """
+    row = func.concat_ws("|", Category.category_id, Category.parent_category_id, Category.category_name)
+    return select(func.md5(func.coalesce(
+        func.string_agg(row, aggregate_order_by(literal_column("'\\n'"), Category.category_id)), "",
+    )))
+
+
+async def stream_feed_products(session):
+    """Отдаёт товары фида по одному, читая их из БД серверным курсором пачками."""
+    result = await session.stream_scalars(feed_query())
+    async for product in result:
+        yield product
+
+
+async def stream_feed(formatter, flush_size: int = 64 * 1024):
+    """Отдаёт фид одного канала кусками напрямую из БД, не держа его целиком в памяти."""
+    async with read_session() as session:
+        await formatter.load(session)
+        parts = [formatter.header()]
+        size = len(parts[0])
+        async for product in stream_feed_products(session):
+            fragment = formatter.item(product)
+            parts.append(fragment)
+            size += len(fragment)
+            if size >= flush_size:
+                yield "".join(parts).encode("utf-8")
+                parts, size = [], 0
+        parts.append(formatter.footer())
+        yield "".join(parts).encode("utf-8")
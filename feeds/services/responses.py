@@ -0,0 +1,51 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from middleware.compression import negotiate_encoding
+
+PRECOMPRESSED_SUFFIXES = {"br": "br", "gzip": "gz"}
+
+
+def artifact_response(request: Request, path: str, media_type: str, headers: dict | None = None):
+    """Отдаёт готовый файл фида с ETag/Last-Modified и предсжатой (br/gzip) версией, если клиент её принимает."""
+    stat = os.stat(path)
+    version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    etag = f'"{version}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    response_headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": "public, max-age=300",
+        "Vary": "Accept-Encoding",
+        **(headers or {}),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    not_modified = False
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        variants = {etag, *(f'"{version}-{suffix}"' for suffix in PRECOMPRESSED_SUFFIXES.values())}
+        not_modified = "*" in tags or bool(variants.intersection(tags))
+    elif if_modified_since:
+        try:
+            not_modified = int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            pass
+    if not_modified:
+        return Response(status_code=304, headers=response_headers)
+
+    # Отдаём предсжатую копию, если клиент её принимает — middleware сжатия её не трогает
+    precompressed = [
+        encoding for encoding in ("br", "gzip")
+        if os.path.exists(f"{path}.{PRECOMPRESSED_SUFFIXES[encoding]}")
+    ]
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), precompressed)
+    if encoding:
+        suffix = PRECOMPRESSED_SUFFIXES[encoding]
+        response_headers["Content-Encoding"] = encoding
+        response_headers["ETag"] = f'"{version}-{suffix}"'
+        return FileResponse(f"{path}.{suffix}", media_type=media_type, headers=response_headers)
+    return FileResponse(path, media_type=media_type, headers=response_headers)
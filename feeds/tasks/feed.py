@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from config.config import FEED_REFRESH_INTERVAL, FEED_DEBOUNCE_SECONDS
+from feeds.services.exporter import feed_exporter
+
+_catalog_changed = asyncio.Event()
+# Когда (time.time()) этот процесс увидел первое ещё не выгруженное изменение каталога
+_changed_at: float | None = None
+
+
+def request_feed_refresh(changed_at: float | None = None):
+    """Помечает фиды устаревшими после изменения каталога."""
+    global _changed_at
+    changed_at = changed_at or time.time()
+    if _changed_at is None or changed_at < _changed_at:
+        _changed_at = changed_at
+    _catalog_changed.set()
+
+
+async def run_feed_refresher():
+    """
+    Фоновая задача: обновляет фиды по расписанию или вскоре после изменения
+    каталога. Несколько изменений подряд объединяются в одну перегенерацию.
+
+    Задача запущена в каждом воркере, но сверяет каталог и пишет файлы один
+    процесс (advisory lock в FeedExporter.refresh). Остальные пропускают проход,
+    если каталог уже сверили после их изменения или, для планового прохода,
+    в течение последней половины интервала.
+    """
+    global _changed_at
+    if not feed_exporter.artifacts_exist():
+        request_feed_refresh()
+
+    while True:
+        try:
+            await asyncio.wait_for(_catalog_changed.wait(), timeout=FEED_REFRESH_INTERVAL)
+            await asyncio.sleep(FEED_DEBOUNCE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        changed_at, _changed_at = _changed_at, None
+        _catalog_changed.clear()
+
+        checked_after = changed_at if changed_at is not None else time.time() - FEED_REFRESH_INTERVAL / 2
+        try:
+            result = await feed_exporter.refresh(checked_after=checked_after)
+        except Exception as e:
+            print(f"[ERROR] Ошибка при обновлении фидов: {e}")
+            continue
+        if result.get("busy") and changed_at is not None:
+            # Другой процесс уже обновляет фиды и мог начать сверку до нашего изменения — повторим после паузы
+            request_feed_refresh(changed_at)
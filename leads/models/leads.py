@@ -10,7 +10,7 @@ class Lead(Base):
     full_name = Column(String(255), nullable=False)
     phone_number = Column(String(20), nullable=False)
     comment = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Связь со статусами
     status_id = Column(Integer, ForeignKey("lead_statuses.id"), nullable=True)
@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -13,12 +15,44 @@ from notification.router.router import router as notification
 from report.routers.routers import routers as report
 from leads.routers.router import router as leads
 from facebook.router import router as facebook
+from feeds.router import router as feeds
 from discounts.routers.routers import routers as discounts
 from outlet.routers.routers import routers as outlets
+from monitoring.router import router as monitoring
+
+from feeds.tasks.feed import run_feed_refresher
+from catalog.tasks.image_variants import run_variant_builder
+from middleware.compression import CompressionMiddleware
+from middleware.read_your_writes import ReadYourWritesMiddleware
+from middleware.query_stats import QueryStatsMiddleware
+from middleware.metrics import HTTPMetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from monitoring.queries import instrument_engine
+from monitoring.http import register_pool
+from config.database import engine, read_engine
+from storage.s3 import s3_client
+from storage.images import shutdown_image_executor
+from config.config import (
+    origins, COMPRESSION_ENABLED, COMPRESSION_MINIMUM_SIZE,
+    COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY, S3_SHUTDOWN_TIMEOUT,
+    DB_READ_YOUR_WRITES_SECONDS, DB_STATS_HEADERS,
+    PROFILE_TOKEN, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await s3_client.start()
+    feed_refresher = asyncio.create_task(run_feed_refresher())
+    variant_builder = asyncio.create_task(run_variant_builder())
+    yield
+    feed_refresher.cancel()
+    variant_builder.cancel()
+    shutdown_image_executor()
+    await s3_client.close(timeout=S3_SHUTDOWN_TIMEOUT)
 
-from config.config import origins
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +62,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Куку read-your-writes ставим только когда чтения действительно идут с реплики
+if read_engine is not engine:
+    app.add_middleware(ReadYourWritesMiddleware, max_age=DB_READ_YOUR_WRITES_SECONDS)
+
+instrument_engine(engine)
+register_pool("primary", engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
+    register_pool("replica", read_engine)
+app.add_middleware(QueryStatsMiddleware, headers=DB_STATS_HEADERS)
+if PROFILE_TOKEN or PROFILE_SAMPLE_RATE:
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=PROFILE_TOKEN,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        interval=PROFILE_INTERVAL_MS / 1000,
+    )
+# Добавляется последним, чтобы время ответа включало остальные middleware
+app.add_middleware(HTTPMetricsMiddleware)
+
 @app.get("/")
 async def read_root():
     return {"message": "Hello, World! "}
@@ -44,5 +106,7 @@ app.include_router(notification)
 app.include_router(report)
 app.include_router(leads)
 app.include_router(facebook)
+app.include_router(feeds)
 app.include_router(discounts)
 app.include_router(outlets)
+app.include_router(monitoring)
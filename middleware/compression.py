@@ -0,0 +1,113 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # pip install brotli
+except ImportError:  # brotli не обязателен — без него работает только gzip
+    brotli = None
+
+# Уже сжатые или потоковые типы — повторно не сжимаем
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+)
+
+
+def available_encodings() -> list[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str, available: list[str]) -> str | None:
+    """Выбирает кодировку из Accept-Encoding с учётом q-значений; при равенстве — по порядку `available`."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _ExcludedTypesMixin:
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            await super().send_with_compression(message)
+            self.content_type_is_excluded = content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            return
+        await super().send_with_compression(message)
+
+
+class _GZipResponder(_ExcludedTypesMixin, GZipResponder):
+    pass
+
+
+class _BrotliResponder(_ExcludedTypesMixin, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        # В потоковых ответах сбрасываем буфер после каждого куска, чтобы клиент не ждал
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы brotli или gzip в зависимости от Accept-Encoding клиента.
+    Маленькие ответы (меньше `minimum_size`) и ответы, у которых уже выставлен
+    Content-Encoding (например, предсжатые файлы фидов), отдаются как есть.
+    Потоковые ответы сжимаются по мере отправки.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding == "br":
+            responder = _BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif encoding == "gzip":
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        await responder(scope, receive, send)
@@ -0,0 +1,40 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monitoring.http import HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS, HTTP_RESPONSES
+from monitoring.queries import route_name
+
+
+class HTTPMetricsMiddleware:
+    """
+    Время ответа по маршрутам, коды ответов и число запросов в обработке.
+    Время считается до отправки последнего куска тела, включая потоковые ответы.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            method, route = scope["method"], route_name(scope)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method, route)
+            HTTP_RESPONSES.inc(method, route, str(status))
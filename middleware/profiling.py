@@ -0,0 +1,68 @@
+import asyncio
+import hmac
+import random
+import time
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monitoring.profiler import PROFILE_ID_RE, StackSampler, profile_meta, profile_store
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос, если в нём есть заголовок X-Profile с секретом `token`
+    или он попал в случайную выборку `sample_rate`. Профиль сохраняется под
+    новым id (возвращается в заголовке X-Profile-Id); X-Request-ID клиента
+    только записывается в метаданные — иначе чужой id мог бы перезаписать профиль.
+    """
+
+    def __init__(self, app: ASGIApp, token: str | None = None, sample_rate: float = 0.0, interval: float = 0.005):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+
+    def _should_profile(self, headers: Headers) -> bool:
+        requested = headers.get("x-profile")
+        if requested and self.token and hmac.compare_digest(requested, self.token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not self._should_profile(headers):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = headers.get("x-request-id", "")
+        profile_id = uuid4().hex
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        sampler = StackSampler(asyncio.current_task(), self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            # join потока выборки — не в event loop
+            await asyncio.to_thread(sampler.stop)
+            try:
+                meta = profile_meta(profile_id, scope, status, duration, sampler)
+                if PROFILE_ID_RE.match(request_id):
+                    meta["request_id"] = request_id
+                await asyncio.to_thread(profile_store.save, profile_id, meta, sampler.collapsed())
+            except Exception as e:
+                print(f"[ERROR] Не удалось сохранить профиль {profile_id}: {e}")
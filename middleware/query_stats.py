@@ -0,0 +1,45 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monitoring.queries import short_statement, start_query_stats, stop_query_stats
+
+
+class QueryStatsMiddleware:
+    """
+    Считает запросы к БД для каждого HTTP-запроса и пишет их в метрики.
+    С `headers=True` (только для отладки) добавляет в ответ X-DB-Queries,
+    X-DB-Time, X-DB-Slowest и Server-Timing.
+    """
+
+    def __init__(self, app: ASGIApp, headers: bool = False):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_query_stats(scope)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and self.headers:
+                headers = MutableHeaders(scope=message)
+                db_ms = stats.seconds * 1000
+                headers.append("X-DB-Queries", str(stats.count))
+                headers.append("X-DB-Time", f"{db_ms:.1f}")
+                headers.append("Server-Timing", f"db;dur={db_ms:.1f};desc=\"{stats.count} queries\"")
+                if stats.slowest:
+                    slowest = " | ".join(
+                        f"{seconds * 1000:.1f}ms {short_statement(statement, 120)}"
+                        for seconds, statement in stats.slowest
+                    )
+                    # Значения заголовков — только latin-1
+                    headers.append("X-DB-Slowest", slowest.encode("ascii", "replace").decode())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_query_stats(token)
+            stats.observe()
@@ -0,0 +1,33 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.database import READ_PRIMARY_COOKIE
+
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReadYourWritesMiddleware:
+    """
+    После успешного изменяющего запроса ставит короткоживущую куку, по которой
+    get_read_session ещё несколько секунд направляет чтения клиента на основную БД.
+    """
+
+    def __init__(self, app: ASGIApp, max_age: int = 5):
+        self.app = app
+        self.max_age = max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie",
+                    f"{READ_PRIMARY_COOKIE}=1; Max-Age={self.max_age}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
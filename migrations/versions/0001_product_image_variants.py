@@ -0,0 +1,23 @@
+"""Уменьшенные копии изображений товаров: колонка product_images.variants
+
+Схема до этой миграции создавалась по моделям. Колонка добавляется, только
+если её ещё нет, поэтому миграция безопасна для уже обновлённой БД.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE product_images ADD COLUMN IF NOT EXISTS variants JSONB")
+
+
+def downgrade():
+    op.execute("ALTER TABLE product_images DROP COLUMN IF EXISTS variants")
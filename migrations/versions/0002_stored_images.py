@@ -0,0 +1,36 @@
+"""Таблица stored_images: загруженные изображения по хешу содержимого
+
+Таблица создаётся, только если её ещё нет, поэтому миграция безопасна
+для БД, созданной по моделям.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stored_images (
+            id SERIAL PRIMARY KEY,
+            content_hash VARCHAR(64) NOT NULL,
+            kind VARCHAR(30) NOT NULL,
+            url VARCHAR(500) NOT NULL,
+            size INTEGER,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT uq_stored_images_hash_kind UNIQUE (content_hash, kind)
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_stored_images_id ON stored_images (id)")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS stored_images")
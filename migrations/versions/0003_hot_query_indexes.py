@@ -0,0 +1,72 @@
+"""Индексы под горячие запросы каталога, заказов, отчётов и кодов подтверждения
+
+Индексы строятся CONCURRENTLY, без блокировки записи в таблицы. Если сборку
+прервать, в БД остаётся индекс со статусом INVALID — его нужно удалить
+(DROP INDEX CONCURRENTLY ...) и запустить миграцию снова.
+
+Проверка планов: python -m benchmarks.explain_check
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки, условие частичного индекса)
+INDEXES = [
+    # Витрина /products/v3: row_number() over (partition by articul order by цена, good_id)
+    # по товарам в наличии — индекс отдаёт строки уже в порядке окна
+    ("ix_products_storefront", "products", ["articul", "retail_price_with_discount", "good_id"],
+     "display = 1 AND warehouse_quantity > 0"),
+    # Фильтры и справочники: товары в наличии по категории
+    ("ix_products_in_stock_category", "products", ["category_id"], "warehouse_quantity > 0"),
+    # Другие размеры и цвета артикула, расширение акций на весь артикул
+    ("ix_products_articul", "products", ["articul"], None),
+    # EXISTS по изображениям и selectinload(Product.images)
+    ("ix_product_images_good_id", "product_images", ["good_id"], None),
+    # Product.discounts.any() / Product.outlets.any() и управление составом акций и аутлетов
+    ("ix_discount_products_product_id", "discount_products", ["product_id"], None),
+    ("ix_discount_products_discount_id_product_id", "discount_products", ["discount_id", "product_id"], None),
+    ("ix_outlet_products_product_id", "outlet_products", ["product_id"], None),
+    ("ix_outlet_products_outlet_id_product_id", "outlet_products", ["outlet_id", "product_id"], None),
+    # Отчёты: status_id = 2 AND created_at BETWEEN ...
+    ("ix_orders_status_id_created_at", "orders", ["status_id", "created_at"], None),
+    ("ix_order_items_order_id", "order_items", ["order_id"], None),
+    # Последние данные доставки: WHERE user_id = ... ORDER BY created_at DESC LIMIT 1
+    ("ix_order_infos_user_id_created_at", "order_infos", ["user_id", "created_at"], None),
+    # Последний код: WHERE email = ... ORDER BY created_at DESC; заменяет ix_verification_codes_email
+    ("ix_verification_codes_email_created_at", "verification_codes", ["email", "created_at"], None),
+    # Отчёт по лидам за период
+    ("ix_leads_created_at", "leads", ["created_at"], None),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.drop_index(
+            "ix_verification_codes_email", table_name="verification_codes",
+            postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_verification_codes_email", "verification_codes", ["email"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
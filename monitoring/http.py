@@ -0,0 +1,40 @@
+from monitoring.metrics import Counter, Gauge, Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_RESPONSES = Counter("http_responses_total", "HTTP responses by status code", ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being processed")
+HTTP_IN_FLIGHT.set(value=0)
+
+_pools = {}  # имя -> движок
+
+
+def _pool_values(attribute: str):
+    for name, engine in _pools.items():
+        pool = getattr(engine, "sync_engine", engine).pool
+        # У NullPool (режим PgBouncer) счётчиков нет
+        if not hasattr(pool, "checkedout"):
+            continue
+        if attribute == "overflow":
+            # overflow() отрицателен, пока пул не заполнен до pool_size
+            yield (name,), max(0, pool.overflow())
+        else:
+            yield (name,), getattr(pool, attribute)()
+
+
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool_size", ("pool",), collect=lambda: _pool_values("size"))
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently in use", ("pool",), collect=lambda: _pool_values("checkedout"),
+)
+DB_POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in", "Idle connections in the pool", ("pool",), collect=lambda: _pool_values("checkedin"),
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened above pool_size", ("pool",), collect=lambda: _pool_values("overflow"),
+)
+
+
+def register_pool(name: str, engine):
+    _pools[name] = engine
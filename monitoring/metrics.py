@@ -0,0 +1,114 @@
+from bisect import bisect_left
+
+# Метрики в памяти процесса в текстовом формате Prometheus. Каждый воркер uvicorn
+# считает свои значения — при нескольких воркерах Prometheus должен опрашивать каждый.
+REGISTRY = []
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        REGISTRY.append(self)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, self.labelnames, labels, value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labelnames, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Значение задаётся явно или вычисляется при каждом чтении через `collect`."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def set(self, *labels, value: float):
+        self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def samples(self):
+        if self.collect is not None:
+            self._values = dict(self.collect())
+        yield from super().samples()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            # счётчики по корзинам (не накопительные), сумма, количество
+            state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self):
+        labelnames = self.labelnames + ("le",)
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labelnames, labels + (_format_value(bound),), cumulative
+            yield f"{self.name}_bucket", labelnames, labels + ("+Inf",), count
+            yield f"{self.name}_sum", self.labelnames, labels, total
+            yield f"{self.name}_count", self.labelnames, labels, count
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from config.config import PROFILE_DIR, PROFILE_KEEP
+
+PROFILE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename
+    if "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[-1]
+    elif path.startswith(os.getcwd()):
+        path = os.path.relpath(path)
+    # В свёрнутом формате ';' разделяет кадры
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _thread_stack(frame) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _coroutine_stack(task) -> list[str]:
+    # Приостановленная задача: идём по цепочке await от внешней корутины к внутренней
+    stack = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return stack
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик одной asyncio-задачи. Отдельный поток каждые
+    `interval` секунд снимает стек: если задача сейчас выполняется — стек потока
+    event loop, если ждёт (БД, S3) — цепочку её await с листом [awaiting].
+    Выборки других запросов, идущих в том же цикле, не попадают в профиль.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.task = task
+        self.loop = task.get_loop()
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                # Стек мог измениться прямо во время обхода — пропускаем выборку
+                continue
+
+    def _sample(self):
+        if self.task.done():
+            return
+        if asyncio.current_task(self.loop) is self.task:
+            stack = _thread_stack(sys._current_frames().get(self.thread_id))
+        else:
+            stack = _coroutine_stack(self.task) + ["[awaiting]"]
+        if stack:
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Свёрнутые стеки (flamegraph.pl, speedscope): «кадр;кадр;кадр количество»."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Профили на диске, общие для всех воркеров. Хранятся последние `keep` штук."""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, profile_id: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{ext}")
+
+    def save(self, profile_id: str, meta: dict, collapsed: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile_id, "collapsed"), "w", encoding="utf-8") as f:
+            f.write(collapsed)
+        with open(self._path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self._evict()
+
+    def _evict(self):
+        metas = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in metas[:max(0, len(metas) - self.keep)]:
+            profile_id = entry.name[:-len(".json")]
+            for ext in ("json", "collapsed"):
+                try:
+                    os.remove(self._path(profile_id, ext))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> list[dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        metas = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    metas.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(metas, key=lambda meta: meta["created_at"], reverse=True)
+
+    def get(self, profile_id: str) -> str | None:
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, "collapsed"), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+def profile_meta(profile_id: str, scope, status: int, duration: float, sampler: StackSampler) -> dict:
+    return {
+        "id": profile_id,
+        "method": scope["method"],
+        "path": scope["path"],
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "duration_ms": round(duration * 1000, 1),
+        "samples": sampler.samples,
+        "interval_ms": sampler.interval * 1000,
+        "created_at": time.time(),
+    }
+
+
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
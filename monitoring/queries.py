@@ -0,0 +1,110 @@
+import re
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from config.config import DB_SLOW_QUERY_MS, DB_STATS_SLOWEST
+from monitoring.metrics import Counter, Histogram
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ("route",))
+DB_QUERY_SECONDS = Counter("db_query_seconds_total", "Time spent in SQL statements", ("route",))
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than DB_SLOW_QUERY_MS", ("route",))
+# Много запросов на один HTTP-запрос — признак N+1
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements per HTTP request", ("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_seconds_per_request", "Time spent in SQL per HTTP request", ("route",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+def route_name(scope) -> str:
+    """Шаблон маршрута (/products/{product_id}), а не сам путь — чтобы не плодить метки."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def short_statement(statement: str, limit: int = 200) -> str:
+    statement = re.sub(r"\s+", " ", statement).strip()
+    return statement if len(statement) <= limit else f"{statement[:limit]}…"
+
+
+class QueryStats:
+    """Запросы к БД в рамках одного HTTP-запроса."""
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest: list[tuple[float, str]] = []
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "background"
+        return route_name(self.scope)
+
+    def add(self, seconds: float, statement: str):
+        self.count += 1
+        self.seconds += seconds
+        if len(self.slowest) < DB_STATS_SLOWEST or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[DB_STATS_SLOWEST:]
+
+    def observe(self):
+        route = self.route
+        DB_QUERIES_PER_REQUEST.observe(self.count, route)
+        DB_SECONDS_PER_REQUEST.observe(self.seconds, route)
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats(scope) -> tuple[QueryStats, object]:
+    stats = QueryStats(scope)
+    return stats, _current_stats.set(stats)
+
+
+def stop_query_stats(token):
+    _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    route = stats.route if stats is not None else "background"
+
+    DB_QUERIES.inc(route)
+    DB_QUERY_SECONDS.inc(route, amount=seconds)
+    if stats is not None:
+        stats.add(seconds, statement)
+
+    if DB_SLOW_QUERY_MS and seconds * 1000 >= DB_SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.inc(route)
+        method = stats.scope["method"] if stats is not None and stats.scope else ""
+        print(f"[WARNING] Медленный запрос {seconds * 1000:.0f} мс [{method} {route}]: {short_statement(statement, 2000)}")
+
+
+def _handle_error(exception_context):
+    # Упавший запрос не доходит до after_cursor_execute — убираем его время старта
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def instrument_engine(engine):
+    """Подключает учёт запросов к движку (AsyncEngine или обычному)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,40 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from config.config import METRICS_TOKEN
+from monitoring.metrics import CONTENT_TYPE, render_metrics
+from monitoring.profiler import profile_store
+from user.models import User
+from user.auth.fastapi_users_instance import fastapi_users
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if METRICS_TOKEN:
+        authorization = request.headers.get("authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@router.get("/profiles/")
+async def list_profiles(
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(
+    profile_id: str,
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    """Свёрнутые стеки: `flamegraph.pl profile.txt > profile.svg` или загрузить в speedscope."""
+    collapsed = profile_store.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(collapsed)
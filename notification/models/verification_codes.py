@@ -1,15 +1,17 @@
 # models/verification_code.py
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Index, Integer, String, DateTime, Boolean
 from datetime import datetime, timedelta
 from uuid import uuid4
 from config.base_class import Base
 
 class VerificationCode(Base):
     __tablename__ = "verification_codes"
+    # Последний код для email
+    __table_args__ = (Index("ix_verification_codes_email_created_at", "email", "created_at"),)
 
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
-    email = Column(String, index=True, nullable=False)
+    email = Column(String, nullable=False)
     code = Column(String(4), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_verified = Column(Boolean, default=False)
\ No newline at end of file
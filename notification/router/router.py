@@ -14,10 +14,11 @@ router = APIRouter(prefix="/verify", tags=["Verification"])
 
 class EmailSchema(BaseModel):
     email: str
+    locale: str | None = None
 
 @router.post("/send-code")
 async def request_code(data: EmailSchema):
-    await send_email_verification_code(data.email)
+    await send_email_verification_code(data.email, locale=data.locale)
     return {"message": "Код отправлен на почту"}
 
 class EmailCodeSchema(BaseModel):
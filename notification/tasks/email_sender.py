@@ -9,8 +9,9 @@ from email.message import EmailMessage
 from config.config import SMTP_USER, SMTP_PASS, SMTP_HOST, SMTP_PORT
 from config.database import async_session_maker
 from rabbitmq.send import send_order_to_rabbitmq
+from notification.tasks.email_templates import render_email
 
-async def send_check_email(order_id: int):
+async def send_check_email(order_id: int, locale: str | None = None):
     print(f"[DEBUG] Запуск отправки чека по заказу ID = {order_id}")
 
     async with async_session_maker() as db:
@@ -39,59 +40,32 @@ async def send_check_email(order_id: int):
         address = f"{info.region}, г. {info.city}, {info.address_line1}, {info.postal_code}"
         total = order.total_price or Decimal("0.00")
 
-        rows = ""
-        for item in items:
-            product = item.product
-            product_name = product.good_name if product else "Неизвестный товар"
-            print(f"[DEBUG] Товар: {product_name}, Кол-во: {item.quantity}, Цена: {item.price}")
-            rows += f"""
-                <tr>
-                    <td>{product_name}</td>
-                    <td align="center">{item.quantity}</td>
-                    <td align="right">{item.price:.2f} сом</td>
-                </tr>
-            """
-
-        html_body = f"""
-        <html>
-        <body>
-            <h2>Чек за заказ №{order_id}</h2>
-            <p><strong>ФИО:</strong> {full_name}</p>
-            <p><strong>Адрес доставки:</strong> {address}</p>
-            <p><strong>Телефон:</strong> {info.phone}</p>
-
-            <h3>Состав заказа:</h3>
-            <table border="1" cellpadding="6" cellspacing="0" style="border-collapse: collapse;">
-                <thead>
-                    <tr>
-                        <th>Товар</th>
-                        <th>Кол-во</th>
-                        <th>Цена</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {rows}
-                    <tr>
-                        <td colspan="2" align="right"><strong>Итого:</strong></td>
-                        <td align="right"><strong>{total:.2f} сом</strong></td>
-                    </tr>
-                </tbody>
-            </table>
-
-            <p>Спасибо за покупку!</p>
-            <p>С уважением,<br>команда <strong>Style Shoes</strong></p>
-        </body>
-        </html>
-        """
+        email = render_email(
+            "receipt",
+            locale=locale,
+            order_id=order_id,
+            full_name=full_name,
+            address=address,
+            phone=info.phone,
+            items=[
+                {
+                    "name": item.product.good_name if item.product else None,
+                    "quantity": item.quantity,
+                    "price": item.price,
+                }
+                for item in items
+            ],
+            total=total,
+        )
 
         # Создаем email
         msg = EmailMessage()
         msg["From"] = f"Style Shoes <{SMTP_USER}>"
         msg["To"] = to_email
-        msg["Subject"] = f"Чек за заказ №{order_id}"
+        msg["Subject"] = email.subject
 
-        msg.set_content("Ваш заказ был успешно оплачен. Смотрите HTML-версию письма.")
-        msg.add_alternative(html_body, subtype="html")
+        msg.set_content(email.text)
+        msg.add_alternative(email.html, subtype="html")
 
         print(f"[DEBUG] Письмо подготовлено. Отправка на: {to_email}")
 
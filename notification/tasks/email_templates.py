@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+
+from config.config import EMAIL_DEFAULT_LOCALE
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+# Шаблоны не меняются во время работы процесса, поэтому отключаем проверку
+# файлов на диске и держим все скомпилированные шаблоны в памяти
+env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    cache_size=-1,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    html: str
+    text: str
+
+
+def precompile_templates() -> int:
+    """Компилирует все шаблоны писем один раз при старте приложения."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def _get_template(name: str, locale: str | None):
+    # Сначала ищем вариант для запрошенной локали, затем для локали по умолчанию
+    for candidate in (locale, EMAIL_DEFAULT_LOCALE):
+        if not candidate:
+            continue
+        try:
+            return env.get_template(f"{candidate}/{name}.html")
+        except TemplateNotFound:
+            continue
+    raise TemplateNotFound(f"{EMAIL_DEFAULT_LOCALE}/{name}.html")
+
+
+def render_email(name: str, locale: str | None = None, **context) -> RenderedEmail:
+    """
+    Рендерит письмо по имени шаблона и локали.
+
+    Тема и текстовая версия письма задаются в самом шаблоне через
+    `{% set subject %}` и `{% set text %}`. Результат не кешируется: шаблоны
+    уже скомпилированы, а письмо должно отражать текущие данные заказа.
+    """
+    module = _get_template(name, locale).make_module(context)
+    return RenderedEmail(
+        subject=str(getattr(module, "subject", "")),
+        html=str(module),
+        text=str(getattr(module, "text", "")),
+    )
+
+
+precompile_templates()
@@ -12,13 +12,14 @@ from email.message import EmailMessage
 from datetime import datetime
 
 from config.config import SMTP_USER, SMTP_PASS, SMTP_HOST, SMTP_PORT
+from notification.tasks.email_templates import render_email
 
 
 def generate_code() -> str:
     return f"{random.randint(1000, 9999)}"
 
 
-async def send_email_verification_code(email: str):
+async def send_email_verification_code(email: str, locale: str | None = None):
     print(f"[DEBUG] Отправка кода подтверждения для email = {email}")
     
     # Проверка времени последней отправки
@@ -37,24 +38,15 @@ async def send_email_verification_code(email: str):
 
     # Генерация и отправка (как было раньше)
     code = generate_code()
-    html_body = f"""
-    <html>
-    <body>
-        <h2>Подтверждение почты</h2>
-        <p>Ваш код подтверждения: <strong style="font-size: 24px;">{code}</strong></p>
-        <p>Введите этот код в приложении.</p>
-        <p>С уважением,<br>Команда <strong>Style Shoes</strong></p>
-    </body>
-    </html>
-    """
+    email_content = render_email("verification_code", locale=locale, code=code)
 
     msg = EmailMessage()
     msg["From"] = f"Style Shoes <{SMTP_USER}>"
     msg["To"] = email
-    msg["Subject"] = "Код подтверждения"
+    msg["Subject"] = email_content.subject
 
-    msg.set_content(f"Ваш код подтверждения: {code}")
-    msg.add_alternative(html_body, subtype="html")
+    msg.set_content(email_content.text)
+    msg.add_alternative(email_content.html, subtype="html")
 
     try:
         smtp = aiosmtplib.SMTP(hostname=SMTP_HOST, port=SMTP_PORT, start_tls=True)
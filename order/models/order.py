@@ -1,11 +1,13 @@
 
 from datetime import datetime
-from sqlalchemy import UUID, Column, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy import UUID, Column, DateTime, ForeignKey, Index, Integer, Numeric
 from sqlalchemy.orm import relationship
 from config.base_class import Base
 
 class Order(Base):
     __tablename__ = 'orders'
+    # Отчёты: оплаченные заказы за период
+    __table_args__ = (Index('ix_orders_status_id_created_at', 'status_id', 'created_at'),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID, nullable=True)
@@ -1,11 +1,13 @@
 
 from datetime import datetime
-from sqlalchemy import UUID, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import UUID, Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from config.base_class import Base
 
 class OrderInfo(Base):
     __tablename__ = 'order_infos'
+    # Последние данные доставки пользователя
+    __table_args__ = (Index('ix_order_infos_user_id_created_at', 'user_id', 'created_at'),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID, ForeignKey("users.id"), nullable=True)  # если авторизован
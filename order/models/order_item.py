@@ -9,7 +9,7 @@ class OrderItem(Base):
     __tablename__ = 'order_items'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.good_id"))
     quantity = Column(Integer, nullable=False)
     price = Column(Numeric(10, 2), nullable=False)  # фиксируется на момент заказа
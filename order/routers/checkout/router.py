@@ -94,26 +94,54 @@ async def payment_result(
     if not order_id or not payment_id:
         return {"status": "error", "message": "Missing order_id or payment_id"}
 
-    order = await db.get(Order, int(order_id))
+    # Блокируем заказ: повторные колбэки по одному заказу обрабатываются по очереди
+    order = await db.get(Order, int(order_id), with_for_update=True)
     if not order:
         return {"status": "error", "message": "Order not found"}
 
     if round(float(order.total_price), 2) != round(float(amount), 2):
         return {"status": "error", "message": "Amount mismatch"}
 
+    paid_status = await OrderStatusCRUD.get_by_name(name="paid", db=db)
+    cancelled_status = await OrderStatusCRUD.get_by_name(name="cancelled", db=db)
+    # Повторный колбэк по уже обработанному заказу ничего не меняет,
+    # иначе при повторе неуспешной оплаты товары вернулись бы на склад дважды
+    if order.status_id == cancelled_status.id and str(pg_result) == "1":
+        # Деньги списаны, а товары уже вернулись на склад — нужен ручной разбор
+        print(f"[ERROR] Успешная оплата {payment_id} по отменённому заказу {order_id}")
+        return {"status": "error", "message": "Order already cancelled"}
+    if order.status_id in (paid_status.id, cancelled_status.id):
+        return {"status": "ok"}
+
     if str(pg_result) == "1":
-        status = await OrderStatusCRUD.get_by_name(name="paid", db=db)
+        status = paid_status
         order.status_id = status.id
         background_tasks.add_task(send_check_email, int(order_id))
     else:
         # Если оплата не прошла, восстанавливаем количество товаров
         await restore_product_quantities(order_id, db)
-        status = await OrderStatusCRUD.get_by_name(name="cancelled", db=db)
+        status = cancelled_status
         order.status_id = status.id
 
     await db.commit()
     return {"status": "ok"}
 
+async def lock_products(db: AsyncSession, product_ids: list[int]):
+    """
+    SELECT ... FOR UPDATE по товарам. Уже загруженные объекты Product обновляются
+    актуальными остатками (populate_existing), поэтому изменение остатка в Python
+    не затирает параллельную продажу. Порядок по good_id исключает взаимные блокировки.
+    """
+    if not product_ids:
+        return
+    await db.execute(
+        select(Product)
+        .where(Product.good_id.in_(product_ids))
+        .order_by(Product.good_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
 async def restore_product_quantities(order_id: int, db: AsyncSession):
     """
     Восстанавливает количество товаров при отмене заказа.
@@ -131,6 +159,7 @@ async def restore_product_quantities(order_id: int, db: AsyncSession):
     stmt = select(OItem).where(OItem.order_id == order_id).options(selectinload(OItem.product))
     result = await db.execute(stmt)
     order_items = result.scalars().all()
+    await lock_products(db, [item.product_id for item in order_items])
     
     for item in order_items:
         product = item.product
@@ -163,7 +192,7 @@ async def cancel_order(order_id: int, db: AsyncSession = Depends(get_async_sessi
         dict: Статус операции и сообщение
     """
     # Получаем заказ
-    order = await db.get(Order, order_id)
+    order = await db.get(Order, order_id, with_for_update=True)
     if not order:
         raise HTTPException(404, "Заказ не найден")
     
@@ -172,11 +201,15 @@ async def cancel_order(order_id: int, db: AsyncSession = Depends(get_async_sessi
     if order.status_id == paid_status.id:
         raise HTTPException(400, "Нельзя отменить оплаченный заказ")
     
+    # Повторная отмена не должна второй раз возвращать товары на склад
+    cancelled_status = await OrderStatusCRUD.get_by_name(name="cancelled", db=db)
+    if order.status_id == cancelled_status.id:
+        return {"status": "ok", "message": "Заказ уже отменен"}
+    
     # Восстанавливаем количество товаров
     await restore_product_quantities(order_id, db)
     
     # Устанавливаем статус "отменен"
-    cancelled_status = await OrderStatusCRUD.get_by_name(name="cancelled", db=db)
     order.status_id = cancelled_status.id
     
     await db.commit()
@@ -210,6 +243,9 @@ async def checkout(data: ChekoutOrderCreate, db: AsyncSession = Depends(get_asyn
     if not cart_items:
         raise HTTPException(400, "Корзина пуста")
 
+    # Блокируем товары до конца транзакции, чтобы параллельные заказы не продали больше остатка
+    await lock_products(db, [item.product_id for item in cart_items])
+
     # Проверяем, что все товары в корзине доступны для заказа
     for item in cart_items:
         if item.product.display == 0:
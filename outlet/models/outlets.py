@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String
 from config.base_class import Base
 from sqlalchemy.orm import relationship
 
@@ -19,10 +19,11 @@ class Outlet(Base):
 
 class OutletProduct(Base):
     __tablename__ = "outlet_products"
+    __table_args__ = (Index("ix_outlet_products_outlet_id_product_id", "outlet_id", "product_id"),)
 
     id = Column(Integer, primary_key=True)
     outlet_id = Column(Integer, ForeignKey("outlets.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.good_id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.good_id"), nullable=False, index=True)
 
     outlet = relationship("Outlet", back_populates="products")
     product = relationship("Product", back_populates="outlets")
\ No newline at end of file
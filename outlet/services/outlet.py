@@ -8,6 +8,7 @@ from sqlalchemy.orm import selectinload
 from catalog.models.products import Product
 from outlet.models.outlets import Outlet, OutletProduct
 from outlet.schemas.outlet import OutletCreate, OutletUpdate
+from feeds.tasks.feed import request_feed_refresh
 
 
 class CRUDOutlet:
@@ -75,6 +76,7 @@ class CRUDOutlet:
                 product.retail_price_with_discount = round(discounted_price, 2)
 
         await session.commit()
+        request_feed_refresh()
         await session.refresh(outlet)
         return outlet
 
@@ -100,6 +102,7 @@ class CRUDOutlet:
 
         await session.delete(outlet)
         await session.commit()
+        request_feed_refresh()
         return True
 
 
@@ -121,6 +124,7 @@ class CRUDOutletProduct:
                 product.retail_price_with_discount = round(discounted_price, 2)
 
         await session.commit()
+        request_feed_refresh()
         return links
 
     @staticmethod
@@ -138,6 +142,7 @@ class CRUDOutletProduct:
                 product.retail_price_with_discount = product.retail_price
 
         await session.commit()
+        request_feed_refresh()
         return len(product_ids)
 
     @staticmethod
@@ -2,7 +2,7 @@ from datetime import date, datetime, time
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from order.models import Order, OrderItem
-from config.database import get_async_session
+from config.database import get_read_session
 from leads.models import Lead, LeadStatus
 from datetime import date, datetime, time
 from sqlalchemy import and_, func, select
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/mini/report", tags=["mini"])
 async def get_lead_status_report(
     start_date: date = Query(..., description="Дата начала (YYYY-MM-DD)"),
     end_date: date = Query(..., description="Дата окончания (YYYY-MM-DD)"),
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """
     Возвращает количество лидов по каждому статусу за указанный период.
@@ -44,7 +44,7 @@ async def get_lead_status_report(
 async def report_order(
     start_date: date = Query(..., description="Дата начала (YYYY-MM-DD)"),
     end_date: date = Query(..., description="Дата окончания (YYYY-MM-DD)"),
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
     # Маппинг поля сортировки
     sort_columns = {
@@ -81,7 +81,7 @@ async def report_order(
 
 @router.get("/top-products")
 async def get_top_products(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
     Топ-5 самых популярных товаров по количеству заказов за указанный период.
@@ -110,7 +110,7 @@ async def get_top_products(
     ]
 
 @router.get("/clients")
-async def get_clients_stats(db: AsyncSession = Depends(get_async_session),):
+async def get_clients_stats(db: AsyncSession = Depends(get_read_session),):
     # Кол-во зарегистрированных пользователей (клиентов), которые не суперадмины и имеют session_id
     registered_q = await db.execute(
         select(func.count(User.id))
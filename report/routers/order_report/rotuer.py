@@ -2,7 +2,7 @@ from datetime import date, datetime
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy import asc, desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.database import get_async_session
+from config.database import get_read_session
 from user.models import User
 from user.auth.fastapi_users_instance import fastapi_users
 from sqlalchemy.orm import selectinload
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/report/order", tags=["report"])
 async def order_details_report(
     start_date: date = Query(..., description="Дата начала (YYYY-MM-DD)"),
     end_date: date = Query(..., description="Дата окончания (YYYY-MM-DD)"),
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(fastapi_users.current_user(superuser=True))
 ):
     query = (
@@ -0,0 +1,106 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pyvips
+from fastapi import HTTPException, UploadFile
+
+from config.config import IMAGE_WORKERS, UPLOAD_MAX_SIZE
+
+# Отдельный пул под конвертацию изображений: libvips отпускает GIL, поэтому
+# потоки реально работают параллельно и не занимают общий пул asyncio.to_thread
+image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+
+
+async def run_image_job(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(image_executor, func, *args)
+
+
+def shutdown_image_executor():
+    image_executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def read_upload(file: UploadFile, max_size: int = UPLOAD_MAX_SIZE) -> bytes:
+    """Читает загруженный файл в память кусками, обрывая чтение при превышении лимита."""
+    buffer = bytearray()
+    while chunk := await file.read(1024 * 1024):
+        buffer.extend(chunk)
+        if len(buffer) > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Файл {file.filename} больше {max_size // (1024 * 1024)} MB",
+            )
+    return bytes(buffer)
+
+
+def convert_to_webp(data: bytes, quality: int = 80) -> bytes:
+    try:
+        image = pyvips.Image.new_from_buffer(data, "", access="sequential")
+        return image.write_to_buffer(".webp", Q=quality)  # Q — качество
+    except pyvips.Error as e:
+        raise HTTPException(status_code=400, detail=f"Не удалось обработать изображение: {e}")
+
+
+def make_product_images(data: bytes) -> tuple[bytes, bytes]:
+    """Готовит фото товара: полноразмерный PNG с альфа-каналом и WEBP-превью до 300px."""
+    try:
+        image = pyvips.Image.new_from_buffer(data, "")
+        image = image.colourspace("srgb")
+        if not image.hasalpha():
+            image = image.bandjoin(255)
+        big = image.write_to_buffer(".png", compression=9)
+
+        # Уменьшенная копия, без увеличения маленьких картинок
+        small = pyvips.Image.thumbnail_buffer(data, 300, height=300, size="down")
+        return big, small.write_to_buffer(".webp", Q=70)
+    except pyvips.Error as e:
+        raise HTTPException(status_code=400, detail=f"Не удалось обработать изображение: {e}")
+
+
+# Параметры кодирования для производных размеров
+VARIANT_ENCODERS = {
+    "webp": (".webp", {"Q": 75}),
+    "avif": (".avif", {"Q": 50, "effort": 4}),
+    "jpeg": (".jpg", {"Q": 80, "strip": True}),
+}
+VARIANT_MEDIA_TYPES = {"webp": "image/webp", "avif": "image/avif", "jpeg": "image/jpeg"}
+
+
+def render_variants(data: bytes, widths: list[int], formats: list[str]) -> list[dict]:
+    """
+    Создаёт уменьшенные копии изображения под каждую ширину и формат.
+    Ширины больше исходной пропускаются (картинки не увеличиваем), а если
+    исходник меньше всех ширин — создаётся одна копия в исходном размере.
+    """
+    try:
+        source_width = pyvips.Image.new_from_buffer(data, "").width
+        targets = sorted({w for w in widths if w <= source_width}) or [source_width]
+
+        variants = []
+        for width in targets:
+            # thumbnail_buffer декодирует сразу с уменьшением (shrink-on-load) — это быстрее resize
+            image = pyvips.Image.thumbnail_buffer(data, width, height=10_000_000, size="down")
+            # Результат читается последовательно — для нескольких кодировщиков держим его в памяти
+            image = image.copy_memory()
+            for fmt in formats:
+                suffix, options = VARIANT_ENCODERS[fmt]
+                variants.append({
+                    "width": image.width,
+                    "height": image.height,
+                    "format": fmt,
+                    "data": image.write_to_buffer(suffix, **options),
+                })
+        return variants
+    except pyvips.Error as e:
+        raise HTTPException(status_code=400, detail=f"Не удалось обработать изображение: {e}")
+
+
+def resize_image(data: bytes, width: int, fmt: str) -> bytes:
+    """Уменьшает изображение до заданной ширины (без увеличения) и кодирует в нужный формат."""
+    try:
+        suffix, options = VARIANT_ENCODERS[fmt]
+        image = pyvips.Image.thumbnail_buffer(data, width, height=10_000_000, size="down")
+        return image.write_to_buffer(suffix, **options)
+    except pyvips.Error as e:
+        raise HTTPException(status_code=400, detail=f"Не удалось обработать изображение: {e}")
+
@@ -0,0 +1,3 @@
+from .stored_images import StoredImage
+
+from config.base_class import Base
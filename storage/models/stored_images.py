@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from datetime import datetime
+from config.base_class import Base
+
+class StoredImage(Base):
+    """Индекс дедупликации: какой объект в S3 уже получен из файла с данным содержимым."""
+    __tablename__ = "stored_images"
+    __table_args__ = (UniqueConstraint("content_hash", "kind", name="uq_stored_images_hash_kind"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 исходного файла
+    kind = Column(String(30), nullable=False)  # вариант обработки: webp, product_big, product_small
+    url = Column(String(500), nullable=False)
+    size = Column(Integer)  # размер результата в байтах
+    created_at = Column(DateTime, default=datetime.utcnow)
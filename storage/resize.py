@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from fastapi.responses import RedirectResponse, StreamingResponse
+
+from config.config import (
+    IMAGE_RESIZE_CACHE, IMAGE_RESIZE_CACHE_DIR, IMAGE_RESIZE_CACHE_MAX_BYTES, IMAGE_RESIZE_FOLDER,
+)
+from storage.images import run_image_job, resize_image, VARIANT_MEDIA_TYPES
+from storage.s3 import s3_client
+
+
+def _read_chunks(f, chunk_size: int = 64 * 1024):
+    # Синхронный генератор: StreamingResponse читает его в пуле потоков
+    with f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+class DiskResizeCache:
+    """
+    Кеш копий на локальном диске. При чтении файл «трогается» (mtime), а при
+    превышении лимита удаляются самые давно читанные — простой LRU без индекса.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+        self._evicting = False
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}{os.path.splitext(key)[1]}")
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        # Чистим с запасом до 90% лимита, чтобы не запускать вытеснение на каждую запись
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._size = total
+
+    def _open(self, path: str):
+        # Открытый файл можно дочитать, даже если вытеснение удалит его с диска
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None, 0
+        os.utime(f.fileno())
+        return f, os.fstat(f.fileno()).st_size
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Уникальный временный файл: одну копию могут писать несколько воркеров
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _total_size(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    # Вся работа с диском — в потоке, чтобы медленный диск не блокировал event loop
+    async def response(self, key: str, media_type: str, headers: dict):
+        f, size = await asyncio.to_thread(self._open, self._path(key))
+        if f is None:
+            return None
+        return StreamingResponse(
+            _read_chunks(f), media_type=media_type, headers={**headers, "Content-Length": str(size)},
+        )
+
+    async def put(self, key: str, data: bytes, media_type: str):
+        await asyncio.to_thread(self._write, self._path(key), data)
+
+        if self._size is None:
+            self._size = await asyncio.to_thread(self._total_size)
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes and not self._evicting:
+            self._evicting = True
+            try:
+                await asyncio.to_thread(self._evict)
+            finally:
+                self._evicting = False
+
+
+class S3ResizeCache:
+    """Кеш копий в S3: повторные запросы перенаправляются на готовый объект."""
+
+    MAX_KNOWN = 100_000
+
+    def __init__(self, folder: str):
+        self.folder = folder.strip("/")
+        self._known: set[str] = set()  # ключи, про которые уже известно, что они есть в бакете
+
+    def _key(self, key: str) -> str:
+        return f"{self.folder}/{key}"
+
+    async def response(self, key: str, media_type: str, headers: dict):
+        object_key = self._key(key)
+        if object_key not in self._known:
+            try:
+                async with s3_client.get_client() as client:
+                    await client.head_object(Bucket=s3_client.bucket_name, Key=object_key)
+            except ClientError:
+                return None
+            self._remember(object_key)
+        return RedirectResponse(s3_client.object_url(object_key), status_code=307, headers=headers)
+
+    async def put(self, key: str, data: bytes, media_type: str):
+        folder, name = self._key(key).rsplit("/", 1)
+        if await s3_client.upload_bytes(data, name, folder=folder, content_type=media_type):
+            self._remember(self._key(key))
+
+    def _remember(self, object_key: str):
+        if len(self._known) >= self.MAX_KNOWN:
+            self._known.clear()
+        self._known.add(object_key)
+
+
+class ImageResizer:
+    """
+    Масштабирует изображения из бакета по запросу. Первый запрос создаёт копию
+    и кладёт её в кеш, последующие отдаются из кеша. Одновременные запросы
+    одной и той же копии ждут одну общую обработку.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def cache_key(source_key: str, width: int, fmt: str) -> str:
+        return f"{width}w/{source_key}.{fmt}"
+
+    async def cached_response(self, source_key: str, width: int, fmt: str, headers: dict):
+        key = self.cache_key(source_key, width, fmt)
+        return await self.cache.response(key, VARIANT_MEDIA_TYPES[fmt], headers)
+
+    async def render(self, source_key: str, width: int, fmt: str) -> bytes:
+        key = self.cache_key(source_key, width, fmt)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render_and_cache(key, source_key, width, fmt))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield: отмена одного запроса не прерывает обработку для остальных
+        return await asyncio.shield(task)
+
+    async def _render_and_cache(self, key: str, source_key: str, width: int, fmt: str) -> bytes:
+        data = await self._render(source_key, width, fmt)
+        # Ошибка кеша не должна ломать ответ — копия уже готова
+        try:
+            await self.cache.put(key, data, VARIANT_MEDIA_TYPES[fmt])
+        except Exception as e:
+            print(f"[ERROR] Не удалось сохранить копию {key} в кеш: {e}")
+        return data
+
+    async def _render(self, source_key: str, width: int, fmt: str) -> bytes:
+        try:
+            source = await s3_client.download(source_key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise HTTPException(status_code=404, detail="Image not found")
+            raise
+        return await run_image_job(resize_image, source, width, fmt)
+
+
+if IMAGE_RESIZE_CACHE == "disk":
+    image_resizer = ImageResizer(DiskResizeCache(IMAGE_RESIZE_CACHE_DIR, IMAGE_RESIZE_CACHE_MAX_BYTES))
+else:
+    image_resizer = ImageResizer(S3ResizeCache(IMAGE_RESIZE_FOLDER))
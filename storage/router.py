@@ -1,93 +1,189 @@
-import tempfile
-from fastapi import APIRouter, File, UploadFile, Depends
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from user.auth.fastapi_users_instance import fastapi_users
 from user.auth.auth import auth_backend
-import pyvips
-from storage.s3 import S3Client
-from config.config import S3_ACCESS_KEY, S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_SECRET_KEY
+from storage.s3 import s3_client
+from storage.images import (
+    read_upload, run_image_job, convert_to_webp, make_product_images, VARIANT_ENCODERS, VARIANT_MEDIA_TYPES,
+)
+from storage.services.images import StoredImageCRUD, content_hash
+from storage.resize import image_resizer
 from user.models import User
-import aiofiles
-import uuid
+from config.database import get_async_session
+from catalog.models import ProductImage
+from catalog.tasks.image_variants import request_image_variants
+from config.config import (
+    UPLOAD_CONCURRENCY, IMAGE_RESIZE_SOURCE_PREFIX, IMAGE_RESIZE_MAX_WIDTH, IMAGE_RESIZE_WIDTH_STEP, IMAGE_RESIZE_MAX_AGE,
+    IMAGE_RESIZE_FOLDER, IMAGE_VARIANT_FOLDER,
+)
 import asyncio
-import os
-from PIL import Image
-import io
 
 router = APIRouter(prefix="/storage", tags=["storage"])
 
-s3_client = S3Client(
-    access_key=S3_ACCESS_KEY,
-    secret_key=S3_SECRET_KEY,
-    endpoint_url=S3_ENDPOINT_URL,
-    bucket_name=S3_BUCKET_NAME,
-)
+async def process_uploads(files: List[UploadFile], process) -> list:
+    """
+    Прогоняет файлы через process(file) по одному конвейеру на файл
+    (чтение -> хеш -> поиск дубликата -> обработка -> S3), не больше
+    UPLOAD_CONCURRENCY одновременно: в памяти только эти файлы, а не вся пачка.
+    Результаты возвращаются в порядке файлов.
+
+    Каждый файл регистрируется в stored_images сразу после загрузки, поэтому
+    ошибка в одном файле не оставляет соседние сиротами в S3: повторная
+    отправка пачки найдёт их по хешу. После первой ошибки ещё не начатые файлы
+    пропускаются, а запрос завершается ошибкой со списком файлов.
+    """
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    failed, skipped = [], []
+
+    async def run(file: UploadFile):
+        async with semaphore:
+            if failed:
+                skipped.append(file.filename)
+                return None
+            try:
+                return await process(file)
+            except HTTPException as e:
+                failed.append({"filename": file.filename, "status": e.status_code, "detail": e.detail})
+            except Exception as e:
+                print(f"[ERROR] Не удалось обработать файл {file.filename}: {e}")
+                failed.append({"filename": file.filename, "status": 502, "detail": str(e)})
+
+    results = await asyncio.gather(*[run(f) for f in files])
+    if failed:
+        raise HTTPException(
+            status_code=failed[0]["status"],
+            detail={"message": "Не все файлы загружены", "failed": failed, "skipped": skipped},
+        )
+    return results
+
+
+async def upload_or_fail(data: bytes, name: str, folder: str, content_type: str) -> str:
+    url = await s3_client.upload_bytes(data, name, folder=folder, content_type=content_type)
+    if not url:
+        raise HTTPException(status_code=502, detail=f"Не удалось загрузить {folder}/{name} в хранилище")
+    return url
+
+
+async def read_and_hash(file: UploadFile) -> tuple[str, bytes]:
+    data = await read_upload(file)
+    return await run_image_job(content_hash, data), data
+
 
 @router.post("/upload")
 async def upload_files(
     files: List[UploadFile] = File(...), 
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(fastapi_users.current_user(superuser=True))
 ):
-    uploaded_urls = []
+    # Сессию нельзя использовать из нескольких задач одновременно
+    db_lock = asyncio.Lock()
 
     async def process_file(file: UploadFile):
-        # Сначала читаем весь файл в temp
-        temp_in = f"temp_{uuid.uuid4()}.dat"
-        temp_out = f"temp_{uuid.uuid4()}.webp"
-        async with aiofiles.open(temp_in, "wb") as w:
-            while chunk := await file.read(1024 * 1024):
-                await w.write(chunk)
-
-        def convert():
-            image = pyvips.Image.new_from_file(temp_in, access="sequential")
-            image.write_to_file(temp_out, Q=80)  # Q — качество
-
-        await asyncio.to_thread(convert)
-
-        url = await s3_client.upload_file(temp_out, folder="nurcase")
-        os.remove(temp_in)
+        # Файлы адресуются хешем содержимого: уже загруженные ранее не конвертируются и не загружаются повторно
+        digest, data = await read_and_hash(file)
+        async with db_lock:
+            known = await StoredImageCRUD.lookup(session, {(digest, "webp")})
+        if known:
+            return known[(digest, "webp")]
+
+        # Весь конвейер в памяти: загрузка -> конвертация в WEBP -> S3, без временных файлов
+        webp = await run_image_job(convert_to_webp, data, 80)
+        url = await upload_or_fail(webp, f"{digest}.webp", "nurcase", "image/webp")
+        async with db_lock:
+            await StoredImageCRUD.register(session, [{"content_hash": digest, "kind": "webp", "url": url, "size": len(webp)}])
         return url
 
-    # Параллельная загрузка всех файлов
-    uploaded_urls = await asyncio.gather(*[process_file(f) for f in files])
-
-    return {"uploaded_urls": uploaded_urls}
+    return {"uploaded_urls": await process_uploads(files, process_file)}
 
 
 @router.post("/upload/products")
 async def upload_product_files(
     files: List[UploadFile] = File(...),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(fastapi_users.current_user(superuser=True))
 ):
-    async def process_file(file: UploadFile):
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGBA")
-        file_id = str(uuid.uuid4())
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as temp_png_file, \
-             tempfile.NamedTemporaryFile(delete=False, suffix=".webp") as temp_webp_file:
+    db_lock = asyncio.Lock()
 
-            # Сохраняем PNG
-            image.save(temp_png_file.name, format="PNG", optimize=True)
-
-            # Сохраняем WebP (уменьшенная копия)
-            small_img = image.copy()
-            small_img.thumbnail((300, 300))
-            small_img.save(temp_webp_file.name, format="WEBP", quality=70)
+    async def process_file(file: UploadFile):
+        digest, data = await read_and_hash(file)
+        async with db_lock:
+            known = await StoredImageCRUD.lookup(session, {(digest, "product_big"), (digest, "product_small")})
+        if len(known) < 2:
+            # Кодирование PNG и превью — в пуле обработки изображений, а не в event loop
+            big, small = await run_image_job(make_product_images, data)
+            big_url, small_url = await asyncio.gather(
+                upload_or_fail(big, f"{digest}.png", "nurcase/products", "image/png"),
+                upload_or_fail(small, f"{digest}.webp", "nurcase/products", "image/webp"),
+                return_exceptions=True,
+            )
+            rows = [
+                {"content_hash": digest, "kind": "product_big", "url": big_url, "size": len(big)},
+                {"content_hash": digest, "kind": "product_small", "url": small_url, "size": len(small)},
+            ]
+            # Успешно загруженную половину регистрируем и при ошибке второй — иначе она осиротеет
+            async with db_lock:
+                await StoredImageCRUD.register(session, [row for row in rows if isinstance(row["url"], str)])
+            for row in rows:
+                if isinstance(row["url"], BaseException):
+                    raise row["url"]
+            known = {(digest, row["kind"]): row["url"] for row in rows}
+        return {
+            "id": digest,
+            "big": known[(digest, "product_big")],
+            "small": known[(digest, "product_small")],
+        }
 
-            # Загрузка в S3
-            big_url = await s3_client.upload_file(temp_png_file.name, folder="nurcase/products")
-            small_url = await s3_client.upload_file(temp_webp_file.name, folder="nurcase/products")
+    return {"uploaded": await process_uploads(files, process_file)}
 
-        # Удаление после загрузки
-        # os.remove(temp_png_file.name)
-        # os.remove(temp_webp_file.name)
 
-        return {
-            "id": file_id,
-            "big": big_url,
-            "small": small_url
-        }
+@router.post("/variants/rebuild")
+async def rebuild_image_variants(
+    force: bool = False,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(fastapi_users.current_user(superuser=True))
+):
+    """Запускает создание уменьшенных копий; force=true пересоздаёт их для всех изображений."""
+    if force:
+        await session.execute(update(ProductImage).values(variants=None))
+        await session.commit()
+    request_image_variants()
+    return {"detail": "Image variants rebuild scheduled"}
+
+
+@router.get("/resize/{key:path}")
+async def resize_stored_image(
+    key: str,
+    request: Request,
+    w: int = Query(..., gt=0, description="Ширина в пикселях"),
+    fmt: str = Query("auto", alias="format", description="webp, avif, jpeg или auto — по заголовку Accept"),
+):
+    """
+    Отдаёт копию изображения из бакета нужной ширины и формата. Копия создаётся
+    при первом запросе и дальше берётся из кеша (S3 или локальный диск).
+    """
+    # Готовые копии (кеш и предсозданные размеры) повторно не масштабируем — иначе кеш растёт рекурсивно
+    derived = any(key.startswith(folder.strip("/") + "/") for folder in (IMAGE_RESIZE_FOLDER, IMAGE_VARIANT_FOLDER))
+    if not key.startswith(IMAGE_RESIZE_SOURCE_PREFIX) or derived or ".." in key.split("/"):
+        raise HTTPException(status_code=404, detail="Image not found")
+    if w > IMAGE_RESIZE_MAX_WIDTH:
+        raise HTTPException(status_code=400, detail=f"Width must be at most {IMAGE_RESIZE_MAX_WIDTH}")
+
+    headers = {"Cache-Control": f"public, max-age={IMAGE_RESIZE_MAX_AGE}"}
+    if fmt == "auto":
+        fmt = "avif" if "image/avif" in request.headers.get("accept", "") else "webp"
+        headers["Vary"] = "Accept"
+    elif fmt not in VARIANT_ENCODERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+
+    # Округляем ширину вверх до шага, чтобы произвольные значения не раздували кеш
+    width = min(-(-w // IMAGE_RESIZE_WIDTH_STEP) * IMAGE_RESIZE_WIDTH_STEP, IMAGE_RESIZE_MAX_WIDTH)
+
+    cached = await image_resizer.cached_response(key, width, fmt, headers)
+    if cached is not None:
+        return cached
+    data = await image_resizer.render(key, width, fmt)
+    return Response(content=data, media_type=VARIANT_MEDIA_TYPES[fmt], headers=headers)
 
-    uploaded = await asyncio.gather(*[process_file(f) for f in files])
-    return {"uploaded": uploaded}
\ No newline at end of file
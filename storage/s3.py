@@ -1,12 +1,56 @@
 import os
+import io
+import base64
+import hashlib
+import inspect
+import re
+import asyncio
 import aiofiles
 from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
 from aiobotocore.config import AioConfig
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from config.config import (
+    S3_ACCESS_KEY, S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_SECRET_KEY,
+    S3_MAX_CONCURRENCY, S3_SHUTDOWN_TIMEOUT,
+    S3_MULTIPART_PART_SIZE, S3_MULTIPART_CONCURRENCY,
+)
+
+_MD5_ETAG = re.compile(r"^[0-9a-f]{32}(-\d+)?$")
+
+
+class S3ChecksumError(Exception):
+    pass
+
+
+def _verify_etag(etag: str | None, expected: str, key: str):
+    # Некоторые S3-совместимые хранилища (и шифрование SSE-KMS) возвращают ETag не в виде MD5 —
+    # такие ответы не сверяем, полагаясь на проверку Content-MD5 на стороне сервера
+    etag = (etag or "").strip('"')
+    if _MD5_ETAG.match(etag) and etag != expected:
+        raise S3ChecksumError(f"Checksum mismatch for {key}: expected {expected}, got {etag}")
 
 class S3Client:
-    def __init__(self, access_key, secret_key, endpoint_url, bucket_name):
+    """
+    Обёртка над одним долгоживущим клиентом S3.
+
+    Клиент создаётся один раз (в lifespan приложения или при первом обращении)
+    и переиспользуется всеми загрузками, поэтому соединения из пула не
+    пересоздаются на каждый файл. Число одновременных запросов ограничено
+    семафором, а при остановке клиент дожидается незавершённых загрузок.
+    """
+
+    def __init__(
+        self,
+        access_key,
+        secret_key,
+        endpoint_url,
+        bucket_name,
+        max_concurrency: int = 20,
+        part_size: int = 5 * 1024 * 1024,
+        multipart_concurrency: int = 4,
+    ):
         self.config = {
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
@@ -16,67 +60,202 @@ class S3Client:
         self.bucket_name = bucket_name
         self.endpoint_url = endpoint_url
         self.session = get_session()
-        self.aio_config = AioConfig(max_pool_connections=50)  # Увеличение одновременных подключений
+        self.aio_config = AioConfig(max_pool_connections=max(50, max_concurrency))  # Увеличение одновременных подключений
+        self.max_concurrency = max_concurrency
+        self.part_size = max(part_size, 5 * 1024 * 1024)  # минимальный размер части в S3 — 5 MB
+        self.multipart_concurrency = multipart_concurrency
+
+        self._client = None
+        self._exit_stack: AsyncExitStack | None = None
+        self._start_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def start(self):
+        async with self._start_lock:
+            if self._client is not None:
+                return
+            exit_stack = AsyncExitStack()
+            self._client = await exit_stack.enter_async_context(
+                self.session.create_client(
+                    "s3",
+                    region_name="ru-1",
+                    config=self.aio_config,
+                    **self.config
+                )
+            )
+            self._exit_stack = exit_stack
+
+    async def close(self, timeout: float = 30):
+        # Даём незавершённым загрузкам доделаться, затем закрываем соединения
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"[WARNING] S3: закрываем клиент с {self._in_flight} незавершёнными запросами")
+        async with self._start_lock:
+            if self._exit_stack is not None:
+                await self._exit_stack.aclose()
+            self._client = None
+            self._exit_stack = None
 
     @asynccontextmanager
     async def get_client(self):
-        async with self.session.create_client(
-            "s3",
-            region_name="ru-1",
-            config=self.aio_config,
-            **self.config
-        ) as client:
-            yield client
-
-    async def _multipart_upload(self, client, file_path, key, part_size=5 * 1024 * 1024):
-        mpu = await client.create_multipart_upload(Bucket=self.bucket_name, Key=key)
+        if self._client is None:
+            await self.start()
+        async with self._semaphore:
+            self._in_flight += 1
+            self._idle.clear()
+            try:
+                yield self._client
+            finally:
+                self._in_flight -= 1
+                if self._in_flight == 0:
+                    self._idle.set()
+
+    def object_key(self, name: str, folder: str = None) -> str:
+        if folder:
+            folder = folder.strip("/")
+            return f"{folder}/{name}"
+        return name
+
+    def object_url(self, key: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket_name}/{key}"
+
+    def key_from_url(self, url: str) -> str | None:
+        prefix = f"{self.endpoint_url}/{self.bucket_name}/"
+        if url and url.startswith(prefix):
+            return url[len(prefix):]
+        return None
+
+    async def download(self, key: str) -> bytes:
+        async with self.get_client() as client:
+            response = await client.get_object(Bucket=self.bucket_name, Key=key)
+            async with response["Body"] as stream:
+                return await stream.read()
+
+    async def _put_object(self, client, data: bytes, key: str, extra: dict):
+        md5 = hashlib.md5(data)
+        # Content-MD5 проверяется на стороне S3 — битый запрос будет отклонён
+        response = await client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=data,
+            ContentMD5=base64.b64encode(md5.digest()).decode(),
+            **extra,
+        )
+        _verify_etag(response.get("ETag"), md5.hexdigest(), key)
+
+    async def _multipart_upload(self, client, first_part: bytes, read_part, key: str, extra: dict):
+        """
+        Загружает части параллельно, держа в памяти не больше `multipart_concurrency`
+        частей. При любой ошибке незавершённая загрузка отменяется (abort),
+        чтобы в бакете не оставались «висящие» части.
+        """
+        mpu = await client.create_multipart_upload(Bucket=self.bucket_name, Key=key, **extra)
+        upload_id = mpu["UploadId"]
+        window = asyncio.Semaphore(self.multipart_concurrency)
         parts = []
-        async with aiofiles.open(file_path, 'rb') as f:
-            part_number = 1
-            while True:
-                data = await f.read(part_size)
-                if not data:
-                    break
+        digests = {}
+        tasks = []
+
+        async def upload_part(part_number: int, data: bytes):
+            try:
+                digest = hashlib.md5(data).digest()
                 response = await client.upload_part(
                     Bucket=self.bucket_name,
                     Key=key,
                     PartNumber=part_number,
-                    UploadId=mpu["UploadId"],
-                    Body=data
+                    UploadId=upload_id,
+                    Body=data,
+                    ContentMD5=base64.b64encode(digest).decode(),
                 )
+                digests[part_number] = digest
                 parts.append({
                     'ETag': response['ETag'],
                     'PartNumber': part_number,
                 })
+            finally:
+                window.release()
+
+        try:
+            part_number = 1
+            data = first_part
+            while data:
+                await window.acquire()
+                # Не читаем дальше, если какая-то часть уже упала
+                for task in tasks:
+                    if task.done() and task.exception():
+                        window.release()
+                        raise task.exception()
+                tasks.append(asyncio.create_task(upload_part(part_number, data)))
                 part_number += 1
-        await client.complete_multipart_upload(
-            Bucket=self.bucket_name,
-            Key=key,
-            UploadId=mpu["UploadId"],
-            MultipartUpload={'Parts': parts}
-        )
+                data = await read_part()
+            await asyncio.gather(*tasks)
+
+            parts.sort(key=lambda part: part['PartNumber'])
+            response = await client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            expected = hashlib.md5(b"".join(digests[part['PartNumber']] for part in parts)).hexdigest()
+            _verify_etag(response.get("ETag"), f"{expected}-{len(parts)}", key)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            except ClientError as e:
+                print(f"Error aborting multipart upload {key}: {e}")
+            raise
+
+    async def upload_fileobj(self, fileobj, name: str, folder: str = None, content_type: str = None):
+        """
+        Загружает объект из файлоподобного источника (UploadFile, aiofiles, BytesIO),
+        читая его частями — файл целиком в память и на диск не попадает.
+        Небольшие объекты отправляются одним put_object, большие — multipart.
+        """
+        key = self.object_key(name, folder)
+        extra = {"ContentType": content_type} if content_type else {}
+
+        async def read_part() -> bytes:
+            data = fileobj.read(self.part_size)
+            if inspect.isawaitable(data):
+                data = await data
+            return data
 
-    async def upload_file(self, file_path: str, folder: str = None):
-        object_name = os.path.basename(file_path)
-        if folder:
-            folder = folder.strip("/")
-            object_name = f"{folder}/{object_name}"
         try:
             async with self.get_client() as client:
-                file_size = os.path.getsize(file_path)
-                if file_size > 5 * 1024 * 1024:  # 5 MB threshold for multipart
-                    await self._multipart_upload(client, file_path, object_name)
+                first_part = await read_part()
+                if len(first_part) < self.part_size:
+                    await self._put_object(client, first_part, key, extra)
                 else:
-                    async with aiofiles.open(file_path, "rb") as file:
-                        content = await file.read()
-                        await client.put_object(
-                            Bucket=self.bucket_name,
-                            Key=object_name,
-                            Body=content,
-                        )
-                url = f"{self.endpoint_url}/{self.bucket_name}/{object_name}"
-                os.remove(file_path)
-                return url
-        except ClientError as e:
+                    await self._multipart_upload(client, first_part, read_part, key, extra)
+            return self.object_url(key)
+        except (ClientError, S3ChecksumError) as e:
             print(f"Error uploading file: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    async def upload_bytes(self, data: bytes, name: str, folder: str = None, content_type: str = None):
+        return await self.upload_fileobj(io.BytesIO(data), name, folder=folder, content_type=content_type)
+
+    async def upload_file(self, file_path: str, folder: str = None):
+        async with aiofiles.open(file_path, "rb") as file:
+            url = await self.upload_fileobj(file, os.path.basename(file_path), folder=folder)
+        if url:
+            os.remove(file_path)
+        return url
+
+s3_client = S3Client(
+    access_key=S3_ACCESS_KEY,
+    secret_key=S3_SECRET_KEY,
+    endpoint_url=S3_ENDPOINT_URL,
+    bucket_name=S3_BUCKET_NAME,
+    max_concurrency=S3_MAX_CONCURRENCY,
+    part_size=S3_MULTIPART_PART_SIZE,
+    multipart_concurrency=S3_MULTIPART_CONCURRENCY,
+)
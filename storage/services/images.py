@@ -0,0 +1,36 @@
+import hashlib
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from storage.models import StoredImage
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class StoredImageCRUD:
+    @staticmethod
+    async def lookup(session: AsyncSession, keys: set[tuple[str, str]]) -> dict[tuple[str, str], str]:
+        """Возвращает уже загруженные объекты по парам (хеш содержимого, вариант обработки)."""
+        if not keys:
+            return {}
+        result = await session.execute(
+            select(StoredImage.content_hash, StoredImage.kind, StoredImage.url)
+            .where(tuple_(StoredImage.content_hash, StoredImage.kind).in_(list(keys)))
+        )
+        return {(row.content_hash, row.kind): row.url for row in result}
+
+    @staticmethod
+    async def register(session: AsyncSession, rows: list[dict]):
+        """Добавляет записи {content_hash, kind, url, size}; уже известные пропускаются."""
+        if not rows:
+            return
+        await session.execute(
+            insert(StoredImage)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["content_hash", "kind"])
+        )
+        await session.commit()
@@ -0,0 +1,55 @@
+import asyncio
+import hashlib
+
+import httpx
+
+from config.config import IMAGE_VARIANT_WIDTHS, IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_FOLDER
+from storage.images import run_image_job, render_variants, VARIANT_MEDIA_TYPES
+from storage.s3 import s3_client
+
+
+def variant_key(source_url: str, width: int, fmt: str) -> str:
+    """
+    Ключ копии зависит только от исходного URL, ширины и формата: повторная
+    генерация перезаписывает те же объекты, а не плодит новые.
+    """
+    digest = hashlib.sha1(source_url.encode()).hexdigest()[:20]
+    return f"{IMAGE_VARIANT_FOLDER.strip('/')}/{digest}/{width}w.{fmt}"
+
+
+async def fetch_source(url: str) -> bytes:
+    # Свои картинки читаем напрямую из бакета, остальные — по HTTP
+    key = s3_client.key_from_url(url)
+    if key:
+        return await s3_client.download(key)
+    async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.content
+
+
+async def build_variants(source_url: str, data: bytes = None) -> list[dict]:
+    """
+    Создаёт и загружает в S3 набор уменьшенных копий изображения.
+    Возвращает список {width, height, format, url} для записи в ProductImage.variants.
+    """
+    if data is None:
+        data = await fetch_source(source_url)
+    rendered = await run_image_job(render_variants, data, IMAGE_VARIANT_WIDTHS, IMAGE_VARIANT_FORMATS)
+
+    async def upload(variant: dict):
+        key = variant_key(source_url, variant["width"], variant["format"])
+        folder, name = key.rsplit("/", 1)
+        url = await s3_client.upload_bytes(
+            variant["data"], name, folder=folder, content_type=VARIANT_MEDIA_TYPES[variant["format"]]
+        )
+        if not url:
+            raise RuntimeError(f"Не удалось загрузить {key}")
+        return {
+            "width": variant["width"],
+            "height": variant["height"],
+            "format": variant["format"],
+            "url": url,
+        }
+
+    return list(await asyncio.gather(*[upload(v) for v in rendered]))